@@ -0,0 +1,309 @@
+import asyncio
+import logging
+import os
+import time
+from http import HTTPStatus
+
+import aiohttp
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_helper import ApiException, ApiTelegramException
+
+import bootstrap  # noqa: F401
+import circuit_breaker
+import metrics
+from delivery import DeliveryQueue
+from exceptions import (AbsenceVariableException,
+                        ApiUnavailableException,
+                        RequestException,
+                        RequestNoContentException)
+from homework import (API_CONNECT_TIMEOUT,
+                      API_READ_TIMEOUT,
+                      API_TOTAL_TIMEOUT,
+                      ENDPOINT,
+                      RETRY_PERIOD,
+                      TELEGRAM_TOKEN)
+from logconfig import log_fields, start_listener
+from outbox import open_outbox, start_delivery
+from sender import SENT, RateLimitedSender
+from storage import open_state_store
+from tenants import (TenantScheduler,
+                     confirm_delivery,
+                     dispatch_notifications,
+                     load_tenants,
+                     poll_failed,
+                     restore_tenants)
+
+# Максимальное число одновременных запросов к API.
+ASYNC_MAX_CONCURRENCY = int(os.getenv('ASYNC_MAX_CONCURRENCY', 20))
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+def api_timeout():
+    """Таймауты соединения, чтения и всего запроса для сессии aiohttp."""
+    return aiohttp.ClientTimeout(
+        total=API_TOTAL_TIMEOUT,
+        sock_connect=API_CONNECT_TIMEOUT,
+        sock_read=API_READ_TIMEOUT
+    )
+
+
+async def fetch_api_answer_async(session, headers, timestamp):
+    """Асинхронно делает запрос к API-сервиса Практикум.Домашка."""
+    try:
+        with metrics.API_LATENCY.time():
+            async with session.get(
+                ENDPOINT,
+                headers=headers,
+                params={'from_date': timestamp}
+            ) as response:
+                response.raise_for_status()
+                metrics.LAST_SUCCESS.set_to_current_time(
+                    operation='get_api_answer'
+                )
+                if response.status == HTTPStatus.NO_CONTENT:
+                    raise RequestNoContentException(
+                        'Запрос выполнен, но нет содержимого для возврата.'
+                    )
+                return await response.json()
+    except aiohttp.ClientResponseError as error:
+        exception_class = RequestException
+        if error.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            exception_class = ApiUnavailableException
+        raise exception_class(
+            f'Ошибка при выполнении запроса: {error}.'
+            f'ENDPOINT: {ENDPOINT} params: {timestamp}'
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        raise ApiUnavailableException(
+            f'Ошибка при выполнении запроса: {error}.'
+            f'ENDPOINT: {ENDPOINT} params: {timestamp}'
+        )
+
+
+async def send_message_async(bot, chat_id, message):
+    """Асинхронно отправляет сообщение в указанный Telegram-чат."""
+    try:
+        with metrics.SEND_LATENCY.time() as timer:
+            await bot.send_message(chat_id, message)
+        logger.debug(
+            f'Сообщение отправлено в чат {chat_id}.',
+            extra=log_fields(chat_id=chat_id, latency=timer.elapsed)
+        )
+        metrics.LAST_SUCCESS.set_to_current_time(operation='send_message')
+        return True
+    except ApiException as error:
+        metrics.count_exception(error)
+        logger.error(
+            f'Сообщение не отправлено, из-за ошибки {error}.',
+            extra=log_fields(error=error, chat_id=chat_id)
+        )
+    except aiohttp.ClientError as error:
+        metrics.count_exception(error)
+        logger.error(
+            'При обработке запроса произошло неоднозначное исключение.',
+            extra=log_fields(error=error, chat_id=chat_id)
+        )
+
+
+async def poll_tenant_async(
+    session, bot, tenant, semaphore, store=None, queue=None, outbox=None
+):
+    """Выполняет один асинхронный цикл опроса API для студента.
+
+    Уведомления доставляются так же, как в poll_tenant.
+    """
+    try:
+        async with semaphore:
+            response = await circuit_breaker.api_breaker.call_async(
+                fetch_api_answer_async,
+                session, tenant.headers, tenant.timestamp
+            )
+        for homework, message in dispatch_notifications(
+            tenant, response, store, queue, outbox
+        ):
+            if await send_message_async(bot, tenant.chat_id, message):
+                confirm_delivery(tenant, homework)
+        if store is not None:
+            store.save(tenant.key, tenant.state)
+        return True
+    except Exception as error:
+        return poll_failed(tenant, error)
+
+
+class AsyncRateLimitedSender(RateLimitedSender):
+    """RateLimitedSender для AsyncTeleBot.
+
+    Те же вёдра токенов, пауза retry_after после ответа 429
+    и предел попыток, но отправка ждёт ответа Telegram
+    в цикле событий.
+    """
+
+    async def drain(self, now=None):
+        """Отправляет сообщения, разрешённые лимитами; возвращает их число."""
+        now = time.monotonic() if now is None else now
+        sent = 0
+        dispatch = self._dispatch(now)
+        outcome = None
+        try:
+            while True:
+                message = dispatch.send(outcome)
+                outcome = await self._deliver(message, now)
+                sent += outcome == SENT
+        except StopIteration:
+            return sent
+
+    async def _deliver(self, message, now):
+        try:
+            with metrics.SEND_LATENCY.time():
+                await self.bot.send_message(message.chat_id, message.text)
+        except ApiTelegramException as error:
+            return self._failed(message, now, error)
+        except (ApiException, aiohttp.ClientError) as error:
+            metrics.count_exception(error)
+            return self._retry(message, now, error)
+        return self._sent(message)
+
+
+async def flush_queue_async(queue, sender, force=False):
+    """Передаёт готовые сообщения очереди в sender и отправляет их."""
+    sender.take(queue, force=force)
+    return await sender.drain()
+
+
+class AsyncPoller:
+    """Опрашивает всех студентов в одном цикле событий.
+
+    Число одновременных запросов к API ограничено семафором,
+    медленный ответ для одного студента не задерживает остальных.
+    """
+
+    def __init__(
+        self, registry, session, bot,
+        max_concurrency=ASYNC_MAX_CONCURRENCY, period=RETRY_PERIOD,
+        store=None, queue=None, sender=None, outbox=None
+    ):
+        self.session = session
+        self.bot = bot
+        self.store = store
+        self.queue = queue
+        self.outbox = outbox
+        if queue is not None and sender is None:
+            sender = AsyncRateLimitedSender(bot)
+        self.sender = sender
+        self.scheduler = TenantScheduler(
+            registry, period, queue=queue, sender=sender, outbox=outbox
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks = set()
+        self._in_flight = set()
+        self._wakeup = asyncio.Event()
+
+    async def poll(self, tenant):
+        """Опрашивает студента и ставит следующий опрос в очередь."""
+        self._in_flight.add(tenant.key)
+        try:
+            succeeded = await poll_tenant_async(
+                self.session, self.bot, tenant, self.semaphore,
+                self.store, self.queue, self.outbox
+            )
+        finally:
+            self._in_flight.discard(tenant.key)
+        self.scheduler.reschedule(tenant, succeeded)
+        self._wakeup.set()
+        return succeeded
+
+    async def poll_now(self, tenant):
+        """Опрашивает студента вне очереди, например по команде из чата.
+
+        Возвращает None, если опрос студента уже идёт.
+        """
+        if tenant.key in self._in_flight:
+            return None
+        self.scheduler.cancel(tenant)
+        return await self.poll(tenant)
+
+    def run_pending(self):
+        """Запускает опрос студентов, чья очередь подошла."""
+        for tenant in self.scheduler.pop_due(time.monotonic()):
+            task = asyncio.create_task(self.poll(tenant))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def run_forever(self):
+        """Бесконечно опрашивает студентов по расписанию.
+
+        Завершившийся опрос будит цикл, чтобы пересчитать время
+        ближайшего опроса и отправки сообщений.
+        """
+        while True:
+            self._wakeup.clear()
+            self.run_pending()
+            if self.queue is not None:
+                await flush_queue_async(self.queue, self.sender)
+            self.scheduler.report_queue_depth()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    self.scheduler.seconds_until_next(time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+def start_outbox_delivery(outbox):
+    """Запускает поток доставки из outbox с синхронным TeleBot.
+
+    Возвращает OutboxWorker или None, если outbox не настроен.
+    """
+    from telebot import TeleBot
+
+    if outbox is None:
+        return None
+    return start_delivery(outbox, TeleBot(token=TELEGRAM_TOKEN))
+
+
+def stop_outbox_delivery(outbox, delivery):
+    """Останавливает поток доставки и закрывает outbox."""
+    if delivery is not None:
+        delivery.stop()
+    if outbox is not None:
+        outbox.close()
+
+
+async def main_async():
+    """Асинхронно опрашивает API для всех студентов из реестра."""
+    start_listener()
+    registry = load_tenants()
+    if TELEGRAM_TOKEN is None or not registry:
+        logger.critical('Не задан TELEGRAM_TOKEN или реестр студентов.')
+        raise AbsenceVariableException()
+    bot = AsyncTeleBot(token=TELEGRAM_TOKEN)
+    store = open_state_store()
+    outbox = open_outbox()
+    restore_tenants(registry, store)
+    metrics.start_http_server()
+    delivery = start_outbox_delivery(outbox)
+    connector = aiohttp.TCPConnector(limit=ASYNC_MAX_CONCURRENCY)
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=api_timeout()
+    ) as session:
+        logger.info(f'Запущен асинхронный опрос студентов: {len(registry)}.')
+        try:
+            await AsyncPoller(
+                registry, session, bot, store=store, outbox=outbox,
+                queue=DeliveryQueue() if outbox is None else None
+            ).run_forever()
+        finally:
+            await bot.close_session()
+            stop_outbox_delivery(outbox, delivery)
+            store.close()
+
+
+def main():
+    """Запускает асинхронный опрос API."""
+    asyncio.run(main_async())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Бенчмарк цикла опроса на локальных заменителях API и Telegram.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_polling --mode tenants --tenants 50
+
+Отчёт: пропускная способность, задержка от смены статуса в API
+до доставки уведомления (p50/p99) и потребление памяти.
+"""
+import argparse
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+from benchmarks.fake_servers import (HOMEWORK_NAME_PATTERN,
+                                     FakePracticumApi,
+                                     FakeTelegramApi)
+
+BENCH_TELEGRAM_TOKEN = '1234:bench'
+
+
+def parse_args(argv=None):
+    """Разбирает параметры бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--mode', choices=('single', 'tenants'), default='tenants',
+        help='single - main() из homework.py, tenants - TenantScheduler'
+    )
+    parser.add_argument('--tenants', type=int, default=10)
+    parser.add_argument('--homeworks', type=int, default=3)
+    parser.add_argument(
+        '--duration', type=float, default=10, help='секунд работы бота'
+    )
+    parser.add_argument(
+        '--period', type=float, default=1, help='период опроса API'
+    )
+    parser.add_argument(
+        '--change-period', type=float, default=2,
+        help='как часто меняется статус каждой работы, в секундах'
+    )
+    parser.add_argument('--flush-interval', type=float, default=0)
+    parser.add_argument('--api-latency', type=float, default=0.01)
+    parser.add_argument('--api-error-rate', type=float, default=0)
+    parser.add_argument('--telegram-latency', type=float, default=0.01)
+    parser.add_argument('--telegram-error-rate', type=float, default=0)
+    parser.add_argument(
+        '--trace-memory', action='store_true',
+        help='считать пик памяти через tracemalloc (замедляет бота)'
+    )
+    parser.add_argument('--output', help='дописать отчёт в файл')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    """Задаёт переменные окружения до импорта модулей бота."""
+    os.environ['PRACTICUM_TOKEN'] = 'bench0'
+    os.environ['TELEGRAM_TOKEN'] = BENCH_TELEGRAM_TOKEN
+    os.environ['TELEGRAM_CHAT_ID'] = '0'
+    os.environ['TENANTS'] = ','.join(
+        f'bench{index}:{index}' for index in range(args.tenants)
+    )
+    os.environ.pop('TENANTS_FILE', None)
+    os.environ.pop('STATE_BACKEND', None)
+
+
+def start_single(args):
+    """Запускает main() из homework.py в фоновом потоке."""
+    import homework
+    homework.RETRY_PERIOD = args.period
+    threading.Thread(target=homework.main, daemon=True).start()
+
+
+def start_tenants(args):
+    """Запускает опрос всех студентов через TenantScheduler."""
+    from telebot import TeleBot
+
+    import http_client
+    import tenants
+    from delivery import DeliveryQueue
+    from sender import RateLimitedSender
+
+    bot = TeleBot(token=BENCH_TELEGRAM_TOKEN)
+    http_client.configure_session()
+    scheduler = tenants.TenantScheduler(
+        tenants.load_tenants(),
+        period=args.period,
+        queue=DeliveryQueue(flush_interval=args.flush_interval),
+        sender=RateLimitedSender(bot)
+    )
+    threading.Thread(
+        target=scheduler.run_forever, args=(bot,), daemon=True
+    ).start()
+
+
+def percentile(values, fraction):
+    """Процентиль методом ближайшего ранга."""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def notify_latencies(api, telegram):
+    """Задержки от смены статуса в API до получения сообщения Telegram."""
+    latencies = []
+    for received, _, text in telegram.messages:
+        for _, index, step in HOMEWORK_NAME_PATTERN.findall(text):
+            latencies.append(received - api.changed_at(int(index), int(step)))
+    return latencies
+
+
+def run(args):
+    """Запускает бота на время duration и возвращает отчёт."""
+    configure_environment(args)
+    import homework
+    import telebot
+
+    logging.getLogger('homework').setLevel(logging.CRITICAL)
+    api = FakePracticumApi(
+        homeworks=args.homeworks, change_period=args.change_period,
+        latency=args.api_latency, error_rate=args.api_error_rate,
+        seed=args.seed
+    )
+    telegram = FakeTelegramApi(
+        latency=args.telegram_latency, error_rate=args.telegram_error_rate,
+        seed=args.seed
+    )
+    homework.ENDPOINT = api.endpoint
+    telebot.apihelper.API_URL = telegram.api_url
+    if args.trace_memory:
+        tracemalloc.start()
+    with api, telegram:
+        started = time.perf_counter()
+        if args.mode == 'single':
+            start_single(args)
+        else:
+            start_tenants(args)
+        time.sleep(args.duration)
+        elapsed = time.perf_counter() - started
+        messages = len(telegram.messages)
+        latencies = notify_latencies(api, telegram)
+    report = {
+        'mode': args.mode,
+        'tenants': 1 if args.mode == 'single' else args.tenants,
+        'homeworks': args.homeworks,
+        'duration_s': round(elapsed, 2),
+        'api_requests': api.requests,
+        'api_errors': api.errors,
+        'api_rps': round(api.requests / elapsed, 1),
+        'messages': messages,
+        'notifications': len(latencies),
+        'notifications_per_s': round(len(latencies) / elapsed, 1),
+        'p50_notify_latency_s': round(percentile(latencies, 0.5), 3),
+        'p99_notify_latency_s': round(percentile(latencies, 0.99), 3),
+        'max_rss_mb': round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+    if args.trace_memory:
+        report['traced_peak_mb'] = round(
+            tracemalloc.get_traced_memory()[1] / 2 ** 20, 1
+        )
+        tracemalloc.stop()
+    return report
+
+
+def format_report(report):
+    """Форматирует отчёт в две колонки."""
+    width = max(len(key) for key in report)
+    return '\n'.join(
+        f'{key.ljust(width)}  {value}' for key, value in report.items()
+    )
+
+
+def main(argv=None):
+    """Запускает бенчмарк и печатает отчёт."""
+    args = parse_args(argv)
+    text = format_report(run(args))
+    print(text)
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as file:
+            file.write(text + '\n\n')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
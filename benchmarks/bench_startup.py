@@ -0,0 +1,89 @@
+"""Время импорта модулей бота при холодном старте.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_startup --budget 100
+
+Импорт измеряется через python -X importtime в отдельном процессе,
+из нескольких запусков берётся лучший. Бенчмарк завершается
+с кодом 1, если импорт дольше бюджета или тянет за собой
+тяжёлые зависимости, которые должны загружаться при первом
+использовании.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Модули, которые не должны импортироваться вместе с ботом.
+HEAVY_MODULES = ('requests', 'telebot', 'dotenv', 'http.server', 'aiohttp')
+# Бюджет на импорт homework.py в миллисекундах.
+IMPORT_BUDGET_MS = 100
+
+
+def parse_args(argv=None):
+    """Разбирает параметры бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--modules', nargs='+', default=['homework'],
+        help='модули, время импорта которых измеряется'
+    )
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument(
+        '--budget', type=float, default=IMPORT_BUDGET_MS,
+        help='допустимое время импорта в миллисекундах'
+    )
+    return parser.parse_args(argv)
+
+
+def parse_importtime(output):
+    """Разбирает вывод -X importtime в {модуль: суммарное время в мкс}."""
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def measure_import(module, runs=1):
+    """Импортирует module в новом процессе runs раз.
+
+    Возвращает лучшее время импорта в миллисекундах и список
+    импортированных тяжёлых модулей из HEAVY_MODULES.
+    """
+    env = dict(os.environ)
+    env.setdefault('PRACTICUM_TOKEN', 'bench')
+    best, heavy = float('inf'), []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+            check=True
+        )
+        timings = parse_importtime(result.stderr)
+        best = min(best, timings[module] / 1000)
+        heavy = [name for name in HEAVY_MODULES if name in timings]
+    return best, heavy
+
+
+def main(argv=None):
+    """Измеряет импорт и сравнивает его с бюджетом."""
+    args = parse_args(argv)
+    failed = False
+    for module in args.modules:
+        elapsed, heavy = measure_import(module, args.runs)
+        print(f'{module}: {elapsed:.1f} мс (бюджет {args.budget:g} мс)')
+        if heavy:
+            print(f'  импортированы тяжёлые модули: {", ".join(heavy)}')
+        if heavy or elapsed > args.budget:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Сравнение ResponseValidator с check_response и parse_status.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_validation --sizes 1000 100000
+
+validate - проверка ответа и всех работ в нём;
+cold - сообщения обо всех работах (первый опрос);
+steady - все статусы уже известны (обычный опрос).
+"""
+import argparse
+import os
+import timeit
+
+os.environ.setdefault('PRACTICUM_TOKEN', 'bench')
+
+import homework  # noqa: E402
+from storage import TenantState  # noqa: E402
+
+STATUSES = tuple(homework.HOMEWORK_VERDICTS)
+
+
+def make_response(size):
+    """Готовит ответ API с size работами."""
+    return {
+        'homeworks': [
+            {
+                'id': index,
+                'homework_name': f'student__hw{index}.zip',
+                'status': STATUSES[index % len(STATUSES)],
+                'reviewer_comment': 'Принято!',
+                'date_updated': '2021-04-11T10:31:09Z',
+                'lesson_name': 'Проект спринта',
+            }
+            for index in range(size)
+        ],
+        'current_date': 1700000000,
+    }
+
+
+def reference_validate(response):
+    """Проверка прежними функциями."""
+    homework.check_response(response)
+    return [homework.parse_status(item) for item in response['homeworks']]
+
+
+def validator_validate(response):
+    """Проверка ResponseValidator."""
+    record = homework.RESPONSE_VALIDATOR.record
+    return [
+        record(item, index) for index, item in enumerate(
+            homework.RESPONSE_VALIDATOR.check_response(response)
+        )
+    ]
+
+
+def reference_collect(statuses, response):
+    """Поиск изменившихся работ прежними функциями."""
+    homework.check_response(response)
+    return [
+        (item, homework.parse_status(item))
+        for item in homework.find_transitions(
+            statuses, response['homeworks']
+        )
+    ]
+
+
+def validator_collect(statuses, response):
+    """Поиск изменившихся работ через ResponseValidator."""
+    return homework.collect_notifications(
+        statuses, homework.RESPONSE_VALIDATOR.check_response(response)
+    )
+
+
+def measure(function, *args, repeat=5):
+    """Лучшее время одного вызова в секундах."""
+    timer = timeit.Timer(lambda: function(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(size):
+    """Возвращает строки отчёта для ответа из size работ."""
+    response = make_response(size)
+    known = TenantState()
+    for item in response['homeworks']:
+        homework.remember_status(known, item)
+    cases = [
+        ('validate', reference_validate, validator_validate, (response,)),
+        ('cold', reference_collect, validator_collect, ({}, response)),
+        ('steady', reference_collect, validator_collect,
+         (known.statuses, response)),
+    ]
+    rows = []
+    for name, reference, candidate, args in cases:
+        before = measure(reference, *args)
+        after = measure(candidate, *args)
+        rows.append(
+            f'{size:>8} {name:<9} {before * 1e3:>10.2f} ms '
+            f'{after * 1e3:>10.2f} ms {before / after:>7.2f}x'
+        )
+    return rows
+
+
+def main(argv=None):
+    """Печатает сравнение для каждого размера ответа."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1000, 10000, 100000]
+    )
+    args = parser.parse_args(argv)
+    print(f'{"size":>8} {"case":<9} {"before":>13} {"after":>13} {"ratio":>8}')
+    for size in args.sizes:
+        for row in run(size):
+            print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Локальные заменители API Практикум.Домашка и Telegram Bot API."""
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUSES = ('reviewing', 'rejected', 'approved')
+# Имя работы кодирует студента, работу и номер смены статуса,
+# чтобы по тексту уведомления найти момент смены статуса.
+HOMEWORK_NAME = '{token}-{index}-{step}'
+HOMEWORK_NAME_PATTERN = re.compile(r'"([^"\s]+)-(\d+)-(\d+)"')
+
+
+def isoformat(timestamp):
+    """Форматирует время так же, как API Практикума."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%SZ'
+    )
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    """Обработчик HTTP/1.1 без вывода запросов в консоль."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def send_json(self, status, payload):
+        """Отправляет ответ в формате JSON."""
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не выводит запросы к серверу."""
+
+
+class FakeServer:
+    """HTTP-сервер в фоновом потоке."""
+
+    handler_class = QuietHandler
+
+    def __init__(self, latency=0, error_rate=0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        handler = type(
+            'Handler', (self.handler_class,), {'server_state': self}
+        )
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        """Адрес сервера."""
+        return f'http://127.0.0.1:{self.httpd.server_port}'
+
+    def should_fail(self):
+        """Имитирует задержку ответа и случайную ошибку сервера."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            self.errors += failed
+        return failed
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает сервер."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class PracticumHandler(QuietHandler):
+    """Отвечает на запросы статусов домашних работ."""
+
+    def do_GET(self):
+        """Возвращает работы студента, изменившиеся после from_date."""
+        state = self.server_state
+        if state.should_fail():
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+            return
+        token = self.headers.get('Authorization', '').replace('OAuth ', '')
+        query = parse_qs(urlparse(self.path).query)
+        from_date = int(query.get('from_date', ['0'])[0])
+        now = time.time()
+        self.send_json(HTTPStatus.OK, {
+            'homeworks': state.homeworks(token, from_date, now),
+            'current_date': int(now),
+        })
+
+
+class FakePracticumApi(FakeServer):
+    """API Практикума, в котором статусы работ меняются по расписанию.
+
+    Статус работы index студента меняется каждые change_period секунд
+    со сдвигом, чтобы смены статусов были распределены по времени.
+    """
+
+    handler_class = PracticumHandler
+
+    def __init__(self, homeworks=3, change_period=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.homeworks_count = homeworks
+        self.change_period = change_period
+        self.started = time.time()
+
+    @property
+    def endpoint(self):
+        """Адрес для homework.ENDPOINT."""
+        return f'{self.url}/api/user_api/homework_statuses/'
+
+    def _offset(self, index):
+        return self.change_period * index / self.homeworks_count
+
+    def changed_at(self, index, step):
+        """Момент, когда работа index получила статус номер step."""
+        return self.started + step * self.change_period - self._offset(index)
+
+    def homeworks(self, token, from_date, now):
+        """Возвращает работы студента на момент now."""
+        homeworks = []
+        for index in range(self.homeworks_count):
+            step = int(
+                (now - self.started + self._offset(index))
+                // self.change_period
+            )
+            date_updated = self.changed_at(index, step)
+            if date_updated < from_date:
+                continue
+            homeworks.append({
+                'id': index,
+                'homework_name': HOMEWORK_NAME.format(
+                    token=token, index=index, step=step
+                ),
+                'status': STATUSES[step % len(STATUSES)],
+                'date_updated': isoformat(date_updated),
+                'lesson_name': 'Бенчмарк',
+            })
+        return homeworks
+
+
+class TelegramHandler(QuietHandler):
+    """Отвечает на вызовы методов Bot API."""
+
+    def do_POST(self):
+        """Обрабатывает вызов метода с параметрами в теле."""
+        self._handle()
+
+    def do_GET(self):
+        """Обрабатывает вызов метода с параметрами в адресе."""
+        self._handle()
+
+    def _handle(self):
+        state = self.server_state
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode()
+        if state.should_fail():
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {
+                'ok': False, 'error_code': 500, 'description': 'Fake error'
+            })
+            return
+        url = urlparse(self.path)
+        params = {
+            key: values[0]
+            for key, values in {**parse_qs(body), **parse_qs(url.query)}
+            .items()
+        }
+        state.record(params.get('chat_id'), params.get('text', ''))
+        self.send_json(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': state.requests,
+            'date': int(time.time()),
+            'chat': {'id': params.get('chat_id'), 'type': 'private'},
+            'text': params.get('text', ''),
+        }})
+
+
+class FakeTelegramApi(FakeServer):
+    """Telegram Bot API, который запоминает доставленные сообщения."""
+
+    handler_class = TelegramHandler
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.messages = []
+
+    @property
+    def api_url(self):
+        """Шаблон адреса для telebot.apihelper.API_URL."""
+        return self.url + '/bot{0}/{1}'
+
+    def record(self, chat_id, text):
+        """Запоминает сообщение и время его получения."""
+        with self.lock:
+            self.messages.append((time.time(), chat_id, text))
@@ -0,0 +1,24 @@
+import os
+
+# Файл .env с настройками бота. Модули читают настройки из окружения
+# при импорте, поэтому каждый из них импортирует этот модуль до того,
+# как обратиться к os.getenv.
+DOTENV_PATH = os.getenv(
+    'DOTENV_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+)
+
+
+def load_env(path=DOTENV_PATH):
+    """Загружает переменные окружения из .env, если файл есть.
+
+    python-dotenv импортируется только при наличии файла.
+    Уже заданные переменные окружения не перезаписываются.
+    """
+    if not os.path.isfile(path):
+        return False
+    from dotenv import load_dotenv
+    return load_dotenv(path)
+
+
+load_env()
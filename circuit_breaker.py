@@ -0,0 +1,183 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import bootstrap  # noqa: F401
+from exceptions import ApiUnavailableException, CircuitOpenException
+
+# Сколько сбоев подряд размыкают цепь и через сколько секунд
+# после этого пробуется одиночный запрос к API.
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', 60))
+CIRCUIT_MAX_RECOVERY_TIMEOUT = float(
+    os.getenv('CIRCUIT_MAX_RECOVERY_TIMEOUT', 1800)
+)
+CIRCUIT_HALF_OPEN_CALLS = int(os.getenv('CIRCUIT_HALF_OPEN_CALLS', 1))
+CIRCUIT_JITTER = float(os.getenv('CIRCUIT_JITTER', 0.1))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+class CircuitBreaker:
+    """Предохранитель для запросов к API.
+
+    В замкнутом состоянии запросы проходят, сбои считаются подряд.
+    После failure_threshold сбоев цепь размыкается: запросы не
+    выполняются recovery_timeout секунд. Затем цепь полуоткрыта:
+    проходит не больше half_open_calls пробных запросов. Успех
+    замыкает цепь, сбой снова размыкает её на вдвое больший срок,
+    но не дольше max_recovery_timeout. Предохранитель потокобезопасен
+    и общий для всех опрашивающих.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT,
+        max_recovery_timeout=CIRCUIT_MAX_RECOVERY_TIMEOUT,
+        half_open_calls=CIRCUIT_HALF_OPEN_CALLS,
+        jitter=CIRCUIT_JITTER,
+        failure_exceptions=(ApiUnavailableException,)
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.half_open_calls = half_open_calls
+        self.jitter = jitter
+        self.failure_exceptions = failure_exceptions
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._openings = 0
+        self._retry_at = 0
+        self._probes = 0
+
+    def _update(self, now):
+        if self._state == OPEN and now >= self._retry_at:
+            self._state = HALF_OPEN
+            self._probes = 0
+            logger.info('Пробный запрос к API после серии сбоев.')
+
+    @property
+    def state(self):
+        """Текущее состояние цепи."""
+        with self._lock:
+            self._update(time.monotonic())
+            return self._state
+
+    def allow(self):
+        """Проверяет, можно ли сейчас выполнить запрос."""
+        with self._lock:
+            self._update(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and (
+                self._probes < self.half_open_calls
+            ):
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self):
+        """Отмечает успешный запрос и замыкает цепь."""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info('API снова доступен, опрос возобновлён.')
+            self._state = CLOSED
+            self._failures = 0
+            self._openings = 0
+
+    def release(self):
+        """Возвращает место пробного запроса, прерванного без итога.
+
+        Например, при отмене задачи или KeyboardInterrupt: иначе
+        полуоткрытая цепь больше не пропустила бы ни одного запроса.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_failure(self):
+        """Отмечает сбой; при необходимости размыкает цепь."""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (
+                self._failures >= self.failure_threshold
+            ):
+                self._open(time.monotonic())
+
+    def _open(self, now):
+        timeout = min(
+            self.max_recovery_timeout,
+            self.recovery_timeout * 2 ** min(self._openings, 32)
+        )
+        timeout *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._state = OPEN
+        self._openings += 1
+        self._retry_at = now + timeout
+        logger.warning(
+            f'API недоступен, запросы приостановлены на {timeout:.0f} с.'
+        )
+
+    def seconds_until_retry(self):
+        """Возвращает время до пробного запроса; 0, если цепь не разомкнута."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0
+            return max(0, self._retry_at - time.monotonic())
+
+    def call(self, func, *args, **kwargs):
+        """Вызывает func через предохранитель.
+
+        Ответ API с ошибкой клиента (например, неверный токен)
+        не считается сбоем: сервер доступен.
+        """
+        if not self.allow():
+            raise CircuitOpenException(
+                'Запросы к API приостановлены, повтор через '
+                f'{self.seconds_until_retry():.0f} с.'
+            )
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_exceptions:
+            self.record_failure()
+            raise
+        except Exception:
+            self.record_success()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    async def call_async(self, func, *args, **kwargs):
+        """Вызывает корутинную функцию func через предохранитель."""
+        if not self.allow():
+            raise CircuitOpenException(
+                'Запросы к API приостановлены, повтор через '
+                f'{self.seconds_until_retry():.0f} с.'
+            )
+        try:
+            result = await func(*args, **kwargs)
+        except self.failure_exceptions:
+            self.record_failure()
+            raise
+        except Exception:
+            self.record_success()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+
+# Общий предохранитель для всех запросов к API Практикума.
+api_breaker = CircuitBreaker()
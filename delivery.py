@@ -0,0 +1,134 @@
+import os
+import time
+
+import bootstrap  # noqa: F401
+
+# Максимальная длина одного сообщения Telegram.
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Как долго копятся уведомления для чата перед отправкой, в секундах.
+DELIVERY_FLUSH_INTERVAL = float(os.getenv('DELIVERY_FLUSH_INTERVAL', 5))
+MESSAGE_SEPARATOR = '\n\n'
+
+
+def coalesce(items, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Группирует пары (данные, текст) в сообщения не длиннее limit.
+
+    Тексты внутри группы склеиваются через MESSAGE_SEPARATOR,
+    порядок сообщений сохраняется.
+    """
+    groups = []
+    group = []
+    length = 0
+    for item in items:
+        extra = len(item[1]) + (len(MESSAGE_SEPARATOR) if group else 0)
+        if group and length + extra > limit:
+            groups.append(group)
+            group = []
+            extra = len(item[1])
+            length = 0
+        group.append(item)
+        length += extra
+    if group:
+        groups.append(group)
+    return groups
+
+
+def join_messages(group, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Склеивает тексты группы в одно сообщение."""
+    return MESSAGE_SEPARATOR.join(text for _, text in group)[:limit]
+
+
+class Batch:
+    """Сообщение для одного чата, собранное из нескольких уведомлений."""
+
+    __slots__ = ('chat_id', 'items')
+
+    def __init__(self, chat_id, items):
+        self.chat_id = chat_id
+        self.items = items
+
+    @property
+    def text(self):
+        """Текст сообщения."""
+        return join_messages(self.items)
+
+    def acknowledge(self):
+        """Сообщает каждому уведомлению, что оно доставлено."""
+        for on_sent, _ in self.items:
+            if on_sent is not None:
+                on_sent()
+
+
+class DeliveryQueue:
+    """Очередь уведомлений, сгруппированных по чатам.
+
+    Уведомления для чата копятся flush_interval секунд с момента
+    первого из них и уходят одним или несколькими сообщениями
+    в пределах лимита длины Telegram.
+    """
+
+    def __init__(self, flush_interval=DELIVERY_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._since = {}
+
+    def add(self, chat_id, message, on_sent=None):
+        """Ставит уведомление в очередь чата.
+
+        on_sent вызывается после успешной доставки уведомления.
+        Повторное уведомление с тем же текстом не дублируется.
+        """
+        pending = self._pending.get(chat_id, ())
+        if any(text == message for _, text in pending):
+            return
+        if chat_id not in self._pending:
+            self._pending[chat_id] = []
+            self._since[chat_id] = time.monotonic()
+        self._pending[chat_id].append((on_sent, message))
+
+    def pop_due(self, now=None, force=False):
+        """Извлекает сообщения для чатов, чьё время отправки наступило."""
+        now = time.monotonic() if now is None else now
+        batches = []
+        for chat_id in list(self._pending):
+            if not force and now - self._since[chat_id] < self.flush_interval:
+                continue
+            items = self._pending.pop(chat_id)
+            del self._since[chat_id]
+            batches.extend(Batch(chat_id, group) for group in coalesce(items))
+        return batches
+
+    def requeue(self, batch):
+        """Возвращает неотправленное сообщение в начало очереди чата."""
+        pending = self._pending.setdefault(batch.chat_id, [])
+        pending[:0] = batch.items
+        self._since.setdefault(batch.chat_id, time.monotonic())
+
+    def seconds_until_flush(self, now=None):
+        """Возвращает время до ближайшей отправки или None."""
+        if not self._since:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0, min(self._since.values()) + self.flush_interval - now)
+
+    def __len__(self):
+        return sum(len(items) for items in self._pending.values())
+
+
+def flush_queue(queue, send, force=False):
+    """Отправляет накопившиеся сообщения через send(chat_id, text).
+
+    Возвращает число отправленных сообщений; неотправленные
+    возвращаются в очередь.
+    """
+    sent = 0
+    failed = []
+    for batch in queue.pop_due(force=force):
+        if send(batch.chat_id, batch.text):
+            batch.acknowledge()
+            sent += 1
+        else:
+            failed.append(batch)
+    for batch in reversed(failed):
+        queue.requeue(batch)
+    return sent
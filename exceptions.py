@@ -12,3 +12,56 @@ class RequestNoContentException(Exception):
 
 class UnexpectedHomeworkStatusException(Exception):
     """Получен неожиданный статус домашней работы."""
+
+
+class InvalidTenantsConfigException(Exception):
+    """Некорректно задан реестр студентов."""
+
+
+class InvalidTemplatesConfigException(Exception):
+    """Некорректно заданы шаблоны сообщений."""
+
+
+class InvalidStateBackendException(Exception):
+    """Некорректно задано хранилище состояния."""
+
+
+class ApiUnavailableException(RequestException):
+    """API недоступен: сетевая ошибка или ошибка сервера."""
+
+
+class PollTimeoutException(ApiUnavailableException):
+    """Ответ API не получен за отведённое на опрос время."""
+
+
+class CircuitOpenException(Exception):
+    """Запросы к API временно приостановлены после серии сбоев."""
+
+
+class InvalidResponseException(Exception):
+    """Ответ API не соответствует ожидаемой схеме.
+
+    field - поле с ошибкой, index - номер работы в списке homeworks.
+    """
+
+    def __init__(self, message, field=None, index=None):
+        super().__init__(message)
+        self.field = field
+        self.index = index
+
+    def __str__(self):
+        return self.args[0]
+
+
+class MissingFieldException(InvalidResponseException, KeyError):
+    """В ответе API нет обязательного поля."""
+
+
+class InvalidFieldTypeException(InvalidResponseException, TypeError):
+    """Поле ответа API имеет неожиданный тип."""
+
+
+class UnknownStatusException(
+    InvalidResponseException, UnexpectedHomeworkStatusException
+):
+    """В ответе API недокументированный статус домашней работы."""
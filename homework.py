@@ -1,21 +1,42 @@
+import argparse
 import logging
 import os
+import sqlite3
 import sys
 import time
 from http import HTTPStatus
 
-import requests
-from dotenv import load_dotenv
-from telebot import TeleBot
-from telebot.apihelper import ApiException
-
+import bootstrap  # noqa: F401
+import circuit_breaker
+import http_client
+import metrics
+from delivery import coalesce, join_messages
 from exceptions import (AbsenceVariableException,
+                        ApiUnavailableException,
+                        CircuitOpenException,
+                        InvalidResponseException,
+                        InvalidStateBackendException,
                         RequestException,
                         RequestNoContentException,
                         UnexpectedHomeworkStatusException)
+from logconfig import (PROJECT_LOGGER,
+                       configure_logging,
+                       log_fields,
+                       start_listener)
+from outbox import (OutboxWorker,
+                    notification_key,
+                    open_outbox,
+                    start_delivery)
+from scheduling import AdaptiveInterval, has_pending_review
+from sender import RateLimitedSender
+from storage import open_state_store, state_key
+from streaming import STREAM_CHUNK_SIZE, STREAM_RESPONSES, StreamedAnswer
+from templates import TEMPLATES, TEMPLATES_FILE
+from timeline import record_transitions
+from validation import ResponseValidator
 
-# Загружаем переменные окружения из .env файла.
-load_dotenv()
+# Переменные окружения из .env загружает bootstrap.py. requests и telebot
+# импортируются при первом использовании.
 
 # Константы.
 ANSWER_KEYS = ('homeworks', 'current_date')
@@ -27,7 +48,26 @@ HOMEWORK_VERDICTS = {  # Статусы домашней работы.
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+MESSAGE_TEMPLATE = (
+    'Изменился статус проверки работы "{homework_name}". {verdict}'
+)
 RETRY_PERIOD = 600  # Период опроса API в секундах.
+# Следующий запрос начинается за CURSOR_OVERLAP секунд до current_date
+# из ответа API: изменения на границе окон не теряются, а повторно
+# полученные работы отсекаются по id.
+CURSOR_OVERLAP = int(os.getenv('CURSOR_OVERLAP', 60))
+# Коды завершения разового запуска (--once) для cron и планировщиков.
+EXIT_OK = 0
+EXIT_FAILURE = 1  # Опрос API не удался.
+EXIT_NOT_DELIVERED = 2  # Не все уведомления доставлены.
+EXIT_CONFIG = 78  # Не заданы переменные окружения (EX_CONFIG).
+
+# Время на установку соединения с API и на ожидание данных от него
+# в секундах: зависшее соединение не должно останавливать бота.
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 5))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 30))
+# Предельное время всего запроса к API вместе с чтением ответа.
+API_TOTAL_TIMEOUT = float(os.getenv('API_TOTAL_TIMEOUT', 60))
 
 # Получение токенов из переменных окружения
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
@@ -37,14 +77,9 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 # Заголовки для запросов к API.
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
-# Настройка логирования.
+# Настройка логирования: формат и очередь задаются в logconfig.py.
 logger = logging.getLogger(__name__)
-handler = logging.StreamHandler(sys.stdout)
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+configure_logging(__name__, PROJECT_LOGGER)
 
 
 def check_tokens():
@@ -65,40 +100,167 @@ def check_tokens():
 
 def send_message(bot, message):
     """Отправляет сообщение в Telegram-чат."""
+    return send_message_to(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_message_to(bot, chat_id, message):
+    """Отправляет сообщение в указанный Telegram-чат."""
+    import requests
+    from telebot.apihelper import ApiException
+
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.debug(f'Сообщение отправлено: {message}.')
+        with metrics.SEND_LATENCY.time() as timer:
+            bot.send_message(chat_id, message)
+        logger.debug(
+            f'Сообщение отправлено в чат {chat_id}.',
+            extra=log_fields(chat_id=chat_id, latency=timer.elapsed)
+        )
+        metrics.LAST_SUCCESS.set_to_current_time(operation='send_message')
         return True
     except ApiException as error:
-        logger.error(f'Сообщение не отправлено, из-за ошибки {error}.')
-    except requests.RequestException:
+        metrics.count_exception(error)
+        logger.error(
+            f'Сообщение не отправлено, из-за ошибки {error}.',
+            extra=log_fields(error=error, chat_id=chat_id)
+        )
+    except requests.RequestException as error:
+        metrics.count_exception(error)
         logger.error(
-            'При обработке запроса произошло неоднозначное исключение.'
+            'При обработке запроса произошло неоднозначное исключение.',
+            extra=log_fields(error=error, chat_id=chat_id)
         )
 
 
 def get_api_answer(timestamp):
     """Делает запрос к API-сервиса Практикум.Домашка."""
+    return fetch_api_answer(HEADERS, timestamp)
+
+
+def make_headers(token):
+    """Формирует заголовки запроса к API для указанного токена."""
+    return {'Authorization': f'OAuth {token}'}
+
+
+def is_api_unavailable(error):
+    """Проверяет, что ошибка запроса вызвана сетью или сервером API."""
+    response = getattr(error, 'response', None)
+    return (
+        response is None
+        or response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+    )
+
+
+def fetch_api_answer(headers, timestamp, stream=False):
+    """Делает запрос к API с заголовками конкретного студента.
+
+    Если настроена общая сессия, запрос идёт через её пул соединений,
+    а при включённом кэше ответ перепроверяется условным запросом.
+    Соединение и чтение ограничены API_CONNECT_TIMEOUT
+    и API_READ_TIMEOUT, весь запрос вместе с чтением тела -
+    API_TOTAL_TIMEOUT.
+    С stream=True возвращается StreamedAnswer: работы разбираются
+    по мере чтения ответа, кэш не используется.
+    """
+    import requests
+
+    session = http_client.get_session()
+    get = session.get if session is not None else requests.get
+    cache = None if stream else http_client.get_cache()
+    request_headers = headers
+    stream_options = {'stream': True} if stream else {}
+    timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+    deadline = http_client.RequestDeadline(API_TOTAL_TIMEOUT)
+    if cache is not None:
+        cache_key = cache.make_key(headers)
+        request_headers = {**headers, **cache.conditional_headers(cache_key)}
     try:
-        response = requests.get(
-            ENDPOINT,
-            headers=HEADERS,
-            params={'from_date': timestamp}
-        )
+        with metrics.API_LATENCY.time():
+            response = get(
+                ENDPOINT,
+                headers=request_headers,
+                params={'from_date': timestamp},
+                timeout=timeout,
+                hooks={'response': deadline.hook},
+                **stream_options
+            )
         response.raise_for_status()
     except requests.exceptions.RequestException as error:
-        raise RequestException(
+        exception_class = RequestException
+        if is_api_unavailable(error):
+            exception_class = ApiUnavailableException
+        raise exception_class(
             f'Ошибка при выполнении запроса: {error}.'
-            f'ENDPOINT: {ENDPOINT} headers: {HEADERS} params: {timestamp}'
+            f'ENDPOINT: {ENDPOINT} params: {timestamp}'
         )
+    metrics.LAST_SUCCESS.set_to_current_time(operation='get_api_answer')
     if response.status_code == HTTPStatus.NO_CONTENT:
         raise RequestNoContentException(
             'Запрос выполнен, но нет содержимого для возврата.'
         )
+    if stream:
+        return StreamedAnswer(
+            deadline.iter_content(response, STREAM_CHUNK_SIZE),
+            ANSWER_KEYS,
+            response.close
+        )
+    if cache is not None:
+        return cache.resolve(cache_key, response)
     response = response.json()
     return response
 
 
+def stream_api_answer(headers, timestamp):
+    """Делает запрос к API и возвращает поток работ из ответа."""
+    return fetch_api_answer(headers, timestamp, stream=True)
+
+
+RESPONSE_VALIDATOR = ResponseValidator(ANSWER_KEYS, HOMEWORK_VERDICTS)
+
+# Шаблоны сообщений разбираются один раз при запуске: русский язык
+# из HOMEWORK_VERDICTS, остальные - из templates.py и TEMPLATES_FILE.
+TEMPLATES.register('ru', HOMEWORK_VERDICTS, MESSAGE_TEMPLATE)
+if TEMPLATES_FILE:
+    TEMPLATES.load_file(TEMPLATES_FILE)
+TEMPLATES.check()
+
+
+def load_homeworks(timestamp):
+    """Возвращает ответ API и проверенный список работ из него.
+
+    В потоковом режиме и ответ, и список работ - один StreamedAnswer.
+    Запрос идёт через общий предохранитель: пока API недоступен,
+    вызывается CircuitOpenException без обращения к серверу.
+    """
+    breaker = circuit_breaker.api_breaker
+    if STREAM_RESPONSES:
+        answer = breaker.call(stream_api_answer, HEADERS, timestamp)
+        return answer, answer
+    response = breaker.call(get_api_answer, timestamp)
+    check_response(response)
+    return response, response['homeworks']
+
+
+def next_from_date(response, previous=None, overlap=CURSOR_OVERLAP):
+    """Возвращает from_date следующего запроса по current_date из ответа.
+
+    Курсор идёт по часам сервера, а не по локальным, поэтому
+    расхождение часов не теряет изменений и не расширяет окно.
+    response - ответ API или прочитанный StreamedAnswer. Курсор
+    не сдвигается назад дальше previous.
+    """
+    if isinstance(response, StreamedAnswer):
+        response = response.fields
+    current_date = response['current_date']
+    if isinstance(current_date, bool) or not isinstance(current_date, int):
+        raise TypeError(
+            f'current_date должен быть целым числом: {current_date!r}'
+        )
+    cursor = current_date - overlap
+    if previous is not None and previous > cursor:
+        return previous
+    return cursor
+
+
 def check_response(response):
     """Проверяет ответ API."""
     if not isinstance(response, dict):
@@ -128,40 +290,284 @@ def parse_status(homework):
             'Неизвестный статус домашней работы.'
         )
 
-    homework_name = homework['homework_name']
+    return TEMPLATES.get().render(homework, status)
+
+
+def homework_key(homework):
+    """Возвращает идентификатор домашней работы для хранения статуса."""
+    return str(homework.get('id', homework.get('homework_name')))
+
+
+def find_transitions(statuses, homeworks):
+    """Возвращает работы, статус которых изменился с прошлого уведомления.
+
+    statuses - индекс {homework_id: (status, date_updated)}, поэтому
+    проверка каждой работы из ответа API выполняется за O(1).
+    Работы с уже известным или более старым обновлением пропускаются,
+    некорректные работы возвращаются для проверки.
+    """
+    return [
+        homework for homework in homeworks
+        if not isinstance(homework, dict) or not is_known_status(
+            statuses.get(homework_key(homework)),
+            homework.get('status'),
+            homework.get('date_updated')
+        )
+    ]
+
+
+def is_known_status(previous, status, date_updated):
+    """Проверяет, что студент уже уведомлён об этом или более новом статусе.
+
+    previous - сохранённая пара (status, date_updated) или None.
+    """
+    if previous is None:
+        return False
+    known_status, known_date = previous
     return (
-        f'Изменился статус проверки работы "{homework_name}". '
-        f'{HOMEWORK_VERDICTS[status]}'
+        (known_status == status and known_date == date_updated)
+        or bool(date_updated and known_date and date_updated < known_date)
     )
 
 
+def collect_notifications(statuses, homeworks, template=None):
+    """Готовит сообщения обо всех работах, статус которых изменился.
+
+    Изменившиеся работы проверяются RESPONSE_VALIDATOR; некорректная
+    работа логируется и не мешает остальным. template - MessageTemplate
+    студента, по умолчанию шаблон языка DEFAULT_LOCALE.
+    """
+    notifications = []
+    check_status = RESPONSE_VALIDATOR.status
+    render = (template or TEMPLATES.get()).render
+    for homework in find_transitions(statuses, homeworks):
+        try:
+            status = check_status(homework)
+        except InvalidResponseException as error:
+            metrics.count_exception(error)
+            homework_id = (
+                homework_key(homework) if isinstance(homework, dict) else None
+            )
+            logger.error(
+                f'Некорректная домашняя работа в ответе API: {error}',
+                extra=log_fields(homework=homework_id, error=error)
+            )
+            continue
+        notifications.append((homework, render(homework, status)))
+    return notifications
+
+
+def remember_status(state, homework):
+    """Запоминает статус работы, о котором студент уведомлён."""
+    state.remember(
+        homework_key(homework),
+        homework['status'],
+        homework.get('date_updated')
+    )
+
+
+def send_notifications(bot, state, notifications):
+    """Отправляет уведомления, склеивая их в сообщения до лимита Telegram.
+
+    Статус запоминается, только если сообщение доставлено.
+    Возвращает доставленные уведомления.
+    """
+    sent = []
+    for group in coalesce(notifications):
+        if send_message(bot, join_messages(group)):
+            for homework, _ in group:
+                remember_status(state, homework)
+            sent.extend(group)
+    return sent
+
+
+def add_to_outbox(outbox, chat_id, homework, message):
+    """Записывает уведомление о работе в outbox.
+
+    Повторное уведомление о том же статусе после сбоя
+    отбрасывается по ключу идемпотентности.
+    """
+    return outbox.add(chat_id, message, notification_key(
+        chat_id, homework_key(homework),
+        homework['status'], homework.get('date_updated')
+    ))
+
+
+def enqueue_notifications(outbox, state, notifications):
+    """Записывает уведомления в outbox и запоминает их статусы.
+
+    Отправит их поток доставки (OutboxWorker).
+    """
+    for homework, message in notifications:
+        add_to_outbox(outbox, TELEGRAM_CHAT_ID, homework, message)
+        remember_status(state, homework)
+
+
+def poll_cycle(bot, store, state_id, state, outbox=None):
+    """Один цикл: опрос API, поиск новых статусов, уведомления.
+
+    Состояние сохраняется в store. Возвращает True, если
+    доставлены все уведомления; записанные в outbox уведомления
+    считаются доставленными. Если уведомление не доставлено,
+    курсор не сдвигается, и следующий цикл запросит работу снова.
+    В историю статусов попадают только доставленные уведомления,
+    чтобы повторный опрос не дописывал событие ещё раз.
+    """
+    timestamp = state.current_date or int(time.time()) - DIFFERENCE
+    response, homeworks = load_homeworks(timestamp)
+    notifications = collect_notifications(state.statuses, homeworks)
+    cursor = next_from_date(response, timestamp)
+    if outbox is not None:
+        enqueue_notifications(outbox, state, notifications)
+        sent = notifications
+    else:
+        sent = send_notifications(bot, state, notifications)
+    record_transitions(state_id, sent)
+    delivered = len(sent) == len(notifications)
+    if not notifications:
+        logger.debug('Нет новых статусов домашних работ.')
+    if delivered:
+        state.current_date = cursor
+    store.save(state_id, state)
+    return delivered
+
+
+def flush_outbox(outbox, bot, code=EXIT_OK):
+    """Доставляет накопленные в outbox уведомления для запуска --once.
+
+    Выполняется и после неудачного опроса: уведомления прошлых
+    запусков не ждут, пока API снова станет доступен.
+    Возвращает код завершения с учётом доставки.
+    """
+    worker = OutboxWorker(outbox, RateLimitedSender(bot))
+    try:
+        worker.flush()
+    except Exception as error:
+        metrics.count_exception(error)
+        logger.error(
+            f'Ошибка доставки из outbox: {error}',
+            extra=log_fields(error=error)
+        )
+        return EXIT_FAILURE
+    if worker.sender.dropped and code == EXIT_OK:
+        return EXIT_NOT_DELIVERED
+    return code
+
+
+def open_storage():
+    """Открывает хранилище состояния и outbox для запуска --once.
+
+    Возвращает пару (store, outbox) или None, если хранилище
+    настроено неверно или база не открывается.
+    """
+    try:
+        store = open_state_store()
+    except (InvalidStateBackendException, sqlite3.Error) as error:
+        logger.critical(f'Хранилище состояния не открыто: {error}')
+        return None
+    try:
+        return store, open_outbox()
+    except sqlite3.Error as error:
+        store.close()
+        logger.critical(f'Outbox не открыт: {error}')
+        return None
+
+
+def run_once():
+    """Выполняет один цикл опроса и возвращает код завершения.
+
+    Для запуска из cron: состояние восстанавливается из хранилища
+    и сохраняется в него, бот не ждёт следующего цикла.
+    """
+    from telebot import TeleBot
+
+    start_listener()
+    try:
+        check_tokens()
+    except AbsenceVariableException:
+        return EXIT_CONFIG
+    storage = open_storage()
+    if storage is None:
+        return EXIT_CONFIG
+    store, outbox = storage
+    bot = TeleBot(token=TELEGRAM_TOKEN)
+    state_id = state_key(PRACTICUM_TOKEN)
+    try:
+        code = EXIT_OK
+        try:
+            if not poll_cycle(
+                bot, store, state_id, store.load(state_id), outbox
+            ):
+                code = EXIT_NOT_DELIVERED
+        except Exception as error:
+            metrics.count_exception(error)
+            logger.error(
+                f'Ошибка в работе программы: {error}',
+                extra=log_fields(error=error)
+            )
+            code = EXIT_FAILURE
+        if outbox is not None:
+            code = flush_outbox(outbox, bot, code)
+    finally:
+        store.close()
+        if outbox is not None:
+            outbox.close()
+    return code
+
+
 def main():
     """Основная логика работы бота."""
+    from telebot import TeleBot
+
+    start_listener()
     check_tokens()
     bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time()) - DIFFERENCE
-    last_message = None
+    http_client.configure_cache()
+    metrics.start_http_server()
+    store = open_state_store()
+    outbox = open_outbox()
+    start_delivery(outbox, bot)
+    state_id = state_key(PRACTICUM_TOKEN)
+    state = store.load(state_id)
+    interval = AdaptiveInterval(RETRY_PERIOD)
 
     while True:
+        succeeded = False
+        started = time.monotonic()
         try:
-            response = get_api_answer(timestamp)
-            check_response(response)
-            homeworks = response['homeworks']
-            timestamp = int(time.time())
-
-            if homeworks:
-                message = parse_status(homeworks[0])
-                if message != last_message and send_message(bot, message):
-                    last_message = message
-            else:
-                logger.debug('Нет новых статусов домашних работ.')
+            poll_cycle(bot, store, state_id, state, outbox)
+            succeeded = True
 
+        except CircuitOpenException as error:
+            metrics.count_exception(error)
+            logger.debug(
+                f'Опрос отложен: {error}', extra=log_fields(error=error)
+            )
         except Exception as error:
+            metrics.count_exception(error)
             error_message = f'Ошибка в работе программы: {error}'
-            logger.error(error_message)
+            logger.error(error_message, extra=log_fields(error=error))
+        metrics.POLL_CYCLE.observe(time.monotonic() - started)
 
-        time.sleep(RETRY_PERIOD)
+        delay = interval.next_delay(
+            succeeded, has_pending_review(state.statuses)
+        )
+        time.sleep(delay)
+
+
+def parse_args(argv=None):
+    """Разбирает параметры запуска бота."""
+    parser = argparse.ArgumentParser(
+        description='Бот, уведомляющий о статусе проверки домашней работы.'
+    )
+    parser.add_argument(
+        '--once', action='store_true',
+        help='выполнить один цикл опроса и завершиться (для cron)'
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == '__main__':
+    if parse_args().once:
+        sys.exit(run_once())
     main()
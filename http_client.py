@@ -0,0 +1,380 @@
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from http import HTTPStatus
+
+import bootstrap  # noqa: F401
+
+# Настройки пула HTTP-соединений к API.
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 1))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+HTTP_KEEP_ALIVE = os.getenv('HTTP_KEEP_ALIVE', 'true').lower() != 'false'
+
+# Время жизни кэша ответов API в секундах; 0 отключает кэш.
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 0))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+
+# Общая сессия; None означает запрос без пула через requests.get.
+_session = None
+# Общий кэш ответов; None означает, что кэш отключён.
+_cache = None
+# Общий сторож сроков запросов, создаётся при первом запросе.
+_watchdog = None
+_watchdog_lock = threading.Lock()
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+def create_session(
+    pool_connections=HTTP_POOL_CONNECTIONS,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    keep_alive=HTTP_KEEP_ALIVE
+):
+    """Создаёт сессию requests с пулом соединений.
+
+    Пока соединение живо, повторные запросы идут по уже установленному
+    TLS-соединению без нового рукопожатия.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def configure_session(**kwargs):
+    """Создаёт общую сессию, которой пользуется get_api_answer."""
+    global _session
+    close_session()
+    _session = create_session(**kwargs)
+    return _session
+
+
+def get_session():
+    """Возвращает общую сессию или None, если она не настроена."""
+    return _session
+
+
+def close_session():
+    """Закрывает общую сессию и её соединения."""
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+def shutdown_socket(raw):
+    """Прерывает чтение из сокета ответа urllib3 в другом потоке.
+
+    shutdown действует на сам сокет, поэтому достаточно копии
+    дескриптора: ждущий recv сразу получает конец потока.
+    """
+    with socket.fromfd(
+        raw.fileno(), socket.AF_INET, socket.SOCK_STREAM
+    ) as sock:
+        sock.shutdown(socket.SHUT_RD)
+
+
+class Watchdog:
+    """Один поток, который прерывает запросы с истёкшим сроком.
+
+    Сроки всех запросов процесса хранятся в куче: тысячи запросов
+    за цикл опроса не создают тысячи потоков-таймеров. Отменённое
+    задание остаётся в куче и выбрасывается, дойдя до её вершины.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def watch(self, deadline, callback):
+        """Вызывает callback в потоке сторожа, когда наступит deadline.
+
+        deadline - по time.monotonic. Возвращает задание для cancel.
+        """
+        entry = [deadline, next(self._counter), callback]
+        with self._condition:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='request-watchdog', daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return entry
+
+    def cancel(self, entry):
+        """Отменяет задание, если оно ещё не выполнено."""
+        with self._condition:
+            entry[2] = None
+
+    def __len__(self):
+        with self._condition:
+            return sum(entry[2] is not None for entry in self._heap)
+
+    def _next_callback(self):
+        with self._condition:
+            while True:
+                while self._heap and self._heap[0][2] is None:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                return heapq.heappop(self._heap)[2]
+
+    def _run(self):
+        while True:
+            callback = self._next_callback()
+            try:
+                callback()
+            except Exception as error:
+                logger.error(f'Ошибка сторожа сроков запросов: {error}')
+
+
+def get_watchdog():
+    """Возвращает общий сторож сроков запросов процесса."""
+    global _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = Watchdog()
+        return _watchdog
+
+
+def _forget_watchdog():
+    # Поток сторожа не переживает fork: дочерний процесс
+    # создаст свой сторож при первом запросе.
+    global _watchdog, _watchdog_lock
+    _watchdog = None
+    _watchdog_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_watchdog)
+
+
+class RequestDeadline:
+    """Срок на весь запрос к API вместе с чтением тела ответа.
+
+    Таймаут чтения requests ограничивает каждую операцию с сокетом,
+    а не весь ответ: сервер, отдающий тело по байту, держал бы
+    запрос бесконечно. Когда срок истекает, общий сторож (Watchdog)
+    разрывает соединение, и чтение завершается ReadTimeout.
+    """
+
+    def __init__(self, seconds):
+        self.deadline = time.monotonic() + seconds
+        self.expired = False
+        self._watch = None
+
+    def hook(self, response, *args, stream=False, **kwargs):
+        """Хук requests "response": вызывается до чтения тела ответа.
+
+        Без stream тело читается здесь же, с stream=True его нужно
+        читать через iter_content этого объекта.
+        """
+        import requests
+
+        self.cancel()
+        self._watch = get_watchdog().watch(
+            self.deadline, partial(self._abort, response)
+        )
+        if stream:
+            return response
+        try:
+            response.content
+        except requests.RequestException:
+            self.check()
+            raise
+        finally:
+            self.cancel()
+        self.check()
+        return response
+
+    def iter_content(self, response, chunk_size):
+        """Возвращает части тела ответа, прочитанные до срока."""
+        import requests
+
+        try:
+            yield from response.iter_content(chunk_size)
+        except requests.RequestException:
+            self.check()
+            raise
+        finally:
+            self.cancel()
+        self.check()
+
+    def check(self):
+        """Вызывает ReadTimeout, если срок запроса истёк."""
+        import requests
+
+        if self.expired:
+            raise requests.exceptions.ReadTimeout(
+                'Ответ API не получен за отведённое время.'
+            )
+
+    def cancel(self):
+        """Снимает срок запроса со сторожа."""
+        if self._watch is not None:
+            get_watchdog().cancel(self._watch)
+            self._watch = None
+
+    def _abort(self, response):
+        self.expired = True
+        try:
+            shutdown_socket(response.raw)
+        except (OSError, ValueError):
+            # Ответ уже прочитан, и соединение закрыто.
+            pass
+
+
+def session_stats(session=None):
+    """Возвращает счётчики запросов и установленных соединений пула."""
+    session = session or _session
+    stats = {'requests': 0, 'connections': 0, 'reused': 0}
+    if session is None:
+        return stats
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats['requests'] += pool.num_requests
+            stats['connections'] += pool.num_connections
+    stats['reused'] = max(0, stats['requests'] - stats['connections'])
+    return stats
+
+
+class CacheEntry:
+    """Сохранённый ответ API и данные для его перепроверки."""
+
+    __slots__ = ('etag', 'last_modified', 'digest', 'data', 'stored_at')
+
+    def __init__(self, etag, last_modified, digest, data, stored_at):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.data = data
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    """TTL-кэш ответов API по токену студента.
+
+    Если сервер отдаёт ETag или Last-Modified, запрос становится
+    условным, и ответ 304 берётся из кэша. Если тело ответа совпадает
+    с сохранённым, повторный разбор JSON пропускается.
+    from_date в ключ не входит: курсор сдвигается после каждого
+    опроса, и с ним ни один запрос не попал бы в кэш. Ответ 304
+    на новый from_date означает, что сервер ничего не изменил,
+    а курсор не уходит назад по старому current_date.
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, maxsize=RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(headers):
+        """Формирует ключ кэша из заголовка авторизации студента."""
+        return headers.get('Authorization')
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def conditional_headers(self, key):
+        """Возвращает заголовки условного запроса для ключа."""
+        with self._lock:
+            entry = self._lookup(key)
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def resolve(self, key, response):
+        """Возвращает разобранный ответ, по возможности из кэша."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if response.status_code == HTTPStatus.NOT_MODIFIED and entry:
+                self.hits += 1
+                self.revalidated += 1
+                entry.stored_at = time.monotonic()
+                return entry.data
+            entry = self._lookup(key)
+        digest = hashlib.blake2b(response.content, digest_size=16).digest()
+        if entry is not None and entry.digest == digest:
+            with self._lock:
+                self.hits += 1
+                entry.stored_at = time.monotonic()
+            return entry.data
+        data = response.json()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = CacheEntry(
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                digest,
+                data,
+                time.monotonic()
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return data
+
+    def stats(self):
+        """Возвращает счётчики попаданий и промахов кэша."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'size': len(self._entries)
+            }
+
+
+def configure_cache(ttl=RESPONSE_CACHE_TTL, maxsize=RESPONSE_CACHE_SIZE):
+    """Включает общий кэш ответов; при ttl <= 0 кэш отключается."""
+    global _cache
+    _cache = ResponseCache(ttl, maxsize) if ttl > 0 else None
+    return _cache
+
+
+def get_cache():
+    """Возвращает общий кэш ответов или None, если он отключён."""
+    return _cache
@@ -0,0 +1,227 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import bootstrap  # noqa: F401
+
+# Формат логов: text - строки, как раньше, json - одна запись JSON
+# на строку. С LOG_QUEUE=true записи пишет фоновый поток, и вывод
+# логов не задерживает цикл опроса.
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_QUEUE = os.getenv('LOG_QUEUE', 'false').lower() == 'true'
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+PROJECT_LOGGER = 'homework'
+# Поля, которые передаются в extra и попадают в записи JSON.
+STRUCTURED_FIELDS = (
+    'tenant', 'chat_id', 'homework', 'latency', 'exception'
+)
+REDACTED = '***'
+# Токены в заголовках, URL Bot API и токены ботов Telegram.
+SECRET_PATTERNS = re.compile('|'.join((
+    r'(?<=OAuth )[^\s\'",}]+',
+    r'(?<=/bot)[^/\s]+',
+    r'\b\d{6,}:[\w-]{30,}',
+)))
+# Слова текста, которые сверяются с зарегистрированными секретами.
+SECRET_WORD = re.compile(r'[\w-]+')
+SECRET_VARIABLES = ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'WEBHOOK_SECRET')
+
+# Секреты-слова ищутся в множестве, остальные (их единицы) - заменой.
+_secrets = set()
+_other_secrets = []
+_handler = None
+
+
+def register_secret(value):
+    """Добавляет значение, которое нельзя выводить в логи."""
+    if not value:
+        return
+    value = str(value)
+    if SECRET_WORD.fullmatch(value):
+        _secrets.add(value)
+    elif value not in _other_secrets:
+        _other_secrets.append(value)
+
+
+def _hide_secret(match):
+    word = match.group()
+    return REDACTED if word in _secrets else word
+
+
+def redact(text):
+    """Заменяет в тексте токены и секреты на REDACTED.
+
+    Время не зависит от числа зарегистрированных секретов:
+    каждое слово текста проверяется по множеству.
+    """
+    for secret in _other_secrets:
+        text = text.replace(secret, REDACTED)
+    text = SECRET_PATTERNS.sub(REDACTED, text)
+    if _secrets:
+        text = SECRET_WORD.sub(_hide_secret, text)
+    return text
+
+
+class RedactingFormatter(logging.Formatter):
+    """Убирает секреты из строки, готовой formatter.
+
+    Работает в потоке, который пишет лог: с LOG_QUEUE это поток
+    QueueListener, и цикл опроса на редактирование не тратится.
+    """
+
+    def __init__(self, formatter):
+        super().__init__()
+        self.formatter = formatter
+
+    def format(self, record):
+        """Форматирует запись и убирает из неё секреты."""
+        return redact(self.formatter.format(record))
+
+
+def exception_name(record):
+    """Возвращает класс исключения записи для поля exception."""
+    if getattr(record, 'exception', None):
+        return record.exception
+    if record.exc_info:
+        return record.exc_info[0].__name__
+    return None
+
+
+class JSONFormatter(logging.Formatter):
+    """Форматирует запись как одну строку JSON."""
+
+    def format(self, record):
+        """Возвращает запись одной строкой JSON."""
+        entry = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        exception = exception_name(record)
+        if exception is not None:
+            entry['exception'] = exception
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['traceback'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """QueueHandler, сохраняющий трассировку отдельно от сообщения.
+
+    Стандартный prepare склеивает трассировку с текстом сообщения,
+    а в записи JSON она нужна в своём поле. Секреты убирает
+    форматтер уже в потоке QueueListener.
+    """
+
+    def prepare(self, record):
+        """Готовит копию записи, которую можно передать в очередь."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exception = exception_name(record)
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(
+                    record.exc_info
+                )
+        record.exc_info = None
+        return record
+
+
+def start_listener(handler=None):
+    """Запускает фоновый поток записи логов в текущем процессе.
+
+    Поток не переживает fork, поэтому его запускает каждая точка
+    входа, в том числе каждый дочерний процесс. Записи, сделанные
+    до запуска, ждут в очереди. Возвращает QueueListener или None,
+    если очередь логов не используется.
+    """
+    handler = _handler if handler is None else handler
+    listener = getattr(handler, 'listener', None)
+    if listener is None:
+        return None
+    thread = listener._thread
+    if thread is not None and thread.is_alive():
+        return listener
+    # Поток родительского процесса после fork мёртв.
+    listener._thread = None
+    listener.start()
+    atexit.register(stop_listener, listener)
+    return listener
+
+
+def stop_listener(listener):
+    """Дописывает записи из очереди и останавливает фоновый поток."""
+    if listener._thread is not None and listener._thread.is_alive():
+        listener.stop()
+    listener._thread = None
+
+
+def make_formatter(log_format=LOG_FORMAT):
+    """Возвращает форматтер для LOG_FORMAT, скрывающий секреты."""
+    if log_format == 'json':
+        return RedactingFormatter(JSONFormatter())
+    return RedactingFormatter(logging.Formatter(TEXT_FORMAT))
+
+
+def create_handler(
+    stream=None, log_format=LOG_FORMAT, use_queue=LOG_QUEUE
+):
+    """Создаёт обработчик логов бота.
+
+    С use_queue запись только кладётся в очередь, а форматирует
+    и пишет её в stream фоновый QueueListener, запускаемый
+    start_listener.
+    """
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(make_formatter(log_format))
+    if not use_queue:
+        return output
+    handler = StructuredQueueHandler(queue.SimpleQueue())
+    handler.listener = QueueListener(handler.queue, output)
+    return handler
+
+
+def configure_logging(*names):
+    """Подключает общий обработчик логов к логгерам names.
+
+    Обработчик создаётся один раз и подключается к каждому
+    логгеру не больше одного раза.
+    """
+    global _handler
+    for variable in SECRET_VARIABLES:
+        register_secret(os.getenv(variable))
+    if _handler is None:
+        _handler = create_handler()
+    for name in names or (PROJECT_LOGGER,):
+        logger = logging.getLogger(name)
+        if _handler not in logger.handlers:
+            logger.addHandler(_handler)
+    return _handler
+
+
+def log_fields(tenant=None, homework=None, error=None, **fields):
+    """Готовит extra с полями записи для JSON-логов."""
+    if tenant is not None:
+        fields.update(tenant=tenant.key, chat_id=tenant.chat_id)
+    if homework is not None:
+        fields['homework'] = homework
+    if error is not None:
+        fields['exception'] = type(error).__name__
+    return fields
@@ -0,0 +1,337 @@
+import inspect
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+
+import bootstrap  # noqa: F401
+import exceptions
+
+# Порт HTTP-эндпоинта с метриками; 0 - эндпоинт не запускается.
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PATH = '/metrics'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Границы корзин гистограмм задержек, в секундах.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+LAG_BUCKETS = (0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 600)
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+def format_value(value):
+    """Форматирует значение метрики для текстового формата Prometheus."""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value):
+    """Экранирует значение метки."""
+    return (
+        str(value)
+        .replace('\\', r'\\')
+        .replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+class MetricsRegistry:
+    """Набор метрик, которые отдаются одним эндпоинтом."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Добавляет метрику в набор."""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics)
+        return ''.join(metric.render() for metric in metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Metric:
+    """Базовая метрика: значения хранятся по набору значений меток."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f'Метрика {self.name} ожидает метки {self.labelnames}.'
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(
+            f'{name}="{escape_label(value)}"' for name, value in pairs
+        ) + '}'
+
+    def samples(self):
+        """Возвращает строки значений метрики."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f'{self.name}{self._labels(key)} {format_value(value)}'
+            for key, value in values
+        ]
+
+    def render(self):
+        """Возвращает метрику в текстовом формате Prometheus."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+            *self.samples(),
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+class Counter(Metric):
+    """Счётчик, который только растёт."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Увеличивает счётчик."""
+        if amount < 0:
+            raise ValueError('Счётчик не может уменьшаться.')
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """Возвращает текущее значение счётчика."""
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Значение, которое может расти и уменьшаться."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        """Устанавливает значение."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_to_current_time(self, **labels):
+        """Записывает текущее время в секундах от начала эпохи."""
+        self.set(time.time(), **labels)
+
+    def get(self, **labels):
+        """Возвращает текущее значение."""
+        return self._values.get(self._key(labels), 0)
+
+
+class Timer:
+    """Результат Histogram.time()."""
+
+    __slots__ = ('elapsed',)
+
+    def __init__(self):
+        self.elapsed = None
+
+
+class HistogramValue:
+    """Корзины, сумма и число наблюдений гистограммы."""
+
+    __slots__ = ('buckets', 'total', 'count')
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.total = 0
+        self.count = 0
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам, например задержек запросов."""
+
+    kind = 'histogram'
+
+    def __init__(
+        self, name, documentation, labelnames=(),
+        buckets=LATENCY_BUCKETS, registry=REGISTRY
+    ):
+        self.bounds = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        """Добавляет наблюдение."""
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = HistogramValue(
+                    len(self.bounds)
+                )
+            for index, bound in enumerate(self.bounds):
+                if value <= bound:
+                    histogram.buckets[index] += 1
+                    break
+            histogram.total += value
+            histogram.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Измеряет время выполнения блока, в том числе с ошибкой.
+
+        Возвращает Timer, в elapsed которого после блока лежит
+        измеренное время.
+        """
+        timer = Timer()
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            timer.elapsed = time.perf_counter() - start
+            self.observe(timer.elapsed, **labels)
+
+    def count(self, **labels):
+        """Возвращает число наблюдений."""
+        histogram = self._values.get(self._key(labels))
+        return 0 if histogram is None else histogram.count
+
+    def samples(self):
+        """Возвращает строки корзин, суммы и числа наблюдений."""
+        with self._lock:
+            values = sorted(
+                (key, list(value.buckets), value.total, value.count)
+                for key, value in self._values.items()
+            )
+        lines = []
+        for key, buckets, total, count in values:
+            cumulative = 0
+            for bound, bucket in zip(self.bounds, buckets):
+                cumulative += bucket
+                lines.append(
+                    f'{self.name}_bucket'
+                    f'{self._labels(key, [("le", format_value(bound))])} '
+                    f'{cumulative}'
+                )
+            lines.append(
+                f'{self.name}_sum{self._labels(key)} {format_value(total)}'
+            )
+            lines.append(f'{self.name}_count{self._labels(key)} {count}')
+        return lines
+
+
+API_LATENCY = Histogram(
+    'homework_api_request_seconds',
+    'Время запроса к API Практикум.Домашка.'
+)
+SEND_LATENCY = Histogram(
+    'homework_send_message_seconds',
+    'Время отправки сообщения в Telegram.'
+)
+EXCEPTIONS = Counter(
+    'homework_exceptions_total',
+    'Число перехваченных исключений по классам.',
+    ('exception',)
+)
+POLL_CYCLE = Histogram(
+    'homework_poll_cycle_seconds',
+    'Длительность цикла опроса API.',
+    buckets=LAG_BUCKETS
+)
+POLL_LAG = Histogram(
+    'homework_poll_lag_seconds',
+    'Опоздание опроса относительно запланированного времени.',
+    buckets=LAG_BUCKETS
+)
+QUEUE_DEPTH = Gauge(
+    'homework_queue_depth',
+    'Число сообщений, ожидающих отправки.',
+    ('queue',)
+)
+LAST_SUCCESS = Gauge(
+    'homework_last_success_timestamp_seconds',
+    'Время последнего успешного запроса к API или отправки сообщения.',
+    ('operation',)
+)
+
+# Счётчики собственных исключений бота видны с нуля, до первой ошибки.
+for _, exception_class in inspect.getmembers(exceptions, inspect.isclass):
+    if issubclass(exception_class, Exception):
+        EXCEPTIONS.inc(0, exception=exception_class.__name__)
+
+
+def count_exception(error):
+    """Учитывает перехваченное исключение."""
+    EXCEPTIONS.inc(exception=type(error).__name__)
+
+
+def metrics_handler():
+    """Создаёт класс обработчика запросов к эндпоинту метрик.
+
+    http.server импортируется только при запуске эндпоинта.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отдаёт метрики по GET-запросу к METRICS_PATH."""
+
+        registry = REGISTRY
+
+        def do_GET(self):
+            """Отвечает текстом метрик."""
+            if self.path.split('?')[0] != METRICS_PATH:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            body = self.registry.render().encode()
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            """Пишет запросы к эндпоинту в журнал бота."""
+            logger.debug(format % args)
+
+    return MetricsHandler
+
+
+def start_http_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Запускает эндпоинт с метриками в фоновом потоке.
+
+    Возвращает сервер или None, если порт не задан.
+    """
+    from http.server import ThreadingHTTPServer
+
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), metrics_handler())
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    ).start()
+    logger.info(f'Метрики доступны на {host}:{server.server_port}.')
+    return server
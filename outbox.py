@@ -0,0 +1,289 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+
+import bootstrap  # noqa: F401
+import metrics
+from sender import RateLimitedSender
+
+# Путь к базе SQLite с исходящими уведомлениями. Если задан, бот
+# записывает уведомления в неё, а отправляет их фоновый поток доставки.
+OUTBOX_PATH = os.getenv('OUTBOX_PATH')
+# Как часто процесс доставки проверяет новые уведомления, в секундах.
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 1))
+# На сколько секунд уведомление закрепляется за процессом доставки;
+# неотправленное за это время уведомление берётся снова.
+OUTBOX_LOCK_TTL = float(os.getenv('OUTBOX_LOCK_TTL', 300))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 10))
+# Сколько секунд хранятся отправленные уведомления и их ключи.
+OUTBOX_RETENTION = float(os.getenv('OUTBOX_RETENTION', 7 * 24 * 3600))
+PURGE_INTERVAL = 3600  # Период удаления старых уведомлений в секундах.
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+OutboxMessage = namedtuple(
+    'OutboxMessage', ('id', 'chat_id', 'text', 'attempts')
+)
+
+
+def notification_key(chat_id, homework_id, status, date_updated):
+    """Ключ идемпотентности уведомления о статусе работы."""
+    raw = f'{chat_id}\0{homework_id}\0{status}\0{date_updated}'
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class Outbox:
+    """Исходящие уведомления в базе SQLite.
+
+    Уведомление с уже известным ключом идемпотентности не добавляется
+    повторно, даже если оно уже отправлено. Процесс доставки
+    закрепляет уведомления за собой на lock_ttl секунд; уведомления
+    одного чата выдаются по порядку, после max_attempts попыток
+    уведомление помечается неотправленным.
+    """
+
+    def __init__(
+        self, path, lock_ttl=OUTBOX_LOCK_TTL, max_attempts=OUTBOX_MAX_ATTEMPTS
+    ):
+        self.path = path
+        self.lock_ttl = lock_ttl
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS outbox ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE, '
+                'chat_id TEXT, text TEXT, attempts INTEGER DEFAULT 0, '
+                'locked_until REAL DEFAULT 0, created_at REAL, '
+                'sent_at REAL, failed_at REAL)'
+            )
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS outbox_pending '
+                'ON outbox (chat_id, id) '
+                'WHERE sent_at IS NULL AND failed_at IS NULL'
+            )
+
+    def add(self, chat_id, text, key):
+        """Добавляет уведомление; False, если ключ уже встречался."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'INSERT OR IGNORE INTO outbox '
+                '(key, chat_id, text, created_at) VALUES (?, ?, ?, ?)',
+                (key, str(chat_id), text, time.time())
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, limit, now=None):
+        """Закрепляет за процессом до limit уведомлений и возвращает их.
+
+        Уведомление чата не выдаётся, пока более раннее уведомление
+        того же чата закреплено за кем-то и не отправлено.
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._connection:
+            self._connection.execute('BEGIN IMMEDIATE')
+            rows = self._connection.execute(
+                'SELECT id, chat_id, text, attempts FROM outbox AS message '
+                'WHERE sent_at IS NULL AND failed_at IS NULL '
+                'AND locked_until < ? AND NOT EXISTS ('
+                'SELECT 1 FROM outbox AS earlier '
+                'WHERE earlier.chat_id = message.chat_id '
+                'AND earlier.id < message.id AND earlier.sent_at IS NULL '
+                'AND earlier.failed_at IS NULL '
+                'AND earlier.locked_until >= ?) '
+                'ORDER BY id LIMIT ?', (now, now, limit)
+            ).fetchall()
+            messages = [OutboxMessage(*row) for row in rows]
+            failed = [
+                message for message in messages
+                if message.attempts >= self.max_attempts
+            ]
+            self._connection.executemany(
+                'UPDATE outbox SET failed_at = ? WHERE id = ?',
+                [(now, message.id) for message in failed]
+            )
+            messages = [
+                message for message in messages if message not in failed
+            ]
+            self._connection.executemany(
+                'UPDATE outbox SET attempts = attempts + 1, '
+                'locked_until = ? WHERE id = ?',
+                [(now + self.lock_ttl, message.id) for message in messages]
+            )
+        for message in failed:
+            logger.error(
+                f'Уведомление {message.id} в чат {message.chat_id} '
+                f'не отправлено после {message.attempts} попыток.'
+            )
+        return messages
+
+    def mark_sent(self, message_id, now=None):
+        """Отмечает уведомление отправленным."""
+        now = time.time() if now is None else now
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE outbox SET sent_at = ? '
+                'WHERE id = ? AND sent_at IS NULL', (now, message_id)
+            )
+
+    def purge(self, now=None, retention=OUTBOX_RETENTION):
+        """Удаляет отправленные уведомления старше retention секунд."""
+        now = time.time() if now is None else now
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'DELETE FROM outbox WHERE sent_at < ?', (now - retention,)
+            )
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM outbox '
+                'WHERE sent_at IS NULL AND failed_at IS NULL'
+            ).fetchone()[0]
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+
+def open_outbox(path=OUTBOX_PATH):
+    """Открывает outbox или возвращает None, если он не настроен."""
+    if not path:
+        return None
+    return Outbox(path)
+
+
+class OutboxWorker:
+    """Доставка: отправляет уведомления из outbox в своём темпе.
+
+    Работает фоновым потоком процесса опроса (start) или отдельным
+    процессом outbox.py, если у процессов общая файловая система.
+    Лимиты Telegram и повторы после ошибок соблюдает
+    RateLimitedSender; уведомление отмечается отправленным только
+    после ответа Telegram. Если доставка упала, закреплённые
+    за ней уведомления берутся снова через lock_ttl секунд.
+    """
+
+    def __init__(self, outbox, sender, interval=OUTBOX_POLL_INTERVAL):
+        self.outbox = outbox
+        self.sender = sender
+        self.interval = interval
+        self.thread = None
+        self._purged_at = 0
+        self._stopped = threading.Event()
+
+    def _claim(self):
+        """Передаёт в sender новые уведомления; возвращает их число."""
+        free = self.sender.maxsize - len(self.sender)
+        if free <= 0:
+            return 0
+        messages = self.outbox.claim(free)
+        for message in messages:
+            self.sender.submit(
+                message.chat_id,
+                message.text,
+                partial(self.outbox.mark_sent, message.id)
+            )
+        return len(messages)
+
+    def deliver_pending(self):
+        """Забирает новые уведомления и отправляет готовые; их число."""
+        self._claim()
+        sent = self.sender.drain()
+        metrics.QUEUE_DEPTH.set(len(self.outbox), queue='outbox')
+        metrics.QUEUE_DEPTH.set(len(self.sender), queue='sender')
+        return sent
+
+    def seconds_until_next(self):
+        """Возвращает время до следующей проверки outbox."""
+        ready = self.sender.seconds_until_ready()
+        if ready is None:
+            return self.interval
+        return min(ready, self.interval)
+
+    def flush(self):
+        """Отправляет всё, что можно отправить сейчас, для разового запуска.
+
+        Уведомления, не отправленные за max_attempts попыток
+        отправителя, остаются в outbox до следующего запуска.
+        """
+        while True:
+            claimed = self._claim()
+            self.sender.drain()
+            if not claimed and not len(self.sender):
+                return
+            time.sleep(self.sender.seconds_until_ready() or 0)
+
+    def run_forever(self):
+        """Доставляет уведомления из outbox до вызова stop."""
+        while not self._stopped.is_set():
+            self.deliver_pending()
+            if time.monotonic() - self._purged_at > PURGE_INTERVAL:
+                self._purged_at = time.monotonic()
+                self.outbox.purge()
+            self._stopped.wait(self.seconds_until_next())
+
+    def start(self):
+        """Запускает доставку фоновым потоком текущего процесса."""
+        self.thread = threading.Thread(
+            target=self.run_forever, name='outbox', daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает фоновый поток доставки."""
+        self._stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+def start_delivery(outbox, bot):
+    """Запускает доставку из outbox в потоке процесса опроса.
+
+    Возвращает OutboxWorker или None, если outbox не настроен.
+    """
+    if outbox is None:
+        return None
+    return OutboxWorker(outbox, RateLimitedSender(bot)).start()
+
+
+def main():
+    """Доставляет уведомления из OUTBOX_PATH отдельным процессом.
+
+    Нужен, только если процессы видят один файл OUTBOX_PATH;
+    обычно доставку выполняет поток процесса опроса.
+    """
+    # homework импортирует этот модуль, поэтому импорт здесь.
+    from telebot import TeleBot
+
+    from exceptions import AbsenceVariableException
+    from homework import TELEGRAM_TOKEN
+    from logconfig import start_listener
+
+    start_listener()
+    outbox = open_outbox()
+    if TELEGRAM_TOKEN is None or outbox is None:
+        logger.critical('Не задан TELEGRAM_TOKEN или OUTBOX_PATH.')
+        raise AbsenceVariableException()
+    metrics.start_http_server()
+    logger.info(f'Запущена доставка уведомлений из {OUTBOX_PATH}.')
+    try:
+        OutboxWorker(outbox, RateLimitedSender(TeleBot(
+            token=TELEGRAM_TOKEN
+        ))).run_forever()
+    finally:
+        outbox.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import os
+import random
+
+import bootstrap  # noqa: F401
+
+# Адаптивный опрос: чаще, пока работа на проверке, реже, пока ничего
+# не происходит или API недоступен. По умолчанию период постоянный.
+ADAPTIVE_POLLING = os.getenv('ADAPTIVE_POLLING', 'false').lower() == 'true'
+REVIEWING_PERIOD = int(os.getenv('REVIEWING_PERIOD', 120))
+MAX_POLLING_PERIOD = int(os.getenv('MAX_POLLING_PERIOD', 3600))
+POLLING_JITTER = float(os.getenv('POLLING_JITTER', 0.1))
+BACKOFF_FACTOR = 2
+REVIEWING_STATUS = 'reviewing'
+
+
+def has_pending_review(statuses):
+    """Проверяет, есть ли у студента работа на проверке."""
+    return any(
+        status == REVIEWING_STATUS for status, _ in statuses.values()
+    )
+
+
+class AdaptiveInterval:
+    """Интервал до следующего опроса одного студента.
+
+    Пока работа на проверке, опрос идёт раз в reviewing_period.
+    Если проверяемых работ нет или API отвечает ошибкой, интервал
+    растёт экспоненциально от period до max_period. К интервалу
+    добавляется случайное отклонение до jitter, чтобы студенты
+    не обращались к API одновременно. Без adaptive интервал
+    всегда равен period.
+    """
+
+    def __init__(
+        self, period,
+        reviewing_period=REVIEWING_PERIOD,
+        max_period=MAX_POLLING_PERIOD,
+        jitter=POLLING_JITTER,
+        adaptive=ADAPTIVE_POLLING
+    ):
+        self.period = period
+        self.reviewing_period = reviewing_period
+        self.max_period = max(max_period, period)
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.idle_polls = 0
+        self.failures = 0
+
+    def _backoff(self, attempts):
+        return min(
+            self.max_period, self.period * BACKOFF_FACTOR ** attempts
+        )
+
+    def next_delay(self, succeeded, reviewing):
+        """Возвращает задержку до следующего опроса в секундах."""
+        if not self.adaptive:
+            return self.period
+        if not succeeded:
+            delay = self._backoff(self.failures)
+            self.failures += delay < self.max_period
+        elif reviewing:
+            self.failures = self.idle_polls = 0
+            delay = self.reviewing_period
+        else:
+            self.failures = 0
+            delay = self._backoff(self.idle_polls)
+            self.idle_polls += delay < self.max_period
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
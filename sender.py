@@ -0,0 +1,261 @@
+import logging
+import os
+import time
+from collections import deque
+from http import HTTPStatus
+
+import bootstrap  # noqa: F401
+import metrics
+
+# Лимиты Telegram: сообщений в секунду для бота и для одного чата.
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+# Размер очереди отправки и число попыток отправить сообщение.
+SENDER_QUEUE_SIZE = int(os.getenv('SENDER_QUEUE_SIZE', 1000))
+SENDER_MAX_ATTEMPTS = int(os.getenv('SENDER_MAX_ATTEMPTS', 5))
+# Пауза после ответа 429 без retry_after, в секундах.
+DEFAULT_RETRY_AFTER = 1
+# Результаты попытки отправить сообщение.
+SENT, RETRY, DROPPED = 'sent', 'retry', 'dropped'
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+class TokenBucket:
+    """Ведро токенов: не более rate операций в секунду в среднем."""
+
+    def __init__(self, rate, capacity=None, now=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+        self.blocked_until = 0
+
+    def _refill(self, now):
+        elapsed = max(0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def try_acquire(self, now):
+        """Забирает токен, если он есть и ведро не заблокировано."""
+        if now < self.blocked_until:
+            return False
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def wait_time(self, now):
+        """Возвращает время до появления следующего токена."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, until):
+        """Запрещает операции до момента until (после ответа 429)."""
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = 0
+
+    def is_idle(self, now):
+        """Проверяет, что ведро полно и его можно забыть."""
+        self._refill(now)
+        return now >= self.blocked_until and self.tokens >= self.capacity
+
+
+class OutgoingMessage:
+    """Сообщение в очереди отправки."""
+
+    __slots__ = ('chat_id', 'text', 'on_sent', 'attempts', 'not_before')
+
+    def __init__(self, chat_id, text, on_sent=None):
+        self.chat_id = chat_id
+        self.text = text
+        self.on_sent = on_sent
+        self.attempts = 0
+        self.not_before = 0
+
+
+def retry_after(error):
+    """Возвращает паузу из ответа 429 или None для других ошибок."""
+    if getattr(error, 'error_code', None) != HTTPStatus.TOO_MANY_REQUESTS:
+        return None
+    parameters = (error.result_json or {}).get('parameters') or {}
+    return parameters.get('retry_after', DEFAULT_RETRY_AFTER)
+
+
+class RateLimitedSender:
+    """Отправляет сообщения в Telegram в пределах лимитов платформы.
+
+    Общее ведро токенов ограничивает скорость бота, ведро каждого чата -
+    скорость сообщений в чат. Ответ 429 блокирует чат на retry_after
+    секунд, сообщение остаётся в очереди. Очередь ограничена:
+    если она заполнена, submit возвращает False, и отправитель
+    должен придержать сообщение у себя.
+    """
+
+    def __init__(
+        self, bot,
+        global_rate=TELEGRAM_GLOBAL_RATE,
+        chat_rate=TELEGRAM_CHAT_RATE,
+        maxsize=SENDER_QUEUE_SIZE,
+        max_attempts=SENDER_MAX_ATTEMPTS
+    ):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.maxsize = maxsize
+        self.max_attempts = max_attempts
+        self.global_bucket = TokenBucket(global_rate)
+        self.dropped = 0  # Сообщения, не отправленные за max_attempts.
+        self._chat_buckets = {}
+        self._queue = deque()
+
+    def submit(self, chat_id, text, on_sent=None):
+        """Ставит сообщение в очередь; False, если очередь заполнена."""
+        if len(self._queue) >= self.maxsize:
+            return False
+        self._queue.append(OutgoingMessage(chat_id, text, on_sent))
+        return True
+
+    def take(self, queue, force=False):
+        """Забирает готовые сообщения из очереди доставки."""
+        rejected = []
+        for batch in queue.pop_due(force=force):
+            if not self.submit(batch.chat_id, batch.text, batch.acknowledge):
+                rejected.append(batch)
+        for batch in reversed(rejected):
+            queue.requeue(batch)
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, now=now
+            )
+        return bucket
+
+    def drain(self, now=None):
+        """Отправляет сообщения, разрешённые лимитами; возвращает их число.
+
+        Порядок сообщений внутри чата сохраняется: если первое
+        сообщение чата ждёт, остальные сообщения этого чата тоже ждут.
+        """
+        now = time.monotonic() if now is None else now
+        sent = 0
+        dispatch = self._dispatch(now)
+        outcome = None
+        try:
+            while True:
+                message = dispatch.send(outcome)
+                outcome = self._deliver(message, now)
+                sent += outcome == SENT
+        except StopIteration:
+            return sent
+
+    def _dispatch(self, now):
+        """Выдаёт сообщения, разрешённые лимитами, и принимает итог отправки.
+
+        Генератор общий для синхронной и асинхронной отправки:
+        итог (SENT, RETRY или DROPPED) передаётся в него через send.
+        """
+        held = 0
+        waiting_chats = set()
+        for _ in range(len(self._queue)):
+            message = self._queue.popleft()
+            if (
+                message.chat_id in waiting_chats
+                or message.not_before > now
+                or not self._chat_bucket(message.chat_id, now).try_acquire(now)
+            ):
+                waiting_chats.add(message.chat_id)
+                self._queue.append(message)
+                held += 1
+                continue
+            if not self.global_bucket.try_acquire(now):
+                self._chat_buckets[message.chat_id].tokens += 1
+                self._queue.appendleft(message)
+                self._queue.rotate(held)
+                break
+            outcome = yield message
+            if outcome == RETRY:
+                waiting_chats.add(message.chat_id)
+                self._queue.append(message)
+                held += 1
+            elif outcome == DROPPED:
+                self.dropped += 1
+        self._forget_idle_chats(now)
+
+    def _deliver(self, message, now):
+        import requests
+        from telebot.apihelper import ApiException, ApiTelegramException
+
+        try:
+            with metrics.SEND_LATENCY.time():
+                self.bot.send_message(message.chat_id, message.text)
+        except ApiTelegramException as error:
+            return self._failed(message, now, error)
+        except (ApiException, requests.RequestException) as error:
+            metrics.count_exception(error)
+            return self._retry(message, now, error)
+        return self._sent(message)
+
+    def _sent(self, message):
+        logger.debug(f'Сообщение отправлено в чат {message.chat_id}.')
+        metrics.LAST_SUCCESS.set_to_current_time(operation='send_message')
+        if message.on_sent is not None:
+            message.on_sent()
+        return SENT
+
+    def _failed(self, message, now, error):
+        """Обрабатывает ответ Telegram с ошибкой: 429 блокирует чат."""
+        metrics.count_exception(error)
+        pause = retry_after(error)
+        if pause is None:
+            return self._retry(message, now, error)
+        logger.warning(
+            f'Лимит Telegram для чата {message.chat_id}, '
+            f'повтор через {pause} с.'
+        )
+        self._chat_buckets[message.chat_id].block(now + pause)
+        return RETRY
+
+    def _retry(self, message, now, error):
+        message.attempts += 1
+        if message.attempts >= self.max_attempts:
+            logger.error(
+                f'Сообщение в чат {message.chat_id} не отправлено '
+                f'после {message.attempts} попыток: {error}.'
+            )
+            return DROPPED
+        logger.error(f'Сообщение не отправлено, из-за ошибки {error}.')
+        message.not_before = now + 2 ** message.attempts
+        return RETRY
+
+    def _forget_idle_chats(self, now):
+        if len(self._chat_buckets) <= self.maxsize:
+            return
+        for chat_id in [
+            chat_id for chat_id, bucket in self._chat_buckets.items()
+            if bucket.is_idle(now)
+        ]:
+            del self._chat_buckets[chat_id]
+
+    def seconds_until_ready(self, now=None):
+        """Возвращает время до следующей возможной отправки или None."""
+        if not self._queue:
+            return None
+        now = time.monotonic() if now is None else now
+        delay = min(
+            max(
+                message.not_before - now,
+                self._chat_bucket(message.chat_id, now).wait_time(now)
+            )
+            for message in self._queue
+        )
+        return max(0, delay, self.global_bucket.wait_time(now))
+
+    def __len__(self):
+        return len(self._queue)
@@ -0,0 +1,347 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from bisect import bisect
+
+import bootstrap  # noqa: F401
+import http_client
+import metrics
+from exceptions import AbsenceVariableException
+from homework import RETRY_PERIOD, TELEGRAM_TOKEN
+from logconfig import start_listener, stop_listener
+from outbox import open_outbox, start_delivery
+from storage import STATE_BACKEND, open_state_store
+from tenants import (TenantScheduler,
+                     delivery_options,
+                     load_tenants,
+                     restore_tenant,
+                     restore_tenants)
+
+# Шардирование: каждый воркер опрашивает свою часть студентов.
+# Воркеры и аренда студентов хранятся в общей базе SQLite SHARD_DB.
+SHARD_DB = os.getenv('SHARD_DB', 'shards.db')
+WORKER_ID = os.getenv(
+    'WORKER_ID', f'{socket.gethostname()}-{os.getpid()}'
+)
+# Число процессов-воркеров, запускаемых одной командой.
+SHARD_PROCESSES = int(os.getenv('SHARD_PROCESSES', 1))
+# Воркер без отметки дольше SHARD_HEARTBEAT_TTL секунд считается
+# выбывшим, его студенты переходят к остальным.
+SHARD_HEARTBEAT_TTL = float(os.getenv('SHARD_HEARTBEAT_TTL', 60))
+SHARD_LEASE_TTL = float(os.getenv('SHARD_LEASE_TTL', 2 * RETRY_PERIOD))
+# Число точек каждого воркера на кольце хешей.
+SHARD_REPLICAS = int(os.getenv('SHARD_REPLICAS', 100))
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+def ring_hash(value):
+    """Возвращает позицию строки на кольце хешей."""
+    return int.from_bytes(
+        hashlib.sha1(value.encode()).digest()[:8], 'big'
+    )
+
+
+class HashRing:
+    """Кольцо согласованного хеширования.
+
+    Каждый воркер занимает replicas точек на кольце, студент
+    достаётся ближайшему по часовой стрелке. При появлении
+    или выбывании воркера переезжают только студенты, попавшие
+    на его участки кольца.
+    """
+
+    def __init__(self, nodes, replicas=SHARD_REPLICAS):
+        self.nodes = tuple(sorted(nodes))
+        points = sorted(
+            (ring_hash(f'{node}#{index}'), node)
+            for node in self.nodes for index in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        """Возвращает воркер, которому принадлежит ключ, или None."""
+        if not self._nodes:
+            return None
+        index = bisect(self._hashes, ring_hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class ShardLease:
+    """Список живых воркеров и аренда студентов в базе SQLite.
+
+    Студента опрашивает только воркер, арендовавший его: аренда
+    продлевается при каждом опросе и переходит к другому воркеру,
+    когда её отпустили или срок истёк. База должна быть общей
+    для всех воркеров.
+    """
+
+    def __init__(
+        self, path=SHARD_DB, worker_id=WORKER_ID,
+        heartbeat_ttl=SHARD_HEARTBEAT_TTL, lease_ttl=SHARD_LEASE_TTL
+    ):
+        self.worker_id = worker_id
+        self.heartbeat_ttl = heartbeat_ttl
+        self.lease_ttl = lease_ttl
+        self.held = set()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS workers ('
+                'worker TEXT PRIMARY KEY, seen_at REAL)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS leases ('
+                'tenant TEXT PRIMARY KEY, worker TEXT, expires_at REAL)'
+            )
+
+    def heartbeat(self, now=None):
+        """Отмечает воркер живым и возвращает список живых воркеров."""
+        now = time.time() if now is None else now
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO workers VALUES (?, ?)',
+                (self.worker_id, now)
+            )
+            rows = self._connection.execute(
+                'SELECT worker FROM workers WHERE seen_at >= ? '
+                'ORDER BY worker', (now - self.heartbeat_ttl,)
+            ).fetchall()
+        return tuple(worker for worker, in rows)
+
+    def acquire(self, key, now=None):
+        """Арендует или продлевает аренду студента.
+
+        Возвращает False, если студент арендован другим воркером.
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'INSERT INTO leases VALUES (?, ?, ?) '
+                'ON CONFLICT (tenant) DO UPDATE SET '
+                'worker = excluded.worker, expires_at = excluded.expires_at '
+                'WHERE leases.worker = excluded.worker '
+                'OR leases.expires_at < ?',
+                (key, self.worker_id, now + self.lease_ttl, now)
+            )
+        acquired = cursor.rowcount == 1
+        if acquired:
+            self.held.add(key)
+        else:
+            self.held.discard(key)
+        return acquired
+
+    def release(self, keys):
+        """Отпускает аренду студентов, чтобы их сразу взял другой воркер."""
+        keys = list(keys)
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'DELETE FROM leases WHERE tenant = ? AND worker = ?',
+                [(key, self.worker_id) for key in keys]
+            )
+        self.held.difference_update(keys)
+
+    def close(self):
+        """Выводит воркер из списка живых и отпускает его студентов."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM leases WHERE worker = ?', (self.worker_id,)
+            )
+            self._connection.execute(
+                'DELETE FROM workers WHERE worker = ?', (self.worker_id,)
+            )
+        self.held.clear()
+        self._connection.close()
+
+
+class ShardScheduler(TenantScheduler):
+    """Планировщик, опрашивающий только студентов своего шарда.
+
+    Студенты делятся между живыми воркерами по кольцу хешей.
+    Список воркеров обновляется каждые heartbeat_ttl / 3 секунд;
+    при его изменении студенты чужих шардов отпускаются, а новые
+    студенты опрашиваются сразу. Перед опросом студент арендуется,
+    поэтому двое воркеров не опрашивают его одновременно, даже пока
+    их списки воркеров расходятся.
+    """
+
+    def __init__(self, tenants, lease, **kwargs):
+        tenants = list(tenants)
+        super().__init__(tenants, **kwargs)
+        self.tenants = tenants
+        self.lease = lease
+        self.ring = HashRing(())
+        self._next_heartbeat = 0
+        self.rebalance()
+
+    def owns(self, tenant):
+        """Проверяет, что студент относится к шарду этого воркера."""
+        return self.ring.node_for(tenant.key) == self.lease.worker_id
+
+    def rebalance(self):
+        """Обновляет список воркеров и перераспределяет студентов."""
+        self._next_heartbeat = (
+            time.monotonic() + self.lease.heartbeat_ttl / 3
+        )
+        workers = self.lease.heartbeat()
+        if workers == self.ring.nodes:
+            return
+        first = not self.ring.nodes
+        before = {tenant.key for tenant in self.tenants if self.owns(tenant)}
+        self.ring = HashRing(workers)
+        owned = [tenant for tenant in self.tenants if self.owns(tenant)]
+        self.lease.release(
+            key for key in list(self.lease.held)
+            if self.ring.node_for(key) != self.lease.worker_id
+        )
+        now = time.monotonic()
+        for tenant in owned:
+            if not first and tenant.key not in before:
+                self.schedule(tenant, now)
+        logger.info(
+            f'Воркеров: {len(workers)}, студентов в шарде '
+            f'{self.lease.worker_id}: {len(owned)}.'
+        )
+
+    def claim(self, tenant):
+        """Арендует студента; при смене владельца читает его состояние."""
+        was_held = tenant.key in self.lease.held
+        if not self.lease.acquire(tenant.key):
+            return False
+        if not was_held and self.store is not None:
+            restore_tenant(tenant, self.store)
+        return True
+
+    def poll(self, bot, tenants, deadline=None):
+        """Опрашивает студентов своего шарда, которых удалось арендовать.
+
+        Студенты чужих шардов проверяются снова через период опроса,
+        арендованные другим воркером - при следующем обновлении
+        списка воркеров.
+        """
+        own = []
+        now = time.monotonic()
+        for tenant in tenants:
+            if not self.owns(tenant):
+                self.schedule(tenant, now + self.period)
+            elif self.claim(tenant):
+                own.append(tenant)
+            else:
+                self.schedule(tenant, self._next_heartbeat)
+        super().poll(bot, own, deadline)
+
+    def run_pending(self, bot):
+        """Обновляет список воркеров, если пора, и опрашивает студентов."""
+        if time.monotonic() >= self._next_heartbeat:
+            self.rebalance()
+        super().run_pending(bot)
+
+    def seconds_until_next(self, now):
+        """Возвращает время до ближайшего опроса или отметки воркера."""
+        return min(
+            super().seconds_until_next(now),
+            max(0, self._next_heartbeat - now)
+        )
+
+
+def exit_on_sigterm(signum, frame):
+    """Завершает процесс по SIGTERM через SystemExit.
+
+    Тогда выполняются блоки finally, и воркер отпускает аренду
+    студентов сразу, а не через SHARD_LEASE_TTL: при перезапуске
+    у нового процесса другой WORKER_ID.
+    """
+    raise SystemExit(128 + signum)
+
+
+def run_worker(worker_id=WORKER_ID):
+    """Опрашивает API для студентов шарда воркера worker_id."""
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+    # Процесс воркера запускает свой поток логов: поток родителя
+    # не переживает fork, а atexit в дочернем процессе не вызывается.
+    listener = start_listener()
+    try:
+        run_shard(worker_id)
+    finally:
+        if listener is not None:
+            stop_listener(listener)
+
+
+def run_shard(worker_id):
+    """Опрашивает студентов шарда до остановки воркера."""
+    from telebot import TeleBot
+
+    registry = load_tenants()
+    if TELEGRAM_TOKEN is None or not registry:
+        logger.critical('Не задан TELEGRAM_TOKEN или реестр студентов.')
+        raise AbsenceVariableException()
+    if STATE_BACKEND != 'sqlite':
+        logger.warning(
+            'Воркеры шардов не видят состояние друг друга: '
+            'задайте общее хранилище STATE_BACKEND=sqlite.'
+        )
+    bot = TeleBot(token=TELEGRAM_TOKEN)
+    http_client.configure_session()
+    http_client.configure_cache()
+    store = open_state_store()
+    outbox = open_outbox()
+    restore_tenants(registry, store)
+    lease = ShardLease(worker_id=worker_id)
+    logger.info(f'Запущен воркер шарда {worker_id}.')
+    delivery = start_delivery(outbox, bot)
+    try:
+        ShardScheduler(
+            registry, lease, store=store, **delivery_options(bot, outbox)
+        ).run_forever(bot)
+    finally:
+        if delivery is not None:
+            delivery.stop()
+        lease.close()
+        http_client.close_session()
+        store.close()
+        if outbox is not None:
+            outbox.close()
+
+
+def main():
+    """Запускает SHARD_PROCESSES воркеров шардов.
+
+    Метрики отдаются только в режиме одного процесса. SIGTERM
+    родителя передаётся воркерам, и родитель ждёт их завершения.
+    """
+    if SHARD_PROCESSES <= 1:
+        metrics.start_http_server()
+        run_worker()
+        return
+    processes = [
+        multiprocessing.Process(
+            target=run_worker, args=(f'{WORKER_ID}-{index}',),
+            name=f'shard-{index}'
+        )
+        for index in range(SHARD_PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward_sigterm(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward_sigterm)
+    start_listener()
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
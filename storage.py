@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+import bootstrap  # noqa: F401
+from exceptions import InvalidStateBackendException
+
+# Хранилище состояния опроса: sqlite, json или в памяти (по умолчанию).
+STATE_BACKEND = os.getenv('STATE_BACKEND')
+STATE_PATH = os.getenv('STATE_PATH')
+
+
+def state_key(token):
+    """Возвращает ключ состояния студента, не раскрывающий токен."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+class TenantState:
+    """Состояние опроса студента.
+
+    current_date - метка времени, с которой запрашиваются изменения;
+    statuses - последний отправленный статус и дата обновления
+    для каждой домашней работы: {homework_id: (status, date_updated)}.
+    """
+
+    __slots__ = ('current_date', 'statuses')
+
+    def __init__(self, current_date=None, statuses=None):
+        self.current_date = current_date
+        self.statuses = statuses if statuses is not None else {}
+
+    def remember(self, homework_id, status, date_updated):
+        """Запоминает отправленный статус работы."""
+        self.statuses[homework_id] = (status, date_updated)
+
+
+class MemoryStateStore:
+    """Хранит состояние только в памяти процесса."""
+
+    def __init__(self):
+        self._states = {}
+
+    def load(self, key):
+        """Возвращает сохранённое состояние студента."""
+        state = self._states.get(key)
+        if state is None:
+            return TenantState()
+        return TenantState(state.current_date, dict(state.statuses))
+
+    def save(self, key, state):
+        """Сохраняет состояние студента."""
+        self._states[key] = TenantState(
+            state.current_date, dict(state.statuses)
+        )
+
+    def close(self):
+        """Освобождает ресурсы хранилища."""
+
+
+class JSONStateStore:
+    """Хранит состояние всех студентов в одном JSON-файле.
+
+    Файл перезаписывается атомарно: данные пишутся во временный файл
+    в том же каталоге и подменяют старый через os.replace.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(self._data, file, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def load(self, key):
+        """Возвращает сохранённое состояние студента."""
+        with self._lock:
+            record = self._data.get(key)
+        if record is None:
+            return TenantState()
+        statuses = {
+            homework_id: tuple(value)
+            for homework_id, value in record['statuses'].items()
+        }
+        return TenantState(record['current_date'], statuses)
+
+    def save(self, key, state):
+        """Сохраняет состояние студента."""
+        with self._lock:
+            self._data[key] = {
+                'current_date': state.current_date,
+                'statuses': dict(state.statuses)
+            }
+            self._write()
+
+    def close(self):
+        """Освобождает ресурсы хранилища."""
+
+
+class SQLiteStateStore:
+    """Хранит состояние студентов в базе SQLite.
+
+    Сохранение выполняется в одной транзакции, поэтому после сбоя
+    в базе остаётся либо старое, либо новое состояние целиком.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS cursors ('
+                'tenant TEXT PRIMARY KEY, from_date INTEGER)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS statuses ('
+                'tenant TEXT, homework_id TEXT, status TEXT, '
+                'date_updated TEXT, PRIMARY KEY (tenant, homework_id))'
+            )
+
+    def load(self, key):
+        """Возвращает сохранённое состояние студента."""
+        with self._lock:
+            cursor = self._connection.execute(
+                'SELECT from_date FROM cursors WHERE tenant = ?', (key,)
+            ).fetchone()
+            rows = self._connection.execute(
+                'SELECT homework_id, status, date_updated FROM statuses '
+                'WHERE tenant = ?', (key,)
+            ).fetchall()
+        statuses = {
+            homework_id: (status, date_updated)
+            for homework_id, status, date_updated in rows
+        }
+        return TenantState(cursor[0] if cursor else None, statuses)
+
+    def save(self, key, state):
+        """Сохраняет состояние студента."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                (key, state.current_date)
+            )
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?, ?)',
+                [
+                    (key, homework_id, status, date_updated)
+                    for homework_id, (status, date_updated)
+                    in state.statuses.items()
+                ]
+            )
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+
+STATE_BACKENDS = {
+    'json': JSONStateStore,
+    'sqlite': SQLiteStateStore,
+}
+
+
+def open_state_store(backend=STATE_BACKEND, path=STATE_PATH):
+    """Открывает хранилище состояния, выбранное в настройках."""
+    if not backend:
+        return MemoryStateStore()
+    if backend not in STATE_BACKENDS or not path:
+        raise InvalidStateBackendException(
+            f'Неизвестное хранилище состояния {backend!r} '
+            'или не задан STATE_PATH.'
+        )
+    return STATE_BACKENDS[backend](path)
@@ -0,0 +1,233 @@
+import codecs
+import json
+import os
+
+import bootstrap  # noqa: F401
+from exceptions import ApiUnavailableException
+
+# Потоковый разбор ответа API: работы читаются из сети по одной,
+# и ответ целиком не хранится в памяти. По умолчанию выключен.
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'false').lower() == 'true'
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 64 * 1024))
+HOMEWORKS_KEY = 'homeworks'
+WHITESPACE = ' \t\n\r'
+
+# Состояния разбора ответа вида {"homeworks": [...], "current_date": ...}.
+(OBJECT, FIRST_KEY, KEY, COLON, VALUE, FIRST_ITEM, ITEM,
+ AFTER_ITEM, AFTER_VALUE, DONE) = range(10)
+
+
+class HomeworksParser:
+    """Потоковый разбор ответа API.
+
+    Части ответа передаются в feed по мере получения, работы из списка
+    homeworks возвращаются сразу после разбора. В памяти остаётся
+    только неразобранный хвост ответа. Остальные поля верхнего уровня
+    собираются в fields.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.has_homeworks = False
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._state = OBJECT
+        self._key = None
+        self._handlers = {
+            OBJECT: self._object,
+            FIRST_KEY: self._key_or_end,
+            KEY: self._key_or_end,
+            COLON: self._colon,
+            VALUE: self._value,
+            FIRST_ITEM: self._item_or_end,
+            ITEM: self._item_or_end,
+            AFTER_ITEM: self._after_item,
+            AFTER_VALUE: self._after_value,
+            DONE: self._done,
+        }
+
+    def feed(self, text, final=False):
+        """Добавляет часть ответа и возвращает разобранные из неё работы."""
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        homeworks = []
+        while self._step(homeworks, final):
+            pass
+        if final and self._state != DONE:
+            raise json.JSONDecodeError(
+                'Ответ API оборвался', self._buffer, self._pos
+            )
+        return homeworks
+
+    def _skip_whitespace(self):
+        while (
+            self._pos < len(self._buffer)
+            and self._buffer[self._pos] in WHITESPACE
+        ):
+            self._pos += 1
+        return self._pos < len(self._buffer)
+
+    def _expect(self, char):
+        if self._buffer[self._pos] != char:
+            raise json.JSONDecodeError(
+                f'Ожидается "{char}"', self._buffer, self._pos
+            )
+        self._pos += 1
+
+    def _decode(self, final):
+        """Разбирает значение JSON или возвращает False, если мало данных.
+
+        Число в конце буфера может продолжиться в следующей части,
+        поэтому оно разбирается, только когда за ним что-то есть.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False
+        if (
+            end == len(self._buffer) and not final
+            and not isinstance(value, (dict, list, str))
+        ):
+            return False
+        self._pos = end
+        return value,
+
+    def _step(self, homeworks, final):
+        if not self._skip_whitespace():
+            return False
+        handler = self._handlers[self._state]
+        return handler(self._buffer[self._pos], homeworks, final)
+
+    def _object(self, char, homeworks, final):
+        if char != '{':
+            raise TypeError(f'Ответ должен быть словарем: {char}')
+        self._pos += 1
+        self._state = FIRST_KEY
+        return True
+
+    def _key_or_end(self, char, homeworks, final):
+        if char == '}' and self._state == FIRST_KEY:
+            self._pos += 1
+            self._state = DONE
+            return True
+        if char != '"':
+            raise json.JSONDecodeError(
+                'Ожидается ключ', self._buffer, self._pos
+            )
+        decoded = self._decode(final)
+        if not decoded:
+            return False
+        self._key = decoded[0]
+        self._state = COLON
+        return True
+
+    def _colon(self, char, homeworks, final):
+        self._expect(':')
+        self._state = VALUE
+        return True
+
+    def _value(self, char, homeworks, final):
+        if self._key == HOMEWORKS_KEY and char == '[':
+            self._pos += 1
+            self.has_homeworks = True
+            self._state = FIRST_ITEM
+            return True
+        decoded = self._decode(final)
+        if not decoded:
+            return False
+        self.fields[self._key] = decoded[0]
+        self._state = AFTER_VALUE
+        return True
+
+    def _item_or_end(self, char, homeworks, final):
+        if char == ']' and self._state == FIRST_ITEM:
+            self._pos += 1
+            self._state = AFTER_VALUE
+            return True
+        decoded = self._decode(final)
+        if not decoded:
+            return False
+        homeworks.append(check_homework(decoded[0]))
+        self._state = AFTER_ITEM
+        return True
+
+    def _after_item(self, char, homeworks, final):
+        if char == ']':
+            self._pos += 1
+            self._state = AFTER_VALUE
+        else:
+            self._expect(',')
+            self._state = ITEM
+        return True
+
+    def _after_value(self, char, homeworks, final):
+        if char == '}':
+            self._pos += 1
+            self._state = DONE
+        else:
+            self._expect(',')
+            self._state = KEY
+        return True
+
+    def _done(self, char, homeworks, final):
+        raise json.JSONDecodeError(
+            'Лишние данные после ответа', self._buffer, self._pos
+        )
+
+
+def check_homework(homework):
+    """Проверяет, что элемент списка homeworks - словарь."""
+    if not isinstance(homework, dict):
+        raise TypeError(f'Работа должна быть словарем: {homework}')
+    return homework
+
+
+class StreamedAnswer:
+    """Ответ API, работы из которого читаются из сети по одной.
+
+    Итерация возвращает работы по мере получения ответа и проверяет
+    их на лету. После последней работы проверяются поля верхнего
+    уровня из required_keys, как в check_response.
+    """
+
+    def __init__(self, chunks, required_keys=(), close=None):
+        self.fields = {}
+        self.required_keys = required_keys
+        self._chunks = chunks
+        self._close = close
+
+    def __iter__(self):
+        import requests
+
+        parser = HomeworksParser()
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            for chunk in self._chunks:
+                yield from parser.feed(decoder.decode(chunk))
+            yield from parser.feed(decoder.decode(b'', final=True), True)
+        except requests.RequestException as error:
+            raise ApiUnavailableException(
+                f'Ответ API прерван при чтении: {error}.'
+            )
+        finally:
+            self.close()
+        self.fields = parser.fields
+        if self.fields.get(HOMEWORKS_KEY) is not None:
+            raise TypeError(
+                'Данные под ключом "homeworks" должны быть '
+                f'списком: {self.fields[HOMEWORKS_KEY]}'
+            )
+        for key in self.required_keys:
+            if key == HOMEWORKS_KEY and parser.has_homeworks:
+                continue
+            if self.fields.get(key) is None:
+                raise KeyError(f'Указанный ключ отсутствует: {key}')
+
+    def close(self):
+        """Закрывает соединение, даже если ответ прочитан не до конца."""
+        if self._close is not None:
+            self._close()
+            self._close = None
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+from string import Formatter
+
+import bootstrap  # noqa: F401
+from exceptions import InvalidTemplatesConfigException
+
+# Язык уведомлений по умолчанию и JSON-файл с языками и шаблонами:
+# {"en": {"template": "...", "verdicts": {"approved": "..."}}}.
+DEFAULT_LOCALE = os.getenv('DEFAULT_LOCALE', 'ru')
+TEMPLATES_FILE = os.getenv('TEMPLATES_FILE')
+
+# Поля, которые подставляются из статуса, а не из работы.
+STATUS_FIELDS = ('verdict', 'status')
+CONVERSIONS = {'r': repr, 's': str, 'a': ascii}
+LOCALES = {
+    'en': {
+        'template': 'Homework "{homework_name}" review status changed. '
+                    '{verdict}',
+        'verdicts': {
+            'approved': 'The reviewer liked everything. Hooray!',
+            'reviewing': 'The reviewer has started reviewing the homework.',
+            'rejected': 'The reviewer has left some comments.'
+        }
+    }
+}
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+class MessageTemplate:
+    """Шаблон сообщения, разобранный один раз.
+
+    Вердикт и статус подставляются при создании, поэтому для каждого
+    статуса хранится кортеж: постоянный текст, чередующийся с полями
+    работы. Шаблон с одним полем собирается одной f-строкой.
+    """
+
+    def __init__(self, template, verdicts):
+        self.template = template
+        self.verdicts = dict(verdicts)
+        try:
+            pieces = list(Formatter().parse(template))
+        except ValueError as error:
+            raise InvalidTemplatesConfigException(
+                f'Некорректный шаблон сообщения "{template}": {error}'
+            )
+        self._parts = {
+            status: self._compile(pieces, status, verdict)
+            for status, verdict in self.verdicts.items()
+        }
+        self._simple = all(
+            len(parts) == 3 and parts[1].__class__ is str
+            for parts in self._parts.values()
+        )
+
+    @staticmethod
+    def _compile(pieces, status, verdict):
+        constants = {'verdict': verdict, 'status': status}
+        parts = ['']
+        for literal, name, spec, conversion in pieces:
+            parts[-1] += literal
+            if name is None:
+                continue
+            if not name:
+                raise InvalidTemplatesConfigException(
+                    'В шаблоне сообщения нужны имена полей, а не {}.'
+                )
+            if name in STATUS_FIELDS:
+                value = constants[name]
+                if conversion:
+                    value = CONVERSIONS[conversion](value)
+                parts[-1] += format(value, spec)
+            elif spec or conversion:
+                parts.extend(((name, conversion, spec), ''))
+            else:
+                parts.extend((name, ''))
+        return tuple(parts)
+
+    def render(self, homework, status):
+        """Возвращает сообщение о работе с указанным статусом."""
+        if self._simple:
+            prefix, field, suffix = self._parts[status]
+            return f'{prefix}{homework.get(field, "")}{suffix}'
+        parts = self._parts[status]
+        return ''.join(
+            render_field(homework, part) if index % 2 else part
+            for index, part in enumerate(parts)
+        )
+
+
+def render_field(homework, field):
+    """Подставляет поле работы с учётом преобразования и формата."""
+    if field.__class__ is str:
+        return str(homework.get(field, ''))
+    name, conversion, spec = field
+    value = homework.get(name, '')
+    if conversion:
+        value = CONVERSIONS[conversion](value)
+    return format(value, spec)
+
+
+class TemplateRegistry:
+    """Тексты уведомлений по языкам.
+
+    Вердикты и шаблоны регистрируются при запуске, а готовые
+    MessageTemplate кэшируются по паре (язык, шаблон): студенты
+    с одинаковыми настройками используют один разобранный шаблон.
+    Вердикты, которых нет в языке, берутся из языка по умолчанию.
+    """
+
+    def __init__(self, default_locale=DEFAULT_LOCALE):
+        self.default_locale = default_locale
+        self._locales = {}
+        self._cache = {}
+
+    def register(self, locale, verdicts=None, template=None):
+        """Добавляет язык или дополняет его вердикты и шаблон."""
+        current = self._locales.setdefault(
+            locale, {'template': None, 'verdicts': {}}
+        )
+        current['verdicts'].update(verdicts or {})
+        if template is not None:
+            current['template'] = template
+        self._cache.clear()
+
+    def load(self, locales):
+        """Регистрирует языки из словаря {locale: {template, verdicts}}."""
+        try:
+            for locale, options in locales.items():
+                self.register(
+                    locale, options.get('verdicts'), options.get('template')
+                )
+        except (AttributeError, TypeError, ValueError) as error:
+            raise InvalidTemplatesConfigException(
+                f'Некорректное описание языков уведомлений: {error}'
+            )
+
+    def load_file(self, path):
+        """Регистрирует языки из JSON-файла."""
+        try:
+            with open(path, encoding='utf-8') as file:
+                locales = json.load(file)
+        except (OSError, ValueError) as error:
+            raise InvalidTemplatesConfigException(
+                f'Не удалось прочитать шаблоны сообщений {path}: {error}'
+            )
+        self.load(locales)
+
+    def check(self):
+        """Проверяет, что язык по умолчанию зарегистрирован с шаблоном.
+
+        Вызывается при запуске, после загрузки всех языков: иначе
+        ошибка в DEFAULT_LOCALE всплыла бы только при первом опросе.
+        """
+        default = self._locales.get(self.default_locale)
+        if default is None or default['template'] is None:
+            raise InvalidTemplatesConfigException(
+                f'Язык уведомлений по умолчанию {self.default_locale!r} '
+                'не зарегистрирован или не имеет шаблона. '
+                f'Известные языки: {", ".join(sorted(self._locales))}.'
+            )
+
+    def get(self, locale=None, template=None):
+        """Возвращает разобранный шаблон для языка.
+
+        template - собственный шаблон студента вместо шаблона языка.
+        """
+        key = (locale, template)
+        message_template = self._cache.get(key)
+        if message_template is None:
+            message_template = self._cache[key] = self._build(
+                locale, template
+            )
+        return message_template
+
+    def _build(self, locale, template):
+        default = self._locales[self.default_locale]
+        options = self._locales.get(locale or self.default_locale)
+        if options is None:
+            logger.warning(
+                f'Язык уведомлений {locale} не найден, '
+                f'используется {self.default_locale}.'
+            )
+            options = default
+        return MessageTemplate(
+            template or options['template'] or default['template'],
+            {**default['verdicts'], **options['verdicts']}
+        )
+
+    def __contains__(self, locale):
+        return locale in self._locales
+
+
+TEMPLATES = TemplateRegistry()
+TEMPLATES.load(LOCALES)
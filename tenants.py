@@ -0,0 +1,590 @@
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from functools import partial
+
+import bootstrap  # noqa: F401
+import circuit_breaker
+import http_client
+import metrics
+from delivery import DeliveryQueue
+from exceptions import (AbsenceVariableException,
+                        CircuitOpenException,
+                        InvalidTenantsConfigException)
+from homework import (DIFFERENCE,
+                      EXIT_CONFIG,
+                      EXIT_FAILURE,
+                      EXIT_NOT_DELIVERED,
+                      EXIT_OK,
+                      PRACTICUM_TOKEN,
+                      RESPONSE_VALIDATOR,
+                      RETRY_PERIOD,
+                      TELEGRAM_CHAT_ID,
+                      TELEGRAM_TOKEN,
+                      add_to_outbox,
+                      collect_notifications,
+                      fetch_api_answer,
+                      homework_key,
+                      make_headers,
+                      next_from_date,
+                      open_storage,
+                      remember_status,
+                      send_message_to,
+                      stream_api_answer)
+from logconfig import log_fields, register_secret, start_listener
+from outbox import OutboxWorker, open_outbox, start_delivery
+from scheduling import AdaptiveInterval, has_pending_review
+from sender import RateLimitedSender
+from storage import TenantState, open_state_store, state_key
+from streaming import STREAM_RESPONSES, StreamedAnswer
+from templates import TEMPLATES
+from timeline import record_transitions
+
+# Реестр студентов: строка вида "token1:chat_id1,token2:chat_id2"
+# или путь к JSON-файлу со списком {"token": ..., "chat_id": ...}.
+# В файле можно задать язык ("locale") и свой шаблон ("template").
+TENANTS = os.getenv('TENANTS')
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+TENANT_OPTIONS = ('locale', 'template')
+# Время на один цикл опроса в секундах: студенты, до которых очередь
+# не дошла, опрашиваются в следующем цикле. 0 снимает ограничение.
+POLL_DEADLINE = float(os.getenv('POLL_DEADLINE', RETRY_PERIOD))
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+class Tenant:
+    """Студент: токен Практикума и чат Telegram для уведомлений."""
+
+    def __init__(self, token, chat_id, locale=None, template=None):
+        self.token = token
+        self.chat_id = chat_id
+        self.locale = locale
+        self.template = template
+        self.headers = make_headers(token)
+        self.key = state_key(token)
+        self.state = TenantState(int(time.time()) - DIFFERENCE)
+        # Курсор из последнего ответа API и работы, уведомления
+        # о которых ещё не доставлены: до их доставки курсор не сдвигается.
+        self.next_cursor = None
+        self.unconfirmed = set()
+
+    @property
+    def timestamp(self):
+        """Метка времени, с которой запрашиваются изменения."""
+        return self.state.current_date
+
+    @timestamp.setter
+    def timestamp(self, value):
+        self.state.current_date = value
+
+    @property
+    def message_template(self):
+        """Разобранный шаблон уведомлений на языке студента."""
+        return TEMPLATES.get(self.locale, self.template)
+
+    def __repr__(self):
+        return f'Tenant(chat_id={self.chat_id!r})'
+
+
+class TenantRegistry:
+    """Реестр студентов: токен Практикума -> чат Telegram."""
+
+    def __init__(self):
+        self._tenants = {}
+
+    def add(self, token, chat_id, locale=None, template=None):
+        """Добавляет студента в реестр или обновляет его настройки."""
+        tenant = self._tenants.get(token)
+        if tenant is None:
+            tenant = self._tenants[token] = Tenant(token, chat_id)
+        tenant.chat_id = chat_id
+        tenant.locale = locale
+        tenant.template = template
+        return tenant
+
+    def remove(self, token):
+        """Удаляет студента из реестра."""
+        return self._tenants.pop(token, None)
+
+    def get(self, token):
+        """Возвращает студента по токену."""
+        return self._tenants.get(token)
+
+    def by_chat(self, chat_id):
+        """Возвращает студентов, уведомления которых идут в чат."""
+        return [
+            tenant for tenant in self._tenants.values()
+            if str(tenant.chat_id) == str(chat_id)
+        ]
+
+    def __iter__(self):
+        return iter(list(self._tenants.values()))
+
+    def __len__(self):
+        return len(self._tenants)
+
+
+def parse_tenants(raw):
+    """Разбирает строку вида "token1:chat_id1,token2:chat_id2"."""
+    pairs = []
+    for item in raw.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        token, separator, chat_id = item.rpartition(':')
+        if not separator or not token or not chat_id:
+            raise InvalidTenantsConfigException(
+                'Ожидается запись вида "token:chat_id".'
+            )
+        pairs.append((token, chat_id))
+    return pairs
+
+
+def read_tenants_file(path):
+    """Читает реестр студентов из JSON-файла.
+
+    Возвращает тройки (token, chat_id, options), где options -
+    необязательные настройки студента из TENANT_OPTIONS.
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            records = json.load(file)
+        return [
+            (record['token'], record['chat_id'], {
+                option: record[option]
+                for option in TENANT_OPTIONS if option in record
+            })
+            for record in records
+        ]
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        raise InvalidTenantsConfigException(
+            f'Не удалось прочитать реестр студентов {path}: {error}'
+        )
+
+
+def load_tenants():
+    """Собирает реестр студентов из переменных окружения.
+
+    Если реестр не задан, в него попадает единственный студент
+    из PRACTICUM_TOKEN и TELEGRAM_CHAT_ID.
+    """
+    registry = TenantRegistry()
+    records = []
+    if TENANTS_FILE:
+        records.extend(read_tenants_file(TENANTS_FILE))
+    if TENANTS:
+        records.extend(
+            (token, chat_id, {}) for token, chat_id in parse_tenants(TENANTS)
+        )
+    if not records and PRACTICUM_TOKEN and TELEGRAM_CHAT_ID:
+        records.append((PRACTICUM_TOKEN, TELEGRAM_CHAT_ID, {}))
+    for token, chat_id, options in records:
+        register_secret(token)
+        registry.add(token, chat_id, **options)
+        # Шаблон разбирается при запуске, а не в первом цикле опроса.
+        TEMPLATES.get(options.get('locale'), options.get('template'))
+    return registry
+
+
+def restore_tenant(tenant, store):
+    """Восстанавливает состояние студента из хранилища."""
+    state = store.load(tenant.key)
+    if state.current_date is None:
+        state.current_date = tenant.timestamp
+    tenant.state = state
+
+
+def restore_tenants(registry, store):
+    """Восстанавливает состояние студентов из хранилища."""
+    for tenant in registry:
+        restore_tenant(tenant, store)
+
+
+def collect_messages(tenant, response):
+    """Проверяет ответ API и готовит сообщения об изменившихся работах.
+
+    Ответ может быть потоком работ (StreamedAnswer), тогда работы
+    проверяются по мере чтения.
+    """
+    homeworks = response
+    if not isinstance(response, StreamedAnswer):
+        homeworks = RESPONSE_VALIDATOR.check_response(response)
+    notifications = collect_notifications(
+        tenant.state.statuses, homeworks, tenant.message_template
+    )
+    hold_cursor(
+        tenant, next_from_date(response, tenant.timestamp), notifications
+    )
+    if not notifications:
+        logger.debug(
+            f'Нет новых статусов домашних работ: {tenant.chat_id}.',
+            extra=log_fields(tenant)
+        )
+    return notifications
+
+
+def hold_cursor(tenant, cursor, notifications):
+    """Сдвигает курсор студента, когда доставлены все уведомления.
+
+    Пока хоть одно уведомление из ответа не доставлено, курсор
+    остаётся прежним, и следующий опрос снова запросит эту работу.
+    """
+    tenant.next_cursor = cursor
+    tenant.unconfirmed = {
+        homework_key(homework) for homework, _ in notifications
+    }
+    if not tenant.unconfirmed:
+        tenant.timestamp = cursor
+
+
+def confirm_delivery(tenant, homework, store=None):
+    """Запоминает доставленный статус и сохраняет состояние студента.
+
+    С доставкой последнего уведомления из ответа API курсор
+    студента сдвигается к current_date этого ответа. Смена статуса
+    попадает в историю только здесь: повтор после неудачной
+    отправки не дописывает событие второй раз.
+    """
+    remember_status(tenant.state, homework)
+    record_transitions(tenant.key, [(homework, None)])
+    tenant.unconfirmed.discard(homework_key(homework))
+    if not tenant.unconfirmed and tenant.next_cursor is not None:
+        tenant.timestamp = tenant.next_cursor
+        tenant.next_cursor = None
+    if store is not None:
+        store.save(tenant.key, tenant.state)
+
+
+def fetch_tenant(tenant, stream=None):
+    """Запрашивает ответ API для студента через общий предохранитель.
+
+    stream - читать ли ответ потоком, по умолчанию STREAM_RESPONSES.
+    """
+    if stream is None:
+        stream = STREAM_RESPONSES
+    return circuit_breaker.api_breaker.call(
+        stream_api_answer if stream else fetch_api_answer,
+        tenant.headers, tenant.timestamp
+    )
+
+
+def dispatch_notifications(
+    tenant, response, store=None, queue=None, outbox=None
+):
+    """Проверяет ответ API и передаёт уведомления на доставку.
+
+    Если передан outbox, уведомления записываются в него и считаются
+    доставленными. Если передана очередь доставки, сообщения ставятся
+    в неё и отправляются пачкой. Иначе уведомления возвращаются:
+    их отправляет сам опрос, синхронно или асинхронно.
+    """
+    direct = []
+    for homework, message in collect_messages(tenant, response):
+        if outbox is not None:
+            add_to_outbox(outbox, tenant.chat_id, homework, message)
+            confirm_delivery(tenant, homework)
+        elif queue is not None:
+            queue.add(
+                tenant.chat_id,
+                message,
+                partial(confirm_delivery, tenant, homework, store)
+            )
+        else:
+            direct.append((homework, message))
+    return direct
+
+
+def poll_failed(tenant, error):
+    """Учитывает ошибку опроса студента и возвращает False.
+
+    Разомкнутый предохранитель - не ошибка: опрос просто отложен.
+    """
+    metrics.count_exception(error)
+    if isinstance(error, CircuitOpenException):
+        logger.debug(
+            f'Опрос для чата {tenant.chat_id} отложен: {error}',
+            extra=log_fields(tenant, error=error)
+        )
+    else:
+        logger.error(
+            f'Ошибка опроса для чата {tenant.chat_id}: {error}',
+            extra=log_fields(tenant, error=error)
+        )
+    return False
+
+
+def poll_tenant(
+    bot, tenant, store=None, queue=None, fetch=None, outbox=None
+):
+    """Выполняет один цикл опроса API для студента.
+
+    Уведомления доставляются через dispatch_notifications. fetch -
+    функция без аргументов, возвращающая ответ API; по умолчанию
+    запрос выполняется здесь же через fetch_tenant.
+    """
+    try:
+        if fetch is None:
+            response = fetch_tenant(tenant)
+        else:
+            response = fetch()
+        for homework, message in dispatch_notifications(
+            tenant, response, store, queue, outbox
+        ):
+            if send_message_to(bot, tenant.chat_id, message):
+                confirm_delivery(tenant, homework)
+        if store is not None:
+            store.save(tenant.key, tenant.state)
+        return True
+    except Exception as error:
+        return poll_failed(tenant, error)
+
+
+class TenantScheduler:
+    """Планировщик опроса: одна очередь по времени для всех студентов.
+
+    Первые запросы равномерно распределяются по периоду опроса,
+    чтобы студенты не обращались к API в одну и ту же секунду.
+    Цикл опроса ограничен deadline секундами, чтобы зависший
+    студент не задерживал отправку сообщений остальным.
+    """
+
+    def __init__(
+        self, tenants, period=RETRY_PERIOD, store=None, queue=None,
+        sender=None, deadline=POLL_DEADLINE, outbox=None
+    ):
+        self.period = period
+        self.deadline = deadline
+        self.store = store
+        self.queue = queue
+        self.sender = sender
+        self.outbox = outbox
+        self._intervals = {}
+        self._queue = []
+        self._scheduled = {}
+        self._counter = itertools.count()
+        tenants = list(tenants)
+        now = time.monotonic()
+        for index, tenant in enumerate(tenants):
+            self.schedule(tenant, now + period * index / len(tenants))
+
+    def schedule(self, tenant, due):
+        """Ставит опрос студента на момент due (time.monotonic).
+
+        Предыдущий запланированный опрос студента отменяется.
+        """
+        sequence = next(self._counter)
+        self._scheduled[tenant.key] = sequence
+        heapq.heappush(self._queue, (due, sequence, tenant))
+
+    def cancel(self, tenant):
+        """Отменяет запланированный опрос студента."""
+        return self._scheduled.pop(tenant.key, None) is not None
+
+    def _is_current(self, entry):
+        return self._scheduled.get(entry[2].key) == entry[1]
+
+    def _drop_cancelled(self):
+        while self._queue and not self._is_current(self._queue[0]):
+            heapq.heappop(self._queue)
+
+    def reschedule(self, tenant, succeeded):
+        """Ставит следующий опрос студента с учётом итога текущего."""
+        interval = self._intervals.get(tenant.key)
+        if interval is None:
+            interval = self._intervals[tenant.key] = AdaptiveInterval(
+                self.period
+            )
+        delay = interval.next_delay(
+            succeeded, has_pending_review(tenant.state.statuses)
+        )
+        self.schedule(tenant, time.monotonic() + delay)
+
+    def pop_due(self, now):
+        """Извлекает студентов, для которых наступило время опроса."""
+        due = []
+        self._drop_cancelled()
+        while self._queue and self._queue[0][0] <= now:
+            scheduled, _, tenant = heapq.heappop(self._queue)
+            del self._scheduled[tenant.key]
+            metrics.POLL_LAG.observe(now - scheduled)
+            due.append(tenant)
+            self._drop_cancelled()
+        return due
+
+    def seconds_until_next(self, now):
+        """Возвращает время до ближайшего опроса или отправки сообщений."""
+        self._drop_cancelled()
+        delays = [max(0, self._queue[0][0] - now) if self._queue else None]
+        if self.queue is not None:
+            delays.append(self.queue.seconds_until_flush(now))
+        if self.sender is not None:
+            delays.append(self.sender.seconds_until_ready(now))
+        return min(
+            [delay for delay in delays if delay is not None] or [self.period]
+        )
+
+    def defer(self, tenants):
+        """Переносит опрос студентов, не уложившихся в цикл, на следующий."""
+        logger.warning(
+            f'Цикл опроса длится дольше {self.deadline} с, '
+            f'отложен опрос студентов: {len(tenants)}.'
+        )
+        now = time.monotonic()
+        for tenant in tenants:
+            self.schedule(tenant, now)
+
+    def poll(self, bot, tenants, deadline=None):
+        """Опрашивает студентов по очереди до наступления deadline."""
+        for index, tenant in enumerate(tenants):
+            if deadline is not None and time.monotonic() >= deadline:
+                self.defer(tenants[index:])
+                return
+            succeeded = poll_tenant(
+                bot, tenant, self.store, self.queue, outbox=self.outbox
+            )
+            self.reschedule(tenant, succeeded)
+
+    def run_pending(self, bot):
+        """Опрашивает студентов, чья очередь подошла, и шлёт сообщения."""
+        started = time.monotonic()
+        deadline = started + self.deadline if self.deadline else None
+        self.poll(bot, self.pop_due(started), deadline)
+        metrics.POLL_CYCLE.observe(time.monotonic() - started)
+        if self.queue is not None and self.sender is None:
+            self.sender = RateLimitedSender(bot)
+        if self.queue is not None:
+            self.sender.take(self.queue)
+        if self.sender is not None:
+            self.sender.drain()
+        self.report_queue_depth()
+
+    def report_queue_depth(self):
+        """Обновляет метрики длины очередей отправки."""
+        if self.queue is not None:
+            metrics.QUEUE_DEPTH.set(len(self.queue), queue='delivery')
+        if self.sender is not None:
+            metrics.QUEUE_DEPTH.set(len(self.sender), queue='sender')
+
+    def run_forever(self, bot):
+        """Бесконечно опрашивает студентов по расписанию."""
+        while True:
+            self.run_pending(bot)
+            time.sleep(self.seconds_until_next(time.monotonic()))
+
+    def __len__(self):
+        return len(self._scheduled)
+
+
+def delivery_options(bot, outbox=None):
+    """Возвращает настройки доставки для TenantScheduler.
+
+    С outbox уведомления записываются в него, а отправляет их
+    поток доставки; без него - очередь и RateLimitedSender.
+    """
+    if outbox is not None:
+        return {'outbox': outbox}
+    return {'queue': DeliveryQueue(), 'sender': RateLimitedSender(bot)}
+
+
+def poll_once(bot, tenants, store=None, sender=None, outbox=None):
+    """Опрашивает всех студентов один раз и дожидается отправки сообщений.
+
+    Возвращает код завершения: EXIT_FAILURE, если опрос хотя бы
+    одного студента не удался, EXIT_NOT_DELIVERED, если не все
+    сообщения доставлены.
+    """
+    queue = DeliveryQueue() if outbox is None else None
+    sender = RateLimitedSender(bot) if sender is None else sender
+    failed = [
+        tenant for tenant in tenants
+        if not poll_tenant(bot, tenant, store, queue, outbox=outbox)
+    ]
+    if outbox is not None:
+        OutboxWorker(outbox, sender).flush()
+    while queue is not None and (len(queue) or len(sender)):
+        sender.take(queue, force=True)
+        sender.drain()
+        time.sleep(sender.seconds_until_ready() or 0)
+    if failed:
+        return EXIT_FAILURE
+    return EXIT_NOT_DELIVERED if sender.dropped else EXIT_OK
+
+
+def run_once():
+    """Один цикл опроса всех студентов для cron; код завершения."""
+    from telebot import TeleBot
+
+    start_listener()
+    registry = load_tenants()
+    if TELEGRAM_TOKEN is None or not registry:
+        logger.critical('Не задан TELEGRAM_TOKEN или реестр студентов.')
+        return EXIT_CONFIG
+    storage = open_storage()
+    if storage is None:
+        return EXIT_CONFIG
+    store, outbox = storage
+    bot = TeleBot(token=TELEGRAM_TOKEN)
+    http_client.configure_session()
+    try:
+        restore_tenants(registry, store)
+        return poll_once(bot, registry, store, outbox=outbox)
+    finally:
+        http_client.close_session()
+        store.close()
+        if outbox is not None:
+            outbox.close()
+
+
+def main():
+    """Опрашивает API для всех студентов из реестра в одном процессе."""
+    from telebot import TeleBot
+
+    start_listener()
+    registry = load_tenants()
+    if TELEGRAM_TOKEN is None or not registry:
+        logger.critical('Не задан TELEGRAM_TOKEN или реестр студентов.')
+        raise AbsenceVariableException()
+    bot = TeleBot(token=TELEGRAM_TOKEN)
+    http_client.configure_session()
+    http_client.configure_cache()
+    store = open_state_store()
+    outbox = open_outbox()
+    restore_tenants(registry, store)
+    metrics.start_http_server()
+    logger.info(f'Запущен опрос для студентов: {len(registry)}.')
+    delivery = start_delivery(outbox, bot)
+    try:
+        TenantScheduler(
+            registry, store=store, **delivery_options(bot, outbox)
+        ).run_forever(bot)
+    finally:
+        if delivery is not None:
+            delivery.stop()
+        http_client.close_session()
+        store.close()
+        if outbox is not None:
+            outbox.close()
+
+
+def parse_args(argv=None):
+    """Разбирает параметры запуска опроса студентов."""
+    parser = argparse.ArgumentParser(
+        description='Опрос API для всех студентов из реестра.'
+    )
+    parser.add_argument(
+        '--once', action='store_true',
+        help='опросить всех студентов один раз и завершиться (для cron)'
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    if parse_args().once:
+        sys.exit(run_once())
+    main()
@@ -23,6 +23,30 @@ def homework_module():
     return homework
 
 
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append(chat_id)
+
+
+@pytest.fixture
+def recording_bot():
+    return RecordingBot
+
+
+@pytest.fixture
+def make_registry():
+    def make(count):
+        import tenants
+        registry = tenants.TenantRegistry()
+        for index in range(count):
+            registry.add(f'token{index}', index)
+        return registry
+    return make
+
+
 @pytest.fixture
 def random_message():
     def random_string(string_length=15):
@@ -46,3 +70,11 @@ def data_with_new_hw_status(random_timestamp):
         ],
         'current_date': random_timestamp
     }
+
+
+@pytest.fixture(autouse=True)
+def api_breaker(monkeypatch):
+    import circuit_breaker
+    breaker = circuit_breaker.CircuitBreaker()
+    monkeypatch.setattr(circuit_breaker, 'api_breaker', breaker)
+    return breaker
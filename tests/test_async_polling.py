@@ -0,0 +1,140 @@
+import asyncio
+
+import aiohttp
+import pytest
+import telebot.asyncio_helper
+from aiohttp import test_utils, web
+
+
+@pytest.fixture
+def async_polling_module():
+    import async_polling
+    return async_polling
+
+
+class MockAsyncTelegramBot:
+    def __init__(self, failures=()):
+        self.sent = []
+        self.failures = list(failures)
+
+    async def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((chat_id, text))
+
+
+def run_with_api(handler, coroutine_factory):
+    async def runner():
+        app = web.Application()
+        app.router.add_get('/api/user_api/homework_statuses/', handler)
+        server = test_utils.TestServer(app)
+        await server.start_server()
+        try:
+            endpoint = str(server.make_url('/api/user_api/homework_statuses/'))
+            async with aiohttp.ClientSession() as session:
+                return await coroutine_factory(endpoint, session)
+        finally:
+            await server.close()
+    return asyncio.run(runner())
+
+
+class TestAsyncPolling:
+
+    def test_fetch_api_answer_async(
+            self, monkeypatch, async_polling_module, data_with_new_hw_status
+    ):
+        async def handler(request):
+            assert request.headers['Authorization'] == 'OAuth token'
+            assert 'from_date' in request.query
+            return web.json_response(data_with_new_hw_status)
+
+        async def scenario(endpoint, session):
+            monkeypatch.setattr(async_polling_module, 'ENDPOINT', endpoint)
+            return await async_polling_module.fetch_api_answer_async(
+                session, {'Authorization': 'OAuth token'}, 0
+            )
+
+        assert run_with_api(handler, scenario) == data_with_new_hw_status
+
+    def test_fetch_api_answer_async_error(
+            self, monkeypatch, async_polling_module
+    ):
+        async def handler(request):
+            return web.Response(status=500)
+
+        async def scenario(endpoint, session):
+            monkeypatch.setattr(async_polling_module, 'ENDPOINT', endpoint)
+            with pytest.raises(async_polling_module.RequestException):
+                await async_polling_module.fetch_api_answer_async(
+                    session, {'Authorization': 'OAuth token'}, 0
+                )
+
+        run_with_api(handler, scenario)
+
+    def test_poller_bounds_concurrency(
+            self, monkeypatch, async_polling_module, data_with_new_hw_status
+    ):
+        import tenants
+        in_flight = {'now': 0, 'max': 0}
+
+        async def handler(request):
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            await asyncio.sleep(0.01)
+            in_flight['now'] -= 1
+            return web.json_response(data_with_new_hw_status)
+
+        registry = tenants.TenantRegistry()
+        for index in range(10):
+            registry.add(f'token{index}', index)
+        bot = MockAsyncTelegramBot()
+
+        async def scenario(endpoint, session):
+            monkeypatch.setattr(async_polling_module, 'ENDPOINT', endpoint)
+            poller = async_polling_module.AsyncPoller(
+                registry, session, bot, max_concurrency=3, period=0
+            )
+            await asyncio.gather(*(poller.poll(tenant) for tenant in registry))
+
+        run_with_api(handler, scenario)
+        assert in_flight['max'] <= 3, (
+            'Число одновременных запросов к API должно быть ограничено.'
+        )
+        assert sorted(chat_id for chat_id, _ in bot.sent) == list(range(10))
+
+
+class TestAsyncRateLimitedSender:
+
+    def test_retry_after_is_respected(self, async_polling_module):
+        error = telebot.asyncio_helper.ApiTelegramException(
+            'sendMessage', None, {
+                'error_code': 429,
+                'description': 'Too Many Requests',
+                'parameters': {'retry_after': 3},
+            }
+        )
+        bot = MockAsyncTelegramBot(failures=[error])
+        sender = async_polling_module.AsyncRateLimitedSender(bot)
+        sender.submit('chat', 'text')
+        now = sender.global_bucket.updated
+
+        assert asyncio.run(sender.drain(now)) == 0
+        assert len(sender) == 1, 'После 429 сообщение не должно теряться.'
+        assert asyncio.run(sender.drain(now + 1)) == 0
+        assert asyncio.run(sender.drain(now + 3)) == 1
+        assert bot.sent == [('chat', 'text')]
+
+    def test_gives_up_after_max_attempts(self, async_polling_module):
+        error = aiohttp.ClientConnectionError('boom')
+        bot = MockAsyncTelegramBot(failures=[error, error])
+        sender = async_polling_module.AsyncRateLimitedSender(
+            bot, max_attempts=2
+        )
+        sender.submit('chat', 'text')
+        now = sender.global_bucket.updated
+        asyncio.run(sender.drain(now))
+        assert len(sender) == 1
+        asyncio.run(sender.drain(now + 10))
+        assert len(sender) == 0
+        assert sender.dropped == 1
+        assert bot.sent == []
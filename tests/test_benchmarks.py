@@ -0,0 +1,67 @@
+import math
+import time
+
+import telebot
+
+from benchmarks import bench_polling, bench_startup
+from benchmarks.fake_servers import FakePracticumApi, FakeTelegramApi
+
+
+class TestBenchmarkServers:
+
+    def test_fake_practicum_api(self, monkeypatch, homework_module):
+        with FakePracticumApi(homeworks=4, change_period=60) as api:
+            monkeypatch.setattr(homework_module, 'ENDPOINT', api.endpoint)
+            response = homework_module.fetch_api_answer(
+                homework_module.make_headers('student'), 0
+            )
+            homework_module.check_response(response)
+            assert len(response['homeworks']) == 4
+            for homework in response['homeworks']:
+                assert homework['homework_name'].startswith('student-')
+                homework_module.parse_status(homework)
+            later = homework_module.fetch_api_answer(
+                homework_module.make_headers('student'), int(time.time()) + 1
+            )
+        assert later['homeworks'] == [], (
+            'Фейковый API должен учитывать параметр from_date.'
+        )
+        assert api.requests == 2
+
+    def test_fake_telegram_and_latency(self, monkeypatch):
+        with FakePracticumApi(homeworks=1) as api, FakeTelegramApi() as tg:
+            monkeypatch.setattr(telebot.apihelper, 'API_URL', tg.api_url)
+            bot = telebot.TeleBot(token=bench_polling.BENCH_TELEGRAM_TOKEN)
+            bot.send_message(42, 'Изменился статус проверки работы "t-0-0".')
+        assert [chat_id for _, chat_id, _ in tg.messages] == ['42']
+        latencies = bench_polling.notify_latencies(api, tg)
+        assert len(latencies) == 1
+        assert latencies[0] >= 0
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert bench_polling.percentile(values, 0.5) == 50
+        assert bench_polling.percentile(values, 0.99) == 99
+        assert bench_polling.percentile([3], 0.99) == 3
+        assert math.isnan(bench_polling.percentile([], 0.5))
+
+
+class TestStartup:
+
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   metrics\n'
+            'import time:       300 |        420 | homework\n'
+        )
+        assert bench_startup.parse_importtime(output) == {
+            'metrics': 120, 'homework': 420
+        }
+
+    def test_homework_import_is_light(self):
+        elapsed, heavy = bench_startup.measure_import('homework')
+        assert heavy == [], (
+            'requests, telebot и python-dotenv должны импортироваться '
+            'при первом использовании.'
+        )
+        assert elapsed > 0
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestBootstrap:
+
+    def test_env_file_reaches_every_module(self, tmp_path):
+        dotenv = tmp_path / '.env'
+        dotenv.write_text(
+            'STATE_BACKEND=json\n'
+            f'OUTBOX_PATH={tmp_path / "outbox.db"}\n'
+            'METRICS_PORT=9999\n'
+        )
+        env = {
+            key: value for key, value in os.environ.items()
+            if key not in ('STATE_BACKEND', 'OUTBOX_PATH', 'METRICS_PORT')
+        }
+        env['DOTENV_PATH'] = str(dotenv)
+        output = subprocess.run(
+            [sys.executable, '-c', (
+                'import homework, metrics, outbox, storage; '
+                'print(storage.STATE_BACKEND, bool(outbox.OUTBOX_PATH), '
+                'metrics.METRICS_PORT)'
+            )],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+            check=True
+        ).stdout
+        assert output.split() == ['json', 'True', '9999'], (
+            'Настройки из .env должны доходить до модулей, '
+            'импортированных раньше homework.py.'
+        )
+
+    def test_modules_with_settings_import_bootstrap(self):
+        for name in sorted(os.listdir(ROOT_DIR)):
+            if not name.endswith('.py') or name == 'bootstrap.py':
+                continue
+            with open(os.path.join(ROOT_DIR, name), encoding='utf-8') as file:
+                source = file.read()
+            if 'os.getenv(' in source:
+                assert '\nimport bootstrap' in source, (
+                    f'{name} читает настройки при импорте и должен '
+                    'импортировать bootstrap.'
+                )
@@ -0,0 +1,158 @@
+import time
+
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+
+
+@pytest.fixture
+def circuit_module():
+    import circuit_breaker
+    return circuit_breaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {'value': 1000.0}
+    monkeypatch.setattr(time, 'monotonic', lambda: now['value'])
+    return now
+
+
+def unavailable(*args, **kwargs):
+    from exceptions import ApiUnavailableException
+    raise ApiUnavailableException('API недоступен')
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold(self, circuit_module, clock):
+        breaker = circuit_module.CircuitBreaker(
+            failure_threshold=2, recovery_timeout=10, jitter=0
+        )
+        for _ in range(2):
+            with pytest.raises(circuit_module.ApiUnavailableException):
+                breaker.call(unavailable)
+        assert breaker.state == circuit_module.OPEN
+        with pytest.raises(circuit_module.CircuitOpenException):
+            breaker.call(lambda: 'not called')
+
+    def test_half_open_probe(self, circuit_module, clock):
+        breaker = circuit_module.CircuitBreaker(
+            failure_threshold=1, recovery_timeout=10, jitter=0
+        )
+        with pytest.raises(circuit_module.ApiUnavailableException):
+            breaker.call(unavailable)
+        clock['value'] += 10
+        assert breaker.state == circuit_module.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow(), (
+            'В полуоткрытом состоянии должен проходить один пробный запрос.'
+        )
+        breaker.record_failure()
+        assert breaker.state == circuit_module.OPEN
+        assert breaker.seconds_until_retry() == pytest.approx(20), (
+            'После неудачной пробы пауза должна удваиваться.'
+        )
+        clock['value'] += 20
+        assert breaker.call(lambda: 'ok') == 'ok'
+        assert breaker.state == circuit_module.CLOSED
+
+    def test_cancelled_probe_frees_slot(self, circuit_module, clock):
+        import asyncio
+        breaker = circuit_module.CircuitBreaker(
+            failure_threshold=1, recovery_timeout=10, jitter=0
+        )
+        with pytest.raises(circuit_module.ApiUnavailableException):
+            breaker.call(unavailable)
+        clock['value'] += 10
+
+        async def hang():
+            await asyncio.Event().wait()
+
+        async def cancel_probe():
+            task = asyncio.create_task(breaker.call_async(hang))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_probe())
+        assert breaker.state == circuit_module.HALF_OPEN
+        assert breaker.allow(), (
+            'Отменённая проба не должна занимать место пробного запроса.'
+        )
+        breaker.release()
+
+        def interrupted():
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            breaker.call(interrupted)
+        assert breaker.call(lambda: 'ok') == 'ok'
+        assert breaker.state == circuit_module.CLOSED
+
+    def test_client_errors_do_not_open(self, circuit_module, clock):
+        from exceptions import RequestException
+
+        def unauthorized():
+            raise RequestException('401')
+
+        breaker = circuit_module.CircuitBreaker(failure_threshold=1)
+        with pytest.raises(RequestException):
+            breaker.call(unauthorized)
+        assert breaker.state == circuit_module.CLOSED
+
+    def test_poll_tenant_skips_request_when_open(
+            self, monkeypatch, circuit_module, api_breaker
+    ):
+        import tenants
+        calls = []
+
+        def mock_request_get_with_exception(*args, **kwargs):
+            calls.append(1)
+            raise requests.ConnectionError('Connection refused')
+
+        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        registry = tenants.TenantRegistry()
+        tenant = registry.add('token', 'chat')
+        bot = check_utils.MockTelegramBot()
+        for _ in range(api_breaker.failure_threshold + 3):
+            assert not tenants.poll_tenant(bot, tenant)
+        assert len(calls) == api_breaker.failure_threshold, (
+            'При разомкнутой цепи запросы к API не должны выполняться.'
+        )
+
+    def test_single_tenant_skips_request_when_open(
+            self, monkeypatch, homework_module, api_breaker
+    ):
+        calls = []
+
+        def mock_request_get_with_exception(*args, **kwargs):
+            calls.append(1)
+            raise requests.ConnectionError('Connection refused')
+
+        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        for _ in range(api_breaker.failure_threshold):
+            with pytest.raises(homework_module.ApiUnavailableException):
+                homework_module.load_homeworks(0)
+        with pytest.raises(homework_module.CircuitOpenException):
+            homework_module.load_homeworks(0)
+        assert len(calls) == api_breaker.failure_threshold, (
+            'При разомкнутой цепи main() не должен обращаться к API.'
+        )
+
+
+class TestApiUnavailable:
+
+    @pytest.mark.parametrize('status_code, unavailable', [
+        (500, True), (503, True), (401, False), (404, False),
+    ])
+    def test_http_errors(self, homework_module, status_code, unavailable):
+        response = requests.Response()
+        response.status_code = status_code
+        error = requests.HTTPError(response=response)
+        assert homework_module.is_api_unavailable(error) is unavailable
+
+    def test_connection_error(self, homework_module):
+        assert homework_module.is_api_unavailable(requests.ConnectionError())
@@ -0,0 +1,95 @@
+import pytest
+
+
+@pytest.fixture
+def delivery_module():
+    import delivery
+    return delivery
+
+
+class TestDelivery:
+
+    def test_coalesce_respects_limit(self, delivery_module):
+        items = [(index, 'x' * 40) for index in range(5)]
+        groups = delivery_module.coalesce(items, limit=100)
+        assert [len(group) for group in groups] == [2, 2, 1], (
+            'Сообщения должны склеиваться в пределах лимита длины.'
+        )
+        for group in groups:
+            assert len(delivery_module.join_messages(group, 100)) <= 100
+
+    def test_queue_waits_for_flush_interval(self, delivery_module):
+        queue = delivery_module.DeliveryQueue(flush_interval=60)
+        queue.add('chat', 'first')
+        queue.add('chat', 'second')
+        assert queue.pop_due() == []
+        batches = queue.pop_due(force=True)
+        assert len(batches) == 1
+        assert batches[0].text == 'first\n\nsecond', (
+            'Уведомления одного чата должны уходить одним сообщением.'
+        )
+        assert len(queue) == 0
+
+    def test_duplicates_are_not_queued(self, delivery_module):
+        queue = delivery_module.DeliveryQueue()
+        queue.add('chat', 'message')
+        queue.add('chat', 'message')
+        assert len(queue) == 1
+
+    def test_flush_acknowledges_and_requeues(self, delivery_module):
+        queue = delivery_module.DeliveryQueue(flush_interval=0)
+        delivered = []
+        queue.add('ok', 'one', lambda: delivered.append('one'))
+        queue.add('broken', 'two', lambda: delivered.append('two'))
+
+        sent = delivery_module.flush_queue(
+            queue, lambda chat_id, text: chat_id == 'ok'
+        )
+        assert sent == 1
+        assert delivered == ['one']
+        assert len(queue) == 1, (
+            'Неотправленные сообщения должны оставаться в очереди.'
+        )
+
+    def test_poll_tenant_uses_queue(
+            self, monkeypatch, delivery_module, data_with_new_hw_status
+    ):
+        import tenants
+        homework = dict(data_with_new_hw_status['homeworks'][0])
+        data = dict(data_with_new_hw_status)
+        data['homeworks'] = [homework, dict(homework, id=1, status='rejected')]
+        monkeypatch.setattr(tenants, 'fetch_api_answer', lambda *args: data)
+        registry = tenants.TenantRegistry()
+        tenant = registry.add('token', 'chat')
+        queue = delivery_module.DeliveryQueue(flush_interval=0)
+        sent = []
+
+        assert tenants.poll_tenant(None, tenant, queue=queue)
+        assert tenant.state.statuses == {}
+        delivery_module.flush_queue(
+            queue, lambda chat_id, text: sent.append(text) or True
+        )
+        assert len(sent) == 1
+        assert len(tenant.state.statuses) == 2, (
+            'Статусы должны запоминаться только после доставки.'
+        )
+
+    def test_cursor_waits_for_delivery(
+            self, monkeypatch, delivery_module, data_with_new_hw_status
+    ):
+        import tenants
+        data = dict(data_with_new_hw_status, current_date=1000000)
+        monkeypatch.setattr(tenants, 'fetch_api_answer', lambda *args: data)
+        registry = tenants.TenantRegistry()
+        tenant = registry.add('token', 'chat')
+        tenant.timestamp = 998000
+        queue = delivery_module.DeliveryQueue(flush_interval=0)
+
+        assert tenants.poll_tenant(None, tenant, queue=queue)
+        delivery_module.flush_queue(queue, lambda chat_id, text: False)
+        assert tenant.timestamp == 998000, (
+            'Курсор не должен сдвигаться, пока уведомление не доставлено.'
+        )
+        delivery_module.flush_queue(queue, lambda chat_id, text: True)
+        import homework
+        assert tenant.timestamp == 1000000 - homework.CURSOR_OVERLAP
@@ -0,0 +1,237 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def http_client_module():
+    import http_client
+    yield http_client
+    http_client.close_session()
+    http_client.configure_cache(ttl=0)
+
+
+class TestHttpClient:
+
+    def test_session_reuses_connection(self, local_api, http_client_module):
+        session = http_client_module.create_session(pool_maxsize=2)
+        for _ in range(3):
+            session.get(local_api).json()
+        stats = http_client_module.session_stats(session)
+        assert stats == {'requests': 3, 'connections': 1, 'reused': 2}, (
+            'Повторные запросы должны идти по одному соединению.'
+        )
+        session.close()
+
+    def test_no_session_configured(self, http_client_module):
+        assert http_client_module.get_session() is None
+        assert http_client_module.session_stats()['requests'] == 0
+
+    def test_fetch_api_answer_uses_shared_session(
+            self, monkeypatch, local_api, http_client_module, homework_module
+    ):
+        monkeypatch.setattr(homework_module, 'ENDPOINT', local_api)
+        http_client_module.configure_session()
+        for _ in range(2):
+            homework_module.get_api_answer(0)
+        assert http_client_module.session_stats()['reused'] == 1, (
+            'get_api_answer должна пользоваться общей сессией.'
+        )
+
+    def test_hung_connection_times_out(self, monkeypatch, homework_module):
+        import time
+
+        from exceptions import ApiUnavailableException
+        # Сервер принимает соединение, но никогда не отвечает.
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        monkeypatch.setattr(
+            homework_module, 'ENDPOINT',
+            f'http://127.0.0.1:{server.getsockname()[1]}/'
+        )
+        monkeypatch.setattr(homework_module, 'API_READ_TIMEOUT', 0.2)
+        started = time.monotonic()
+        try:
+            with pytest.raises(ApiUnavailableException):
+                homework_module.get_api_answer(0)
+        finally:
+            server.close()
+        assert time.monotonic() - started < 2
+
+
+    @pytest.mark.parametrize('stream', [False, True])
+    def test_dripping_body_hits_total_deadline(
+            self, monkeypatch, homework_module, stream
+    ):
+        import time
+
+        from exceptions import ApiUnavailableException
+
+        class DrippingHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                try:
+                    self.wfile.write(b'{"homeworks": [')
+                    for _ in range(100):
+                        self.wfile.write(b' ')
+                        self.wfile.flush()
+                        time.sleep(0.05)
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), DrippingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        monkeypatch.setattr(
+            homework_module, 'ENDPOINT',
+            f'http://127.0.0.1:{server.server_address[1]}/'
+        )
+        monkeypatch.setattr(homework_module, 'API_TOTAL_TIMEOUT', 0.3)
+        started = time.monotonic()
+        try:
+            with pytest.raises(ApiUnavailableException):
+                answer = homework_module.fetch_api_answer({}, 0, stream)
+                list(answer)
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert time.monotonic() - started < 2, (
+            'Сервер, отдающий ответ по байту, не должен задерживать '
+            'запрос дольше API_TOTAL_TIMEOUT.'
+        )
+
+    def test_watchdog_uses_one_thread(self, http_client_module):
+        import time
+        from functools import partial
+
+        watchdog = http_client_module.Watchdog()
+        fired = []
+        before = threading.active_count()
+        entries = [
+            watchdog.watch(time.monotonic() + 0.05, partial(fired.append, i))
+            for i in range(100)
+        ]
+        for entry in entries[::2]:
+            watchdog.cancel(entry)
+        assert threading.active_count() == before + 1, (
+            'Сроки всех запросов должен отслеживать один поток.'
+        )
+        started = time.monotonic()
+        while len(fired) < 50 and time.monotonic() - started < 1:
+            time.sleep(0.01)
+        assert sorted(fired) == list(range(1, 100, 2)), (
+            'Отменённые сроки не должны срабатывать.'
+        )
+        assert len(watchdog) == 0
+
+
+class MockCachedResponse:
+    def __init__(self, status_code=200, content=b'{"homeworks": []}',
+                 headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.json_calls = 0
+
+    def json(self):
+        self.json_calls += 1
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        pass
+
+
+class TestResponseCache:
+
+    def test_same_body_skips_json(self, http_client_module):
+        cache = http_client_module.ResponseCache(ttl=60)
+        key = cache.make_key({'Authorization': 'OAuth token'})
+        first = cache.resolve(key, MockCachedResponse())
+        repeated = MockCachedResponse()
+        assert cache.resolve(key, repeated) is first
+        assert repeated.json_calls == 0, (
+            'Неизменённый ответ не должен разбираться повторно.'
+        )
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_revalidation_with_etag(self, http_client_module):
+        cache = http_client_module.ResponseCache(ttl=60)
+        key = cache.make_key({'Authorization': 'OAuth token'})
+        assert cache.conditional_headers(key) == {}
+        data = cache.resolve(
+            key, MockCachedResponse(headers={'ETag': '"v1"'})
+        )
+        assert cache.conditional_headers(key) == {'If-None-Match': '"v1"'}
+        assert cache.resolve(
+            key, MockCachedResponse(status_code=304, content=b'')
+        ) is data
+        assert cache.stats()['revalidated'] == 1
+
+    def test_moving_cursor_revalidates(
+            self, monkeypatch, homework_module, http_client_module
+    ):
+        sent = []
+
+        class Session:
+            def get(self, url, headers=None, params=None, **kwargs):
+                sent.append(headers.get('If-None-Match'))
+                if len(sent) == 1:
+                    return MockCachedResponse(headers={'ETag': '"v1"'})
+                return MockCachedResponse(status_code=304, content=b'')
+
+        monkeypatch.setattr(http_client_module, 'get_session', Session)
+        http_client_module.configure_cache(ttl=60)
+        try:
+            headers = {'Authorization': 'OAuth token'}
+            first = homework_module.fetch_api_answer(headers, 1000)
+            assert homework_module.fetch_api_answer(headers, 2000) is first
+        finally:
+            http_client_module.configure_cache(ttl=0)
+        assert sent == [None, '"v1"'], (
+            'Сдвиг курсора не должен сбрасывать условный запрос.'
+        )
+
+    def test_expired_entry_is_dropped(self, http_client_module):
+        cache = http_client_module.ResponseCache(ttl=-1)
+        key = cache.make_key({'Authorization': 'OAuth token'})
+        cache.resolve(key, MockCachedResponse(headers={'ETag': '"v1"'}))
+        assert cache.conditional_headers(key) == {}
+        assert cache.stats()['size'] == 0
+
+    def test_configure_cache_disabled_by_default(self, http_client_module):
+        assert http_client_module.configure_cache(ttl=0) is None
+        assert http_client_module.get_cache() is None
@@ -0,0 +1,155 @@
+import io
+import json
+import logging
+import multiprocessing
+
+import pytest
+import requests
+
+
+@pytest.fixture
+def logconfig_module():
+    import logconfig
+    return logconfig
+
+
+def make_logger(logconfig_module, stream, **kwargs):
+    logger = logging.getLogger('homework.test_logconfig')
+    logger.handlers = []
+    logger.propagate = False
+    handler = logconfig_module.create_handler(stream, **kwargs)
+    logconfig_module.start_listener(handler)
+    logger.addHandler(handler)
+    return logger, handler
+
+
+class TestLogConfig:
+
+    def test_redact(self, logconfig_module):
+        logconfig_module.register_secret('s3cr3t-value')
+        text = logconfig_module.redact(
+            "headers: {'Authorization': 'OAuth y0_AgAAAA'} "
+            'url: https://api.telegram.org/bot123456:ABCdef/sendMessage '
+            'token 1234567890:AAHdqTcvCH1vGWJxfSeofSAs0K5PALDsaw '
+            'other s3cr3t-value'
+        )
+        assert 'y0_AgAAAA' not in text
+        assert '123456:ABCdef' not in text
+        assert 'AAHdqTcvCH1vGWJxfSeofSAs0K5PALDsaw' not in text
+        assert 's3cr3t-value' not in text
+        assert text.count(logconfig_module.REDACTED) == 4
+
+    def test_redact_does_not_depend_on_secret_count(
+            self, monkeypatch, logconfig_module
+    ):
+        import time
+        monkeypatch.setattr(logconfig_module, '_secrets', set())
+        for index in range(10000):
+            logconfig_module.register_secret(f'tenant-token-{index:05d}')
+        text = 'Ошибка опроса для чата 42: tenant-token-09999 отклонён'
+        started = time.monotonic()
+        for _ in range(1000):
+            redacted = logconfig_module.redact(text)
+        assert time.monotonic() - started < 0.5, (
+            'Редактирование не должно замедляться с ростом числа токенов.'
+        )
+        assert redacted == (
+            'Ошибка опроса для чата 42: *** отклонён'
+        )
+
+    def test_json_lines_through_queue(self, logconfig_module):
+        stream = io.StringIO()
+        logger, handler = make_logger(
+            logconfig_module, stream, log_format='json', use_queue=True
+        )
+        try:
+            raise KeyError('OAuth hidden-token')
+        except KeyError as error:
+            logger.error(
+                'Ошибка %s', 'OAuth hidden-token', exc_info=True,
+                extra=logconfig_module.log_fields(
+                    homework='7', latency=0.25, error=error
+                )
+            )
+        logconfig_module.stop_listener(handler.listener)
+        [line] = stream.getvalue().splitlines()
+        entry = json.loads(line)
+        assert entry['message'] == 'Ошибка OAuth ***'
+        assert entry['level'] == 'ERROR'
+        assert entry['homework'] == '7' and entry['latency'] == 0.25
+        assert entry['exception'] == 'KeyError'
+        assert 'hidden-token' not in line, (
+            'Секреты не должны попадать в логи, в том числе в трассировку.'
+        )
+
+    def test_queue_does_not_block_caller(self, logconfig_module):
+        class SlowStream(io.StringIO):
+            def write(self, text):
+                import time
+                time.sleep(0.2)
+                return super().write(text)
+
+        import time
+        stream = SlowStream()
+        logger, handler = make_logger(
+            logconfig_module, stream, log_format='text', use_queue=True
+        )
+        started = time.monotonic()
+        for _ in range(5):
+            logger.warning('Сообщение')
+        assert time.monotonic() - started < 0.2, (
+            'Запись в лог не должна ждать вывода.'
+        )
+        logconfig_module.stop_listener(handler.listener)
+        assert stream.getvalue().count('Сообщение') == 5
+
+    def test_listener_restarts_after_fork(self, tmp_path, logconfig_module):
+        path = tmp_path / 'log.txt'
+        with open(path, 'w') as stream:
+            logger, handler = make_logger(
+                logconfig_module, stream, log_format='text', use_queue=True
+            )
+
+            def worker():
+                logger.warning('Из воркера')
+                logconfig_module.stop_listener(
+                    logconfig_module.start_listener(handler)
+                )
+
+            process = multiprocessing.get_context('fork').Process(
+                target=worker
+            )
+            process.start()
+            process.join()
+            logconfig_module.stop_listener(handler.listener)
+        assert 'Из воркера' in path.read_text(), (
+            'Процесс воркера должен писать логи своим потоком.'
+        )
+
+    def test_api_error_hides_headers(self, monkeypatch, homework_module):
+        from exceptions import RequestException
+
+        def failing_get(*args, **kwargs):
+            raise requests.RequestException('Something wrong')
+
+        monkeypatch.setattr(requests, 'get', failing_get)
+        with pytest.raises(RequestException) as error:
+            homework_module.fetch_api_answer(
+                {'Authorization': 'OAuth secret-token'}, 0
+            )
+        assert 'secret-token' not in str(error.value)
+
+    def test_sent_message_body_not_logged(
+            self, caplog, homework_module
+    ):
+        import tests.check_utils as check_utils
+        with caplog.at_level(logging.DEBUG):
+            homework_module.send_message_to(
+                check_utils.MockTelegramBot(), 42, 'Тело сообщения'
+            )
+        [record] = [
+            record for record in caplog.records
+            if record.levelno == logging.DEBUG
+        ]
+        assert 'Тело сообщения' not in record.getMessage()
+        assert record.chat_id == 42 and record.latency is not None
@@ -0,0 +1,102 @@
+import socket
+import urllib.request
+
+import pytest
+import requests
+
+from tests.test_http_client import local_api  # noqa: F401
+
+
+@pytest.fixture
+def metrics_module():
+    import metrics
+    return metrics
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestMetrics:
+
+    def test_histogram_exposition(self, metrics_module):
+        histogram = metrics_module.Histogram(
+            'latency_seconds', 'Задержка.', buckets=(0.1, 1), registry=None
+        )
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        assert histogram.render().splitlines()[2:] == [
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            'latency_seconds_sum 5.55',
+            'latency_seconds_count 3',
+        ]
+
+    def test_counter_labels(self, metrics_module):
+        counter = metrics_module.Counter(
+            'errors_total', 'Ошибки.', ('exception',), registry=None
+        )
+        counter.inc(exception='KeyError')
+        counter.inc(2, exception='KeyError')
+        assert 'errors_total{exception="KeyError"} 3' in counter.render()
+        with pytest.raises(ValueError):
+            counter.inc(-1, exception='KeyError')
+        with pytest.raises(ValueError):
+            counter.inc(kind='KeyError')
+
+    def test_custom_exceptions_are_exposed(self, metrics_module):
+        import exceptions
+        text = metrics_module.REGISTRY.render()
+        for name in (
+            'AbsenceVariableException', 'RequestException',
+            'RequestNoContentException', 'UnexpectedHomeworkStatusException',
+            'ApiUnavailableException', 'CircuitOpenException',
+        ):
+            assert hasattr(exceptions, name)
+            assert f'homework_exceptions_total{{exception="{name}"}}' in text
+
+    def test_fetch_api_answer_is_instrumented(
+            self, monkeypatch, metrics_module, homework_module,
+            local_api  # noqa: F811
+    ):
+        monkeypatch.setattr(homework_module, 'ENDPOINT', local_api)
+        before = metrics_module.API_LATENCY.count()
+        homework_module.fetch_api_answer({}, 0)
+        assert metrics_module.API_LATENCY.count() == before + 1
+        assert metrics_module.LAST_SUCCESS.get(operation='get_api_answer') > 0
+
+    def test_poll_errors_are_counted(self, monkeypatch, metrics_module):
+        import tenants
+
+        def mock_request_get_with_exception(*args, **kwargs):
+            raise requests.ConnectionError('Connection refused')
+
+        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        registry = tenants.TenantRegistry()
+        tenant = registry.add('token', 'chat')
+        before = metrics_module.EXCEPTIONS.get(
+            exception='ApiUnavailableException'
+        )
+        assert not tenants.poll_tenant(None, tenant)
+        assert metrics_module.EXCEPTIONS.get(
+            exception='ApiUnavailableException'
+        ) == before + 1
+
+    def test_http_endpoint(self, metrics_module):
+        server = metrics_module.start_http_server(free_port())
+        try:
+            url = f'http://127.0.0.1:{server.server_port}/metrics'
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+                content_type = response.headers['Content-Type']
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert content_type.startswith('text/plain; version=0.0.4')
+        assert '# TYPE homework_api_request_seconds histogram' in body
+        assert '# TYPE homework_poll_lag_seconds histogram' in body
+        assert metrics_module.start_http_server(0) is None
@@ -0,0 +1,159 @@
+import pytest
+
+
+@pytest.fixture
+def outbox_module():
+    import outbox
+    return outbox
+
+
+@pytest.fixture
+def outbox(tmp_path, outbox_module):
+    outbox = outbox_module.Outbox(
+        str(tmp_path / 'outbox.db'), lock_ttl=10, max_attempts=2
+    )
+    yield outbox
+    outbox.close()
+
+
+class FlakyBot:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        from telebot.apihelper import ApiException
+        if self.failures:
+            self.failures -= 1
+            raise ApiException('Telegram недоступен', 'sendMessage', None)
+        self.sent.append((chat_id, text))
+
+
+class TestOutbox:
+
+    def test_idempotency_key(self, outbox, outbox_module):
+        key = outbox_module.notification_key('chat', '1', 'approved', 'today')
+        assert outbox.add('chat', 'text', key)
+        assert not outbox.add('chat', 'text', key), (
+            'Уведомление с тем же ключом не должно добавляться повторно.'
+        )
+        [message] = outbox.claim(10, now=100)
+        outbox.mark_sent(message.id)
+        assert not outbox.add('chat', 'text', key)
+        assert len(outbox) == 0
+
+    def test_claim_keeps_chat_order(self, outbox):
+        for index in range(3):
+            outbox.add('a', f'a{index}', f'a{index}')
+        outbox.add('b', 'b0', 'b0')
+        first = outbox.claim(1, now=100)
+        assert [message.text for message in first] == ['a0']
+        assert [message.text for message in outbox.claim(10, now=101)] == [
+            'b0'
+        ], 'Пока a0 не отправлено, следующие сообщения чата ждут.'
+        outbox.mark_sent(first[0].id)
+        assert [message.text for message in outbox.claim(10, now=102)] == [
+            'a1', 'a2'
+        ]
+
+    def test_unsent_message_is_claimed_again(self, outbox):
+        outbox.add('chat', 'text', 'key')
+        assert len(outbox.claim(10, now=100)) == 1
+        assert outbox.claim(10, now=105) == [], (
+            'Закреплённое уведомление не выдаётся другому процессу.'
+        )
+        assert len(outbox.claim(10, now=111)) == 1
+        assert outbox.claim(10, now=122) == [], (
+            'После max_attempts попыток уведомление больше не выдаётся.'
+        )
+        assert len(outbox) == 0
+
+    def test_worker_retries_until_sent(self, outbox, outbox_module):
+        from sender import RateLimitedSender
+        bot = FlakyBot(failures=1)
+        worker = outbox_module.OutboxWorker(
+            outbox, RateLimitedSender(bot, global_rate=100, chat_rate=100)
+        )
+        outbox.add('chat', 'text', 'key')
+        assert worker.deliver_pending() == 0
+        assert len(outbox) == 1
+        worker.sender.drain(now=float('inf'))
+        assert bot.sent == [('chat', 'text')]
+        assert len(outbox) == 0
+
+    def test_enqueue_notifications(
+            self, outbox, homework_module, data_with_new_hw_status
+    ):
+        from storage import TenantState
+        homeworks = data_with_new_hw_status['homeworks']
+        notifications = homework_module.collect_notifications({}, homeworks)
+        state = TenantState()
+        for _ in range(2):
+            homework_module.enqueue_notifications(outbox, state, notifications)
+        assert len(outbox) == len(homeworks), (
+            'Повторные уведомления о том же статусе не дублируются.'
+        )
+        assert homework_module.collect_notifications(
+            state.statuses, homeworks
+        ) == [], 'Статус запоминается, как только уведомление записано.'
+
+    def test_worker_thread_delivers(self, outbox, outbox_module):
+        import time
+
+        from sender import RateLimitedSender
+        bot = FlakyBot()
+        worker = outbox_module.OutboxWorker(
+            outbox, RateLimitedSender(bot), interval=0.01
+        ).start()
+        try:
+            outbox.add('chat', 'text', 'key')
+            started = time.monotonic()
+            while len(outbox) and time.monotonic() - started < 1:
+                time.sleep(0.01)
+        finally:
+            worker.stop()
+        assert bot.sent == [('chat', 'text')], (
+            'Поток доставки в процессе опроса должен отправлять уведомления.'
+        )
+
+    def test_poll_tenant_writes_to_outbox(
+            self, monkeypatch, outbox, data_with_new_hw_status
+    ):
+        import tenants
+        data = dict(data_with_new_hw_status, current_date=1000000)
+        monkeypatch.setattr(tenants, 'fetch_api_answer', lambda *args: data)
+        tenant = tenants.TenantRegistry().add('token', 'chat')
+        assert tenants.poll_tenant(None, tenant, outbox=outbox)
+        assert tenants.poll_tenant(None, tenant, outbox=outbox)
+        assert len(outbox) == len(data['homeworks'])
+        assert tenant.timestamp > 999000, (
+            'Записанное в outbox уведомление считается доставленным.'
+        )
+
+        bot = FlakyBot()
+        assert tenants.poll_once(
+            bot, [tenant], outbox=outbox
+        ) == tenants.EXIT_OK
+        assert [chat_id for chat_id, _ in bot.sent] == ['chat'] * len(
+            data['homeworks']
+        ), 'Разовый запуск должен доставить уведомления из outbox.'
+
+    def test_run_once_flushes_when_api_fails(
+            self, monkeypatch, outbox, homework_module
+    ):
+        import requests
+        import telebot
+        bot = FlakyBot()
+
+        def unavailable(*args, **kwargs):
+            raise requests.ConnectionError('API недоступен')
+
+        monkeypatch.setattr(requests, 'get', unavailable)
+        monkeypatch.setattr(telebot, 'TeleBot', lambda *args, **kwargs: bot)
+        monkeypatch.setattr(homework_module, 'open_outbox', lambda: outbox)
+        monkeypatch.setattr(outbox, 'close', lambda: None)
+        outbox.add('chat', 'text', 'key')
+        assert homework_module.run_once() == homework_module.EXIT_FAILURE
+        assert bot.sent == [('chat', 'text')], (
+            'Уведомления из outbox доставляются, даже если опрос не удался.'
+        )
@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.fixture
+def scheduling_module():
+    import scheduling
+    return scheduling
+
+
+class TestAdaptiveInterval:
+
+    def test_fixed_period_by_default(self, scheduling_module):
+        interval = scheduling_module.AdaptiveInterval(600, adaptive=False)
+        for succeeded, reviewing in [(True, True), (False, False)]:
+            assert interval.next_delay(succeeded, reviewing) == 600, (
+                'Без адаптивного режима период опроса не должен меняться.'
+            )
+
+    def test_reviewing_is_polled_more_often(self, scheduling_module):
+        interval = scheduling_module.AdaptiveInterval(
+            600, reviewing_period=120, jitter=0, adaptive=True
+        )
+        assert interval.next_delay(True, True) == 120
+
+    def test_idle_and_failures_back_off(self, scheduling_module):
+        interval = scheduling_module.AdaptiveInterval(
+            600, max_period=3000, jitter=0, adaptive=True
+        )
+        idle = [interval.next_delay(True, False) for _ in range(5)]
+        assert idle == [600, 1200, 2400, 3000, 3000], (
+            'Без проверяемых работ интервал должен расти до максимума.'
+        )
+        failed = [interval.next_delay(False, False) for _ in range(3)]
+        assert failed == [600, 1200, 2400]
+        assert interval.next_delay(True, True) == 120
+
+    def test_jitter_bounds(self, scheduling_module):
+        interval = scheduling_module.AdaptiveInterval(
+            600, reviewing_period=100, jitter=0.1, adaptive=True
+        )
+        delays = {interval.next_delay(True, True) for _ in range(50)}
+        assert all(90 <= delay <= 110 for delay in delays)
+        assert len(delays) > 1, 'Интервалы студентов должны различаться.'
+
+    def test_has_pending_review(self, scheduling_module):
+        assert scheduling_module.has_pending_review(
+            {'1': ('approved', None), '2': ('reviewing', None)}
+        )
+        assert not scheduling_module.has_pending_review(
+            {'1': ('approved', None)}
+        )
@@ -0,0 +1,97 @@
+import pytest
+import telebot
+
+
+@pytest.fixture
+def sender_module():
+    import sender
+    return sender
+
+
+class RecordingBot:
+    def __init__(self, failures=()):
+        self.sent = []
+        self.failures = list(failures)
+
+    def send_message(self, chat_id, text, **kwargs):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((chat_id, text))
+
+
+def too_many_requests(retry_after=3):
+    return telebot.apihelper.ApiTelegramException(
+        'send_message', None, {
+            'error_code': 429,
+            'description': 'Too Many Requests',
+            'parameters': {'retry_after': retry_after},
+        }
+    )
+
+
+class TestTokenBucket:
+
+    def test_bucket_limits_rate(self, sender_module):
+        bucket = sender_module.TokenBucket(rate=2, now=0)
+        assert bucket.try_acquire(0)
+        assert bucket.try_acquire(0)
+        assert not bucket.try_acquire(0)
+        assert bucket.wait_time(0) == pytest.approx(0.5)
+        assert bucket.try_acquire(0.5)
+
+    def test_block(self, sender_module):
+        bucket = sender_module.TokenBucket(rate=10, now=0)
+        bucket.block(5)
+        assert not bucket.try_acquire(4)
+        assert bucket.try_acquire(5)
+
+
+class TestRateLimitedSender:
+
+    def test_respects_chat_and_global_limits(self, sender_module):
+        bot = RecordingBot()
+        sender = sender_module.RateLimitedSender(
+            bot, global_rate=2, chat_rate=1
+        )
+        for chat_id, text in [('a', '1'), ('a', '2'), ('b', '3'), ('c', '4')]:
+            assert sender.submit(chat_id, text)
+        now = sender.global_bucket.updated
+        assert sender.drain(now) == 2
+        assert bot.sent == [('a', '1'), ('b', '3')], (
+            'В один чат нельзя отправлять чаще лимита Telegram.'
+        )
+        assert sender.drain(now + 1) == 2
+        assert bot.sent[2:] == [('a', '2'), ('c', '4')]
+
+    def test_retry_after_is_respected(self, sender_module):
+        bot = RecordingBot(failures=[too_many_requests(retry_after=3)])
+        delivered = []
+        sender = sender_module.RateLimitedSender(bot)
+        sender.submit('chat', 'text', lambda: delivered.append(True))
+        now = sender.global_bucket.updated
+
+        assert sender.drain(now) == 0
+        assert len(sender) == 1, 'После 429 сообщение не должно теряться.'
+        assert sender.seconds_until_ready(now) == pytest.approx(3)
+        assert sender.drain(now + 1) == 0
+        assert sender.drain(now + 3) == 1
+        assert delivered == [True]
+
+    def test_backpressure(self, sender_module):
+        sender = sender_module.RateLimitedSender(RecordingBot(), maxsize=1)
+        assert sender.submit('chat', 'one')
+        assert not sender.submit('chat', 'two'), (
+            'Переполненная очередь должна отказывать в приёме сообщений.'
+        )
+
+    def test_gives_up_after_max_attempts(self, sender_module):
+        error = telebot.apihelper.ApiException('boom', 'send_message', None)
+        bot = RecordingBot(failures=[error, error])
+        sender = sender_module.RateLimitedSender(bot, max_attempts=2)
+        sender.submit('chat', 'text')
+        now = sender.global_bucket.updated
+        sender.drain(now)
+        assert len(sender) == 1
+        sender.drain(now + 10)
+        assert len(sender) == 0
+        assert bot.sent == []
@@ -0,0 +1,128 @@
+import copy
+from collections import Counter
+
+import pytest
+
+
+@pytest.fixture
+def sharding_module():
+    import sharding
+    return sharding
+
+
+class TestSharding:
+
+    def test_ring_moves_only_keys_of_new_node(self, sharding_module):
+        keys = [f'tenant{index}' for index in range(3000)]
+        before = sharding_module.HashRing(['a', 'b', 'c'])
+        after = sharding_module.HashRing(['a', 'b', 'c', 'd'])
+        owners = Counter(before.node_for(key) for key in keys)
+        assert min(owners.values()) > len(keys) / 3 * 0.7, (
+            'Студенты должны делиться между воркерами примерно поровну.'
+        )
+        moved = [
+            key for key in keys if before.node_for(key) != after.node_for(key)
+        ]
+        assert {after.node_for(key) for key in moved} == {'d'}, (
+            'При добавлении воркера студенты переезжают только к нему.'
+        )
+        assert len(moved) < len(keys) / 4 * 1.3
+
+    def test_lease_is_exclusive(self, tmp_path, sharding_module):
+        path = str(tmp_path / 'shards.sqlite3')
+        first = sharding_module.ShardLease(path, 'first', lease_ttl=10)
+        second = sharding_module.ShardLease(path, 'second', lease_ttl=10)
+        assert first.acquire('tenant', now=100)
+        assert first.acquire('tenant', now=105), 'Аренда продлевается.'
+        assert not second.acquire('tenant', now=110)
+        assert second.acquire('tenant', now=116), (
+            'Истёкшая аренда переходит к другому воркеру.'
+        )
+        second.release(['tenant'])
+        assert first.acquire('tenant', now=117)
+        first.close()
+        second.close()
+
+    def test_workers_split_tenants_and_rebalance(
+            self, tmp_path, monkeypatch, sharding_module,
+            data_with_new_hw_status, recording_bot, make_registry
+    ):
+        import tenants
+        monkeypatch.setattr(
+            tenants, 'fetch_api_answer',
+            lambda *args: copy.deepcopy(data_with_new_hw_status)
+        )
+        path = str(tmp_path / 'shards.sqlite3')
+        leases = [
+            sharding_module.ShardLease(path, name) for name in ('a', 'b')
+        ]
+        registries = [make_registry(20), make_registry(20)]
+        schedulers = [
+            sharding_module.ShardScheduler(registry, lease, period=100)
+            for registry, lease in zip(registries, leases)
+        ]
+        schedulers[0].rebalance()
+        bots = [recording_bot(), recording_bot()]
+        for scheduler, registry, bot in zip(schedulers, registries, bots):
+            scheduler.poll(bot, list(registry))
+
+        assert bots[0].sent and bots[1].sent
+        assert sorted(bots[0].sent + bots[1].sent) == list(range(20)), (
+            'Каждого студента опрашивает ровно один воркер.'
+        )
+
+        leases[1].close()
+        schedulers[0].rebalance()
+        bots[0].sent.clear()
+        schedulers[0].poll(bots[0], list(registries[0]))
+        assert sorted(bots[0].sent) == sorted(bots[1].sent), (
+            'Студенты выбывшего воркера переходят к оставшимся.'
+        )
+        leases[0].close()
+
+    @pytest.mark.parametrize('processes', [1, 2])
+    def test_sigterm_releases_leases(
+            self, tmp_path, monkeypatch, sharding_module, processes
+    ):
+        import multiprocessing
+        import sqlite3
+        import time
+        path = str(tmp_path / 'shards.sqlite3')
+
+        def run_shard(worker_id):
+            lease = sharding_module.ShardLease(path, worker_id, lease_ttl=600)
+            lease.acquire(worker_id)
+            try:
+                time.sleep(60)
+            finally:
+                lease.close()
+
+        def leases():
+            connection = sqlite3.connect(path)
+            try:
+                return connection.execute(
+                    'SELECT COUNT(*) FROM leases'
+                ).fetchone()[0]
+            except sqlite3.OperationalError:
+                return 0
+            finally:
+                connection.close()
+
+        monkeypatch.setattr(sharding_module, 'run_shard', run_shard)
+        monkeypatch.setattr(sharding_module, 'SHARD_PROCESSES', processes)
+        monkeypatch.setattr(
+            sharding_module.metrics, 'start_http_server', lambda: None
+        )
+        process = multiprocessing.get_context('fork').Process(
+            target=sharding_module.main
+        )
+        process.start()
+        started = time.monotonic()
+        while leases() < processes and time.monotonic() - started < 1:
+            time.sleep(0.01)
+        process.terminate()
+        process.join(1)
+        assert not process.is_alive()
+        assert leases() == 0, (
+            'По SIGTERM воркер должен сразу отпустить аренду студентов.'
+        )
@@ -0,0 +1,137 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def storage_module():
+    import storage
+    return storage
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def backend(request):
+    return request.param
+
+
+class TestStorage:
+
+    def test_state_survives_reopen(self, tmp_path, storage_module, backend):
+        path = str(tmp_path / f'state.{backend}')
+        store = storage_module.open_state_store(backend, path)
+        state = storage_module.TenantState(1000198000)
+        state.remember('777', 'approved', '2021-04-11T10:31:09Z')
+        store.save('tenant', state)
+        store.close()
+
+        store = storage_module.open_state_store(backend, path)
+        restored = store.load('tenant')
+        store.close()
+        assert restored.current_date == 1000198000, (
+            'После перезапуска опрос должен продолжаться с сохранённой даты.'
+        )
+        assert restored.statuses == {
+            '777': ('approved', '2021-04-11T10:31:09Z')
+        }, 'После перезапуска не должно повторяться уведомление о статусе.'
+
+    def test_unknown_tenant_has_empty_state(
+            self, tmp_path, storage_module, backend
+    ):
+        store = storage_module.open_state_store(
+            backend, str(tmp_path / f'state.{backend}')
+        )
+        state = store.load('unknown')
+        store.close()
+        assert state.current_date is None
+        assert state.statuses == {}
+
+    def test_json_store_leaves_no_temp_files(self, tmp_path, storage_module):
+        store = storage_module.JSONStateStore(str(tmp_path / 'state.json'))
+        for current_date in range(3):
+            store.save('tenant', storage_module.TenantState(current_date))
+        assert os.listdir(tmp_path) == ['state.json'], (
+            'Запись состояния должна быть атомарной, без временных файлов.'
+        )
+
+    def test_memory_store_by_default(self, storage_module):
+        store = storage_module.open_state_store(None, None)
+        assert isinstance(store, storage_module.MemoryStateStore)
+
+    def test_invalid_backend(self, storage_module):
+        with pytest.raises(storage_module.InvalidStateBackendException):
+            storage_module.open_state_store('redis', 'state.db')
+
+    def test_state_key_hides_token(self, storage_module):
+        assert 'sometoken' not in storage_module.state_key('sometoken')
+
+    def test_restore_tenants(self, storage_module):
+        import tenants
+        store = storage_module.MemoryStateStore()
+        registry = tenants.TenantRegistry()
+        tenant = registry.add('token', 'chat')
+        store.save(tenant.key, storage_module.TenantState(42))
+        tenants.restore_tenants(registry, store)
+        assert tenant.timestamp == 42
+
+    def test_run_once_resumes_from_saved_state(
+            self, tmp_path, monkeypatch, storage_module, homework_module,
+            data_with_new_hw_status
+    ):
+        import requests
+        import telebot
+
+        import tests.check_utils as check_utils
+
+        class RecordingBot:
+            sent = []
+
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                self.sent.append((chat_id, text))
+
+        def mocked_get(*args, **kwargs):
+            return check_utils.MockResponseGET(
+                *args, data=data_with_new_hw_status, **kwargs
+            )
+
+        path = str(tmp_path / 'state.json')
+        monkeypatch.setattr(requests, 'get', mocked_get)
+        monkeypatch.setattr(telebot, 'TeleBot', RecordingBot)
+        monkeypatch.setattr(
+            homework_module, 'open_state_store',
+            lambda: storage_module.open_state_store('json', path)
+        )
+        assert homework_module.run_once() == homework_module.EXIT_OK
+        assert homework_module.run_once() == homework_module.EXIT_OK
+        assert len(RecordingBot.sent) == 1, (
+            'Повторный запуск --once не должен повторять уведомление.'
+        )
+        store = storage_module.open_state_store('json', path)
+        assert store.load(
+            storage_module.state_key(homework_module.PRACTICUM_TOKEN)
+        ).current_date is not None
+        store.close()
+
+    @pytest.mark.parametrize('module_name', ['homework', 'tenants'])
+    @pytest.mark.parametrize('backend, path', [
+        ('redis', 'state'),
+        ('sqlite', os.path.join('missing', 'state.db')),
+    ])
+    def test_run_once_reports_bad_backend_as_config_error(
+            self, tmp_path, monkeypatch, storage_module, homework_module,
+            module_name, backend, path
+    ):
+        import importlib
+        module = importlib.import_module(module_name)
+        monkeypatch.setattr(
+            homework_module, 'open_state_store',
+            lambda: storage_module.open_state_store(
+                backend, str(tmp_path / path)
+            )
+        )
+        assert module.run_once() == homework_module.EXIT_CONFIG, (
+            'Неверное хранилище состояния - ошибка настройки, '
+            'а не сбой программы.'
+        )
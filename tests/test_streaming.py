@@ -0,0 +1,114 @@
+import json
+import tracemalloc
+
+import pytest
+
+from tests.test_http_client import local_api  # noqa: F401
+
+
+@pytest.fixture
+def streaming_module():
+    import streaming
+    return streaming
+
+
+def make_homework(index):
+    return {
+        'id': index,
+        'homework_name': f'Домашка №{index}.zip',
+        'status': 'approved',
+        'reviewer_comment': 'Принято!',
+        'date_updated': '2021-04-11T10:31:09Z',
+    }
+
+
+def chunked(payload, size):
+    data = payload.encode()
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def generate_chunks(count):
+    yield b'{"current_date": 1700000000, "homeworks": ['
+    for index in range(count):
+        separator = b',' if index else b''
+        yield separator + json.dumps(make_homework(index)).encode()
+    yield b']}'
+
+
+def stream(streaming_module, chunks, required_keys=('homeworks',)):
+    return streaming_module.StreamedAnswer(chunks, required_keys)
+
+
+class TestStreaming:
+
+    @pytest.mark.parametrize('size', [1, 7, 64, 4096])
+    def test_matches_json_loads(self, streaming_module, size):
+        payload = json.dumps({
+            'homeworks': [make_homework(index) for index in range(5)],
+            'current_date': 1700000000,
+        }, ensure_ascii=False, indent=1)
+        answer = stream(
+            streaming_module, chunked(payload, size),
+            ('homeworks', 'current_date')
+        )
+        assert list(answer) == json.loads(payload)['homeworks'], (
+            'Потоковый разбор должен давать те же работы, что и json.loads.'
+        )
+        assert answer.fields == {'current_date': 1700000000}
+
+    def test_homeworks_are_yielded_before_response_ends(
+            self, streaming_module
+    ):
+        def chunks():
+            yield b'{"homeworks": [{"id": 1},'
+            raise AssertionError('Ответ прочитан раньше, чем нужно.')
+
+        assert next(iter(stream(streaming_module, chunks()))) == {'id': 1}
+
+    @pytest.mark.parametrize('payload, exception', [
+        ('[]', TypeError),
+        ('{"homeworks": {}, "current_date": 1}', TypeError),
+        ('{"homeworks": [1], "current_date": 1}', TypeError),
+        ('{"homeworks": []}', KeyError),
+        ('{"current_date": 1}', KeyError),
+        ('{"homeworks": [{"id": 1}', ValueError),
+        ('{"homeworks": [], "current_date": 1} {}', ValueError),
+    ])
+    def test_invalid_responses(self, streaming_module, payload, exception):
+        answer = stream(
+            streaming_module, chunked(payload, 3),
+            ('homeworks', 'current_date')
+        )
+        with pytest.raises(exception):
+            list(answer)
+
+    def test_connection_is_closed(self, streaming_module):
+        closed = []
+        answer = streaming_module.StreamedAnswer(
+            generate_chunks(3), close=lambda: closed.append(True)
+        )
+        assert len(list(answer)) == 3
+        assert closed == [True]
+
+    def test_memory_is_flat(self, streaming_module):
+        def peak(count):
+            tracemalloc.start()
+            for _ in stream(streaming_module, generate_chunks(count)):
+                pass
+            result = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result
+
+        small, large = peak(100), peak(5000)
+        assert large < small * 2, (
+            'Пик памяти не должен расти вместе с размером ответа.'
+        )
+
+    def test_fetch_api_answer_stream(
+            self, monkeypatch, homework_module,
+            local_api  # noqa: F811
+    ):
+        monkeypatch.setattr(homework_module, 'ENDPOINT', local_api)
+        answer = homework_module.stream_api_answer({}, 0)
+        assert list(answer) == []
+        assert answer.fields == {'current_date': 1}
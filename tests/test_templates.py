@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def templates_module():
+    import templates
+    return templates
+
+
+@pytest.fixture
+def registry(templates_module, homework_module):
+    registry = templates_module.TemplateRegistry('ru')
+    registry.register(
+        'ru', homework_module.HOMEWORK_VERDICTS,
+        homework_module.MESSAGE_TEMPLATE
+    )
+    registry.load(templates_module.LOCALES)
+    return registry
+
+
+HOMEWORK = {'id': 1, 'homework_name': 'hw.zip', 'lesson_name': 'Спринт 1'}
+
+
+class TestTemplates:
+
+    def test_default_matches_parse_status(self, homework_module):
+        for status in homework_module.HOMEWORK_VERDICTS:
+            homework = dict(HOMEWORK, status=status)
+            assert homework_module.TEMPLATES.get().render(
+                homework, status
+            ) == (
+                f'Изменился статус проверки работы "hw.zip". '
+                f'{homework_module.HOMEWORK_VERDICTS[status]}'
+            )
+
+    def test_locale(self, registry):
+        message = registry.get('en').render(HOMEWORK, 'approved')
+        assert message == (
+            'Homework "hw.zip" review status changed. '
+            'The reviewer liked everything. Hooray!'
+        )
+
+    def test_unknown_locale_falls_back_to_default(self, registry):
+        assert registry.get('xx').render(HOMEWORK, 'approved') == (
+            registry.get().render(HOMEWORK, 'approved')
+        )
+
+    def test_missing_verdicts_fall_back_to_default(self, registry):
+        registry.register('de', {'approved': 'Angenommen.'}, '{verdict}')
+        template = registry.get('de')
+        assert template.render(HOMEWORK, 'approved') == 'Angenommen.'
+        assert template.render(HOMEWORK, 'rejected') == (
+            registry.get().verdicts['rejected']
+        )
+
+    @pytest.mark.parametrize('text, expected', [
+        ('{lesson_name}: {homework_name} - {status}',
+         'Спринт 1: hw.zip - approved'),
+        ('{{{homework_name!r}}} {id:>3}', "{'hw.zip'}   1"),
+        ('{verdict!r:.5}', "'Рабо"),
+        ('{reviewer_comment}!', '!'),
+        ('Без полей', 'Без полей'),
+    ])
+    def test_custom_template(self, registry, text, expected):
+        template = registry.get('ru', text)
+        assert template.render(HOMEWORK, 'approved') == expected
+
+    def test_templates_are_cached(self, registry):
+        assert registry.get('en', '{verdict}') is registry.get(
+            'en', '{verdict}'
+        )
+        registry.register('en', {'approved': 'OK'})
+        assert registry.get('en', '{verdict}').render(
+            HOMEWORK, 'approved'
+        ) == 'OK', 'Новые вердикты должны сбрасывать кэш шаблонов.'
+
+    @pytest.mark.parametrize('text', ['{homework_name', '{} {verdict}'])
+    def test_invalid_template(self, registry, text):
+        from exceptions import InvalidTemplatesConfigException
+        with pytest.raises(InvalidTemplatesConfigException):
+            registry.get('ru', text)
+
+    def test_load_file(self, tmp_path, registry):
+        path = tmp_path / 'templates.json'
+        path.write_text(json.dumps({
+            'en': {'template': '[{status}] {homework_name}'}
+        }))
+        registry.load_file(str(path))
+        assert registry.get('en').render(HOMEWORK, 'rejected') == (
+            '[rejected] hw.zip'
+        )
+
+    def test_check_default_locale(self, tmp_path, templates_module):
+        registry = templates_module.TemplateRegistry('de')
+        registry.load(templates_module.LOCALES)
+        with pytest.raises(templates_module.InvalidTemplatesConfigException):
+            registry.check()
+        path = tmp_path / 'templates.json'
+        path.write_text(json.dumps({'de': {'template': '{verdict}'}}))
+        registry.load_file(str(path))
+        registry.check()
+
+    def test_unknown_default_locale_fails_at_startup(self):
+        import os
+        import subprocess
+        import sys
+        result = subprocess.run(
+            [sys.executable, '-c', 'import homework'],
+            env=dict(os.environ, DEFAULT_LOCALE='xx'),
+            capture_output=True, text=True
+        )
+        assert result.returncode != 0
+        assert 'InvalidTemplatesConfigException' in result.stderr
+
+    def test_tenant_locale(self, tmp_path, monkeypatch, homework_module):
+        import tenants
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'token': 'a', 'chat_id': 1, 'locale': 'en'},
+            {'token': 'b', 'chat_id': 2, 'template': '{verdict}'},
+            {'token': 'c', 'chat_id': 3},
+        ]))
+        monkeypatch.setattr(tenants, 'TENANTS', None)
+        monkeypatch.setattr(tenants, 'TENANTS_FILE', str(path))
+        homework = dict(HOMEWORK, status='approved')
+        messages = [
+            tenants.collect_messages(
+                tenant, {'homeworks': [homework], 'current_date': 1}
+            )[0][1]
+            for tenant in tenants.load_tenants()
+        ]
+        assert messages == [
+            'Homework "hw.zip" review status changed. '
+            'The reviewer liked everything. Hooray!',
+            homework_module.HOMEWORK_VERDICTS['approved'],
+            homework_module.parse_status(homework),
+        ]
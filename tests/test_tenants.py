@@ -0,0 +1,184 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+
+
+@pytest.fixture
+def tenants_module():
+    import tenants
+    return tenants
+
+
+def mock_get_with_data(data):
+    def mocked_response(*args, **kwargs):
+        return check_utils.MockResponseGET(
+            *args, http_status=HTTPStatus.OK, data=data, **kwargs
+        )
+    return mocked_response
+
+
+class TestTenants:
+
+    def test_parse_tenants(self, tenants_module):
+        pairs = tenants_module.parse_tenants('tok1:100, tok2:200,')
+        assert pairs == [('tok1', '100'), ('tok2', '200')], (
+            'Проверьте разбор строки реестра студентов.'
+        )
+
+    def test_parse_tenants_invalid(self, tenants_module):
+        with pytest.raises(
+            tenants_module.InvalidTenantsConfigException
+        ):
+            tenants_module.parse_tenants('token-without-chat')
+
+    def test_load_tenants_falls_back_to_env(
+            self, monkeypatch, tenants_module
+    ):
+        monkeypatch.setattr(tenants_module, 'TENANTS', None)
+        monkeypatch.setattr(tenants_module, 'TENANTS_FILE', None)
+        registry = tenants_module.load_tenants()
+        assert len(registry) == 1, (
+            'Без реестра должен опрашиваться студент из переменных '
+            'окружения.'
+        )
+
+    def test_read_tenants_file(self, tmp_path, monkeypatch, tenants_module):
+        path = tmp_path / 'tenants.json'
+        path.write_text(
+            '[{"token": "a", "chat_id": 1}, {"token": "b", "chat_id": 2}]'
+        )
+        monkeypatch.setattr(tenants_module, 'TENANTS', None)
+        monkeypatch.setattr(tenants_module, 'TENANTS_FILE', str(path))
+        registry = tenants_module.load_tenants()
+        assert [tenant.chat_id for tenant in registry] == [1, 2]
+
+    def test_scheduler_staggers_first_polls(self, tenants_module):
+        registry = tenants_module.TenantRegistry()
+        for index in range(4):
+            registry.add(f'token{index}', index)
+        scheduler = tenants_module.TenantScheduler(registry, period=100)
+        due = scheduler.pop_due(float('inf'))
+        assert [tenant.chat_id for tenant in due] == [0, 1, 2, 3], (
+            'Первые опросы должны идти в порядке реестра.'
+        )
+
+        scheduler = tenants_module.TenantScheduler(registry, period=100)
+        assert len(scheduler.pop_due(0)) <= 1, (
+            'Первые опросы студентов должны распределяться по периоду.'
+        )
+
+    def test_poll_tenant_sends_to_own_chat(
+            self, monkeypatch, tenants_module, data_with_new_hw_status
+    ):
+        monkeypatch.setattr(
+            requests, 'get', mock_get_with_data(data_with_new_hw_status)
+        )
+        registry = tenants_module.TenantRegistry()
+        tenant = registry.add('token', 'chat-42')
+        bot = check_utils.MockTelegramBot()
+
+        assert tenants_module.poll_tenant(bot, tenant)
+        assert bot.chat_id == 'chat-42', (
+            'Сообщение должно уходить в чат студента.'
+        )
+        homework = data_with_new_hw_status['homeworks'][0]
+        assert tenant.state.statuses[str(homework['id'])][0] == 'approved', (
+            'Отправленный статус должен сохраняться в состоянии студента.'
+        )
+
+    def test_poll_tenant_survives_api_error(self, monkeypatch, tenants_module):
+        def mock_request_get_with_exception(*args, **kwargs):
+            raise requests.RequestException('Something wrong')
+
+        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        registry = tenants_module.TenantRegistry()
+        tenant = registry.add('token', 'chat-42')
+        assert not tenants_module.poll_tenant(
+            check_utils.MockTelegramBot(), tenant
+        )
+
+    def test_cycle_deadline_defers_remaining_tenants(
+            self, monkeypatch, tenants_module, data_with_new_hw_status
+    ):
+        import time
+
+        import metrics
+
+        def slow_fetch(headers, timestamp):
+            time.sleep(0.05)
+            return data_with_new_hw_status
+
+        monkeypatch.setattr(tenants_module, 'fetch_api_answer', slow_fetch)
+        registry = tenants_module.TenantRegistry()
+        for index in range(4):
+            registry.add(f'token{index}', index)
+        scheduler = tenants_module.TenantScheduler(
+            registry, period=100, deadline=0.08
+        )
+        bot = check_utils.MockTelegramBot()
+        before = metrics.POLL_CYCLE.count()
+        scheduler.run_pending(bot)
+        assert metrics.POLL_CYCLE.count() == before + 1, (
+            'Длительность цикла опроса должна записываться в метрики.'
+        )
+        scheduler.poll(bot, list(registry), time.monotonic() + 0.08)
+        deferred = scheduler.pop_due(time.monotonic())
+        assert [tenant.chat_id for tenant in deferred] == [2, 3], (
+            'Студенты, не опрошенные до конца цикла, ждут следующего.'
+        )
+
+    def test_poll_once_exit_codes(
+            self, monkeypatch, tenants_module, data_with_new_hw_status
+    ):
+        from sender import RateLimitedSender
+
+        class RecordingBot:
+            def __init__(self):
+                self.sent = []
+
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                self.sent.append(chat_id)
+
+        monkeypatch.setattr(
+            requests, 'get', mock_get_with_data(data_with_new_hw_status)
+        )
+        registry = tenants_module.TenantRegistry()
+        for index in range(3):
+            registry.add(f'token{index}', index)
+        bot = RecordingBot()
+        sender = RateLimitedSender(bot, global_rate=100, chat_rate=100)
+        assert tenants_module.poll_once(
+            bot, registry, sender=sender
+        ) == tenants_module.EXIT_OK
+        assert sorted(bot.sent) == [0, 1, 2], (
+            'Разовый запуск должен дождаться отправки всех сообщений.'
+        )
+
+        def mock_request_get_with_exception(*args, **kwargs):
+            raise requests.RequestException('Something wrong')
+
+        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        assert tenants_module.poll_once(
+            bot, registry, sender=sender
+        ) == tenants_module.EXIT_FAILURE
+
+    def test_failed_send_keeps_cursor(
+            self, monkeypatch, tenants_module, data_with_new_hw_status
+    ):
+        data = dict(data_with_new_hw_status, current_date=1000000)
+        monkeypatch.setattr(requests, 'get', mock_get_with_data(data))
+        monkeypatch.setattr(
+            tenants_module, 'send_message_to', lambda *args: False
+        )
+        registry = tenants_module.TenantRegistry()
+        tenant = registry.add('token', 'chat-42')
+        tenant.timestamp = 998000
+
+        assert tenants_module.poll_tenant(None, tenant)
+        assert tenant.state.statuses == {}
+        assert tenant.timestamp == 998000, (
+            'Курсор не должен сдвигаться, если уведомление не отправлено.'
+        )
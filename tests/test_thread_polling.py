@@ -0,0 +1,93 @@
+import copy
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def thread_polling_module():
+    import thread_polling
+    return thread_polling
+
+
+class TestThreadPolling:
+
+    def test_fan_out_is_bounded_and_ordered(
+            self, monkeypatch, thread_polling_module, data_with_new_hw_status,
+            recording_bot, make_registry
+    ):
+        import tenants
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'max': 0}
+
+        def fetch(headers, timestamp):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            # Первые студенты отвечают медленнее остальных.
+            time.sleep(0.1 if headers['Authorization'].endswith('0') else 0.02)
+            with lock:
+                in_flight['now'] -= 1
+            return copy.deepcopy(data_with_new_hw_status)
+
+        monkeypatch.setattr(tenants, 'fetch_api_answer', fetch)
+        registry = make_registry(12)
+        bot = recording_bot()
+        poller = thread_polling_module.ThreadPoller(
+            registry, workers=4, timeout=5, period=0
+        )
+        started = time.monotonic()
+        try:
+            poller.poll(bot, registry)
+        finally:
+            poller.close()
+        elapsed = time.monotonic() - started
+
+        assert in_flight['max'] <= 4, (
+            'Число одновременных запросов к API должно быть ограничено.'
+        )
+        assert bot.sent == list(range(12)), (
+            'Ответы должны разбираться в порядке очереди опроса.'
+        )
+        assert elapsed < 0.1 * 2 + 0.02 * 10, (
+            'Запросы к API должны выполняться параллельно.'
+        )
+
+    def test_slow_tenant_times_out(
+            self, monkeypatch, thread_polling_module, data_with_new_hw_status,
+            recording_bot, make_registry
+    ):
+        import metrics
+        import tenants
+        release = threading.Event()
+
+        def fetch(headers, timestamp):
+            if headers['Authorization'].endswith('token0'):
+                release.wait(5)
+            return copy.deepcopy(data_with_new_hw_status)
+
+        monkeypatch.setattr(tenants, 'fetch_api_answer', fetch)
+        registry = make_registry(3)
+        slow = registry.get('token0')
+        bot = recording_bot()
+        before = metrics.EXCEPTIONS.get(exception='PollTimeoutException')
+        poller = thread_polling_module.ThreadPoller(
+            registry, workers=2, timeout=0.05, period=0
+        )
+        try:
+            poller.poll(bot, registry)
+            assert bot.sent == [1, 2], (
+                'Медленный ответ не должен задерживать остальных студентов.'
+            )
+            assert metrics.EXCEPTIONS.get(
+                exception='PollTimeoutException'
+            ) == before + 1
+            assert poller.submit(slow) is None, (
+                'Пока прошлый запрос выполняется, новый не запускается.'
+            )
+        finally:
+            release.set()
+            poller.close()
+        poller.executor.shutdown(wait=True)
+        assert slow.key not in poller._in_flight
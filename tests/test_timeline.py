@@ -0,0 +1,144 @@
+import pytest
+
+
+@pytest.fixture
+def timeline_module():
+    import timeline
+    return timeline
+
+
+@pytest.fixture
+def timeline(tmp_path, timeline_module):
+    timeline = timeline_module.Timeline(str(tmp_path / 'timeline.db'))
+    yield timeline
+    timeline.close()
+
+
+def make_homework(status, date_updated, homework_id=1, comment=None):
+    return {
+        'id': homework_id,
+        'homework_name': f'hw{homework_id}.zip',
+        'status': status,
+        'date_updated': date_updated,
+        'reviewer_comment': comment,
+    }
+
+
+class TestTimeline:
+
+    def test_append_is_idempotent(self, timeline):
+        homework = make_homework('reviewing', '2021-04-11T10:00:00Z')
+        assert timeline.append('tenant', [homework]) == 1
+        assert timeline.append('tenant', [homework]) == 0, (
+            'Повторно замеченная смена статуса не должна записываться.'
+        )
+        assert len(timeline) == 1
+
+    def test_events_by_status_and_period(self, timeline, timeline_module):
+        timeline.append('tenant', [
+            make_homework('rejected', '2021-03-01T10:00:00Z', 1, 'Исправить'),
+            make_homework('rejected', '2021-04-11T10:00:00Z', 2),
+            make_homework('approved', '2021-04-12T10:00:00Z', 2),
+        ])
+        since = timeline_module.parse_date('2021-04-01T00:00:00Z')
+        [event] = timeline.events('rejected', since)
+        assert event.homework_id == '2'
+        assert timeline_module.format_date(event.date_updated) == (
+            '2021-04-11T10:00:00Z'
+        )
+        assert [
+            event.reviewer_comment
+            for event in timeline.events(homework_id='1')
+        ] == ['Исправить']
+
+    def test_review_times(self, timeline):
+        timeline.append('tenant', [
+            make_homework('reviewing', '2021-04-11T10:00:00Z', 1),
+            make_homework('rejected', '2021-04-11T12:00:00Z', 1),
+            make_homework('reviewing', '2021-04-12T10:00:00Z', 1),
+            make_homework('approved', '2021-04-12T11:00:00Z', 1),
+            make_homework('reviewing', '2021-04-12T10:00:00Z', 2),
+        ])
+        now = timeline.events(homework_id='2')[0].date_updated + 1800
+        assert [
+            (row.homework_id, row.seconds)
+            for row in timeline.review_times(now=now)
+        ] == [('1', 3 * 3600), ('2', 1800)], (
+            'Время на проверке - сумма периодов reviewing по работе.'
+        )
+
+    def test_queries_use_indexes(self, timeline):
+        connection = timeline._connection
+        plan = connection.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM events '
+            'WHERE status = ? AND date_updated >= ?', ('rejected', 0)
+        ).fetchall()
+        assert 'USING INDEX events_status' in plan[0][-1]
+
+    def test_transitions_are_recorded(
+            self, monkeypatch, timeline, timeline_module, homework_module
+    ):
+        monkeypatch.setattr(timeline_module, '_timeline', timeline)
+        homework = make_homework('approved', '2021-04-11T10:00:00Z')
+        notifications = homework_module.collect_notifications({}, [homework])
+        timeline_module.record_transitions('tenant', notifications)
+        [event] = timeline.events()
+        assert (event.tenant, event.status) == ('tenant', 'approved')
+
+    def test_cli(self, tmp_path, capsys, timeline, timeline_module):
+        timeline.append('tenant', [
+            make_homework('rejected', '2021-04-11T10:00:00Z', 7, 'Поправить')
+        ])
+        assert timeline_module.main([
+            '--path', timeline.path, 'events', '--status', 'rejected'
+        ]) == 0
+        assert capsys.readouterr().out == (
+            '2021-04-11T10:00:00Z\t7\thw7.zip\trejected\tПоправить\n'
+        )
+
+    def test_cli_readme_examples(
+            self, monkeypatch, capsys, timeline, timeline_module
+    ):
+        import time
+        now = time.time()
+        monkeypatch.setattr(timeline_module, 'TIMELINE_PATH', timeline.path)
+        timeline.append('tenant', [
+            make_homework('rejected', '2021-04-11T10:00:00Z', 7),
+            make_homework(
+                'rejected', timeline_module.format_date(now - 3600), 8
+            ),
+            make_homework(
+                'reviewing', timeline_module.format_date(now - 7200), 9
+            ),
+        ])
+        assert timeline_module.main(
+            ['events', '--status', 'rejected', '--days', '30']
+        ) == 0
+        assert capsys.readouterr().out.split('\t')[1] == '8', (
+            'Старые события не должны попадать в выборку за 30 дней.'
+        )
+        assert timeline_module.main(['review', '--limit', '20']) == 0
+        assert capsys.readouterr().out.startswith('9\thw9.zip\t')
+
+    def test_undated_transition_recorded_once_after_delivery(
+            self, monkeypatch, timeline, timeline_module
+    ):
+        import tenants
+        monkeypatch.setattr(timeline_module, '_timeline', timeline)
+        delivered = iter([False, True, True])
+        monkeypatch.setattr(
+            tenants, 'send_message_to', lambda *args: next(delivered)
+        )
+        homework = make_homework('approved', None)
+        response = {'homeworks': [homework], 'current_date': 1000000}
+        tenant = tenants.TenantRegistry().add('token', 42)
+
+        tenants.poll_tenant(None, tenant, fetch=lambda: response)
+        assert len(timeline) == 0, (
+            'Недоставленная смена статуса не должна попадать в историю.'
+        )
+        tenants.poll_tenant(None, tenant, fetch=lambda: response)
+        tenants.poll_tenant(None, tenant, fetch=lambda: response)
+        assert len(timeline) == 1, (
+            'Повтор после неудачной отправки не должен дублировать событие.'
+        )
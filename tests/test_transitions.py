@@ -0,0 +1,108 @@
+import pytest
+
+
+def make_homework(homework_id, status, date_updated):
+    return {
+        'id': homework_id,
+        'homework_name': f'hw{homework_id}.zip',
+        'status': status,
+        'date_updated': date_updated,
+    }
+
+
+class TestTransitions:
+
+    def test_every_changed_homework_is_notified(self, homework_module):
+        homeworks = [
+            make_homework(1, 'approved', '2021-04-11T10:31:09Z'),
+            make_homework(2, 'rejected', '2021-04-11T10:32:09Z'),
+        ]
+        notifications = homework_module.collect_notifications({}, homeworks)
+        assert [homework for homework, _ in notifications] == homeworks, (
+            'Убедитесь, что бот уведомляет обо всех изменившихся работах, '
+            'а не только о первой.'
+        )
+
+    def test_known_status_is_skipped(self, homework_module):
+        statuses = {'1': ('reviewing', '2021-04-11T10:31:09Z')}
+        homeworks = [
+            make_homework(1, 'reviewing', '2021-04-11T10:31:09Z'),
+            make_homework(2, 'reviewing', '2021-04-11T10:35:00Z'),
+        ]
+        transitions = homework_module.find_transitions(statuses, homeworks)
+        assert [homework['id'] for homework in transitions] == [2]
+
+    @pytest.mark.parametrize('status, date_updated, changed', [
+        ('approved', '2021-04-12T10:00:00Z', True),
+        ('rejected', '2021-04-12T10:00:00Z', True),
+        ('rejected', '2021-04-11T10:31:09Z', False),
+        ('approved', '2021-04-10T10:00:00Z', False),
+    ])
+    def test_transition_rules(
+            self, homework_module, status, date_updated, changed
+    ):
+        statuses = {'1': ('rejected', '2021-04-11T10:31:09Z')}
+        transitions = homework_module.find_transitions(
+            statuses, [make_homework(1, status, date_updated)]
+        )
+        assert bool(transitions) is changed
+
+    def test_invalid_homework_does_not_block_others(self, homework_module):
+        homeworks = [
+            make_homework(1, 'unknown', '2021-04-11T10:31:09Z'),
+            make_homework(2, 'approved', '2021-04-11T10:31:09Z'),
+        ]
+        notifications = homework_module.collect_notifications({}, homeworks)
+        assert [homework['id'] for homework, _ in notifications] == [2]
+
+    def test_remember_status(self, homework_module):
+        from storage import TenantState
+        state = TenantState()
+        homework = make_homework(1, 'approved', '2021-04-11T10:31:09Z')
+        homework_module.remember_status(state, homework)
+        assert not homework_module.find_transitions(
+            state.statuses, [homework]
+        )
+
+    def test_next_from_date(self, homework_module):
+        response = {'homeworks': [], 'current_date': 1000}
+        assert homework_module.next_from_date(response, overlap=60) == 940
+        assert homework_module.next_from_date(
+            response, previous=990, overlap=60
+        ) == 990, 'Курсор не должен сдвигаться назад.'
+        with pytest.raises(TypeError):
+            homework_module.next_from_date({'current_date': '1000'})
+
+    def test_cursor_follows_server_clock(
+            self, monkeypatch, homework_module
+    ):
+        import requests
+
+        from storage import MemoryStateStore, TenantState
+        from tests.check_utils import MockResponseGET, MockTelegramBot
+
+        server_date = 1_000_000
+        homework = make_homework(1, 'approved', '2021-04-11T10:31:09Z')
+        requested = []
+
+        def mocked_get(*args, params=None, **kwargs):
+            requested.append(params['from_date'])
+            return MockResponseGET(data={
+                'homeworks': [homework], 'current_date': server_date
+            })
+
+        monkeypatch.setattr(requests, 'get', mocked_get)
+        bot = MockTelegramBot()
+        state = TenantState(server_date - 600)
+        for _ in range(2):
+            homework_module.poll_cycle(
+                bot, MemoryStateStore(), 'state', state
+            )
+        assert requested == [
+            server_date - 600, server_date - homework_module.CURSOR_OVERLAP
+        ], 'from_date должен идти от current_date сервера с перекрытием.'
+        bot.is_message_sent = False
+        homework_module.poll_cycle(bot, MemoryStateStore(), 'state', state)
+        assert not bot.is_message_sent, (
+            'Работа из перекрывающегося окна не должна уведомляться повторно.'
+        )
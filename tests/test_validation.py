@@ -0,0 +1,93 @@
+import pytest
+
+
+@pytest.fixture
+def validator(homework_module):
+    return homework_module.RESPONSE_VALIDATOR
+
+
+class TestResponseValidator:
+
+    def test_record(self, validator):
+        record = validator.record({
+            'id': 7,
+            'homework_name': 'hw.zip',
+            'status': 'approved',
+            'date_updated': '2021-04-11T10:31:09Z',
+            'reviewer_comment': 'Принято!',
+        })
+        assert record == (7, 'hw.zip', 'approved', '2021-04-11T10:31:09Z')
+        assert record.key == '7'
+        assert not hasattr(record, '__dict__'), (
+            'Запись о работе должна быть компактной.'
+        )
+
+    def test_status(self, validator):
+        assert validator.status(
+            {'homework_name': 'hw', 'status': 'reviewing'}
+        ) == 'reviewing'
+
+    def test_optional_fields(self, validator):
+        record = validator.record({'homework_name': 'hw', 'status': 'rejected'})
+        assert record.id is None and record.date_updated is None
+        assert record.key == 'hw'
+
+    @pytest.mark.parametrize('homework, exception_name, field', [
+        ({'status': 'approved'}, 'MissingFieldException', 'homework_name'),
+        ({'homework_name': 'hw'}, 'MissingFieldException', 'status'),
+        ({'homework_name': 'hw', 'status': 'unknown'},
+         'UnknownStatusException', 'status'),
+        (['hw', 'approved'], 'InvalidFieldTypeException', None),
+    ])
+    @pytest.mark.parametrize('method', ['record', 'status'])
+    def test_structured_errors(
+            self, validator, homework, exception_name, field, method
+    ):
+        import exceptions
+        with pytest.raises(getattr(exceptions, exception_name)) as error:
+            getattr(validator, method)(homework, index=3)
+        assert error.value.field == field
+        assert error.value.index == 3
+        assert isinstance(error.value, exceptions.InvalidResponseException)
+
+    def test_errors_match_reference_functions(self, validator):
+        from exceptions import UnexpectedHomeworkStatusException
+        with pytest.raises(KeyError):
+            validator.record({'status': 'approved'})
+        with pytest.raises(UnexpectedHomeworkStatusException):
+            validator.record({'homework_name': 'hw', 'status': 'unknown'})
+        with pytest.raises(TypeError):
+            validator.check_response([])
+        with pytest.raises(KeyError):
+            validator.check_response({'homeworks': []})
+        with pytest.raises(TypeError):
+            validator.check_response({'homeworks': {}, 'current_date': 1})
+
+    def test_check_response_returns_homeworks(
+            self, validator, data_with_new_hw_status
+    ):
+        assert validator.check_response(data_with_new_hw_status) == (
+            data_with_new_hw_status['homeworks']
+        )
+
+    def test_same_messages_as_parse_status(
+            self, homework_module, data_with_new_hw_status
+    ):
+        homeworks = [
+            dict(data_with_new_hw_status['homeworks'][0], id=index, status=s)
+            for index, s in enumerate(homework_module.HOMEWORK_VERDICTS)
+        ]
+        notifications = homework_module.collect_notifications({}, homeworks)
+        assert [message for _, message in notifications] == [
+            homework_module.parse_status(homework) for homework in homeworks
+        ]
+
+    def test_invalid_homeworks_are_counted(self, homework_module):
+        import metrics
+        before = metrics.EXCEPTIONS.get(exception='UnknownStatusException')
+        homework_module.collect_notifications(
+            {}, [{'homework_name': 'hw', 'status': 'unknown'}]
+        )
+        assert metrics.EXCEPTIONS.get(
+            exception='UnknownStatusException'
+        ) == before + 1
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from aiohttp import test_utils
+
+from tests.test_async_polling import MockAsyncTelegramBot
+
+
+@pytest.fixture
+def webhook_module():
+    import webhook
+    return webhook
+
+
+def command(chat_id, text):
+    return {'update_id': 1, 'message': {'chat': {'id': chat_id}, 'text': text}}
+
+
+def run_with_webhook(webhook_module, registry, bot, scenario, secret=None):
+    import async_polling
+
+    async def runner():
+        poller = async_polling.AsyncPoller(registry, None, bot, period=600)
+        handler = webhook_module.WebhookHandler(
+            registry, poller, bot, secret=secret
+        )
+        app = webhook_module.make_app(handler, path='/hook')
+        async with test_utils.TestClient(test_utils.TestServer(app)) as client:
+            result = await scenario(client)
+            await asyncio.gather(*handler.tasks)
+            return result
+    return asyncio.run(runner())
+
+
+class TestWebhook:
+
+    def test_status_command(self, webhook_module):
+        import tenants
+        registry = tenants.TenantRegistry()
+        tenant = registry.add('token', 42)
+        tenant.state.remember(7, 'approved', '2023-01-01T00:00:00Z')
+        bot = MockAsyncTelegramBot()
+
+        async def scenario(client):
+            response = await client.post('/hook', json=command(42, '/status'))
+            return response.status
+
+        assert run_with_webhook(webhook_module, registry, bot, scenario) == 200
+        assert bot.sent == [
+            (42, 'Работа 7: ' + webhook_module.HOMEWORK_VERDICTS['approved'])
+        ]
+
+    def test_refresh_polls_immediately(
+            self, monkeypatch, webhook_module, data_with_new_hw_status
+    ):
+        import async_polling
+        import tenants
+        calls = []
+
+        async def fetch(session, headers, timestamp):
+            calls.append(headers)
+            return data_with_new_hw_status
+
+        monkeypatch.setattr(async_polling, 'fetch_api_answer_async', fetch)
+        registry = tenants.TenantRegistry()
+        registry.add('token', 42)
+        bot = MockAsyncTelegramBot()
+
+        async def scenario(client):
+            await client.post('/hook', json=command(42, '/refresh@hw_bot'))
+
+        run_with_webhook(webhook_module, registry, bot, scenario)
+        assert len(calls) == 1, (
+            'Команда /refresh должна сразу запрашивать API.'
+        )
+        assert len(bot.sent) == 2
+        assert bot.sent[1][1].startswith('Работа ')
+
+    def test_unknown_chat(self, webhook_module):
+        import tenants
+        bot = MockAsyncTelegramBot()
+
+        async def scenario(client):
+            await client.post('/hook', json=command(1, '/status'))
+
+        run_with_webhook(
+            webhook_module, tenants.TenantRegistry(), bot, scenario
+        )
+        assert bot.sent == [(1, webhook_module.UNKNOWN_CHAT_MESSAGE)]
+
+    def test_secret_token_is_checked(self, webhook_module):
+        import tenants
+        bot = MockAsyncTelegramBot()
+
+        async def scenario(client):
+            denied = await client.post('/hook', json=command(1, '/status'))
+            allowed = await client.post(
+                '/hook', json={'update_id': 2},
+                headers={webhook_module.SECRET_HEADER: 'secret'}
+            )
+            return denied.status, allowed.status
+
+        assert run_with_webhook(
+            webhook_module, tenants.TenantRegistry(), bot, scenario,
+            secret='secret'
+        ) == (403, 200)
+        assert bot.sent == []
+
+    @pytest.mark.parametrize('body', ['[1, 2]', '"text"', 'null', 'not json'])
+    def test_invalid_body_is_rejected(self, webhook_module, body):
+        import tenants
+        bot = MockAsyncTelegramBot()
+
+        async def scenario(client):
+            response = await client.post(
+                '/hook', data=body,
+                headers={'Content-Type': 'application/json'}
+            )
+            return response.status
+
+        assert run_with_webhook(
+            webhook_module, tenants.TenantRegistry(), bot, scenario
+        ) == 400
+        assert bot.sent == []
+
+    def test_refuses_to_start_without_secret(
+            self, monkeypatch, webhook_module
+    ):
+        from exceptions import AbsenceVariableException
+        started = []
+        monkeypatch.setattr(webhook_module, 'WEBHOOK_SECRET', None)
+        monkeypatch.setattr(
+            webhook_module, 'load_tenants', lambda: started.append(1)
+        )
+        with pytest.raises(AbsenceVariableException):
+            asyncio.run(webhook_module.main_async())
+        assert started == [], (
+            'Без WEBHOOK_SECRET сервер не должен запускаться.'
+        )
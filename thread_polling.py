@@ -0,0 +1,160 @@
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+
+import bootstrap  # noqa: F401
+import http_client
+import metrics
+from exceptions import AbsenceVariableException, PollTimeoutException
+from homework import TELEGRAM_TOKEN
+from logconfig import start_listener
+from outbox import open_outbox, start_delivery
+from storage import open_state_store
+from tenants import (TenantScheduler,
+                     delivery_options,
+                     fetch_tenant,
+                     load_tenants,
+                     poll_tenant,
+                     restore_tenants)
+
+# Число потоков, одновременно выполняющих запросы к API,
+# и время ожидания ответа для одного студента в секундах.
+POLL_WORKERS = int(os.getenv('POLL_WORKERS', 8))
+POLL_TASK_TIMEOUT = float(os.getenv('POLL_TASK_TIMEOUT', 30))
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+def wait_result(future, deadline):
+    """Ждёт ответ API из потока не дольше, чем до deadline.
+
+    Запрос, не уложившийся в срок, отменяется, если ещё не начат;
+    начатый запрос дорабатывает в своём потоке, но его ответ
+    в этом цикле уже не используется.
+    """
+    try:
+        return future.result(timeout=max(0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        raise PollTimeoutException(
+            'Ответ API не получен за отведённое время.'
+        )
+
+
+class ThreadPoller(TenantScheduler):
+    """Опрашивает студентов пулом потоков синхронным кодом.
+
+    Запросы к API выполняются в workers потоках, в работе не больше
+    workers запросов. Ответы разбираются в основном потоке в порядке
+    очереди опроса, поэтому состояние студентов, хранилище и очередь
+    доставки по-прежнему используются из одного потока. Ответ
+    ждётся не дольше timeout секунд после запуска запроса.
+    """
+
+    def __init__(
+        self, tenants, workers=POLL_WORKERS, timeout=POLL_TASK_TIMEOUT,
+        **kwargs
+    ):
+        super().__init__(tenants, **kwargs)
+        self.workers = workers
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='poll'
+        )
+        self._in_flight = {}
+
+    def submit(self, tenant):
+        """Запускает запрос к API для студента в пуле потоков.
+
+        Возвращает функцию ожидания ответа или None, если прошлый
+        запрос студента, не уложившийся в срок, ещё выполняется.
+        """
+        if tenant.key in self._in_flight:
+            return None
+        future = self.executor.submit(fetch_tenant, tenant, stream=False)
+        self._in_flight[tenant.key] = future
+        future.add_done_callback(partial(self._finished, tenant.key))
+        return partial(wait_result, future, time.monotonic() + self.timeout)
+
+    def _finished(self, key, future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    def collect(self, bot, tenant, fetch):
+        """Разбирает ответ API для студента и ставит следующий опрос."""
+        if fetch is None:
+            logger.debug(
+                f'Прошлый опрос для чата {tenant.chat_id} ещё не завершён.'
+            )
+            succeeded = False
+        else:
+            succeeded = poll_tenant(
+                bot, tenant, self.store, self.queue, fetch, self.outbox
+            )
+        self.reschedule(tenant, succeeded)
+
+    def poll(self, bot, tenants, deadline=None):
+        """Опрашивает студентов параллельно, сохраняя порядок очереди.
+
+        Новый запрос запускается, когда освобождается место
+        в окне из workers запросов. После deadline новые запросы
+        не запускаются, оставшиеся студенты ждут следующего цикла.
+        """
+        waiting = deque()
+        for index, tenant in enumerate(tenants):
+            if deadline is not None and time.monotonic() >= deadline:
+                self.defer(tenants[index:])
+                break
+            waiting.append((tenant, self.submit(tenant)))
+            if len(waiting) >= self.workers:
+                self.collect(bot, *waiting.popleft())
+        while waiting:
+            self.collect(bot, *waiting.popleft())
+
+    def close(self):
+        """Останавливает пул, не дожидаясь зависших запросов."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    """Опрашивает API для всех студентов из реестра пулом потоков."""
+    from telebot import TeleBot
+
+    start_listener()
+    registry = load_tenants()
+    if TELEGRAM_TOKEN is None or not registry:
+        logger.critical('Не задан TELEGRAM_TOKEN или реестр студентов.')
+        raise AbsenceVariableException()
+    bot = TeleBot(token=TELEGRAM_TOKEN)
+    http_client.configure_session()
+    http_client.configure_cache()
+    store = open_state_store()
+    outbox = open_outbox()
+    restore_tenants(registry, store)
+    metrics.start_http_server()
+    logger.info(
+        f'Запущен опрос для студентов: {len(registry)}, '
+        f'потоков: {POLL_WORKERS}.'
+    )
+    poller = ThreadPoller(
+        registry, store=store, **delivery_options(bot, outbox)
+    )
+    delivery = start_delivery(outbox, bot)
+    try:
+        poller.run_forever(bot)
+    finally:
+        poller.close()
+        if delivery is not None:
+            delivery.stop()
+        http_client.close_session()
+        store.close()
+        if outbox is not None:
+            outbox.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import bootstrap  # noqa: F401
+
+# Путь к базе SQLite с историей статусов работ. Если задан, бот
+# дописывает в неё каждую замеченную смену статуса.
+TIMELINE_PATH = os.getenv('TIMELINE_PATH')
+REVIEWING = 'reviewing'
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+DAY = 24 * 3600
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+TimelineEvent = namedtuple('TimelineEvent', (
+    'tenant', 'homework_id', 'homework_name', 'status', 'date_updated',
+    'reviewer_comment'
+))
+ReviewTime = namedtuple(
+    'ReviewTime', ('tenant', 'homework_id', 'homework_name', 'seconds')
+)
+
+_timeline = None
+_timeline_lock = threading.Lock()
+
+
+def parse_date(value):
+    """Переводит date_updated из ответа API в секунды эпохи или None."""
+    try:
+        return int(datetime.strptime(value, DATE_FORMAT).replace(
+            tzinfo=timezone.utc
+        ).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def format_date(timestamp):
+    """Переводит секунды эпохи в формат date_updated."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        DATE_FORMAT
+    )
+
+
+class Timeline:
+    """История статусов работ в базе SQLite, только для дописывания.
+
+    Повторно замеченная смена статуса (перекрытие окон опроса,
+    повтор после сбоя) не записывается второй раз. Индексы по
+    статусу с датой и по работе с датой позволяют выбирать события
+    за период без полного просмотра таблицы.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'id INTEGER PRIMARY KEY, tenant TEXT, homework_id TEXT, '
+                'homework_name TEXT, status TEXT, date_updated INTEGER, '
+                'reviewer_comment TEXT, recorded_at REAL)'
+            )
+            self._connection.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS events_homework '
+                'ON events (tenant, homework_id, date_updated, status)'
+            )
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS events_status '
+                'ON events (status, date_updated)'
+            )
+
+    def append(self, tenant, homeworks, now=None):
+        """Дописывает смены статусов работ; возвращает число новых событий.
+
+        Работа без date_updated получает дату записи.
+        """
+        now = time.time() if now is None else now
+        rows = []
+        for homework in homeworks:
+            date_updated = parse_date(homework.get('date_updated'))
+            rows.append((
+                tenant,
+                str(homework.get('id', homework['homework_name'])),
+                homework['homework_name'],
+                homework['status'],
+                int(now) if date_updated is None else date_updated,
+                homework.get('reviewer_comment'),
+                now,
+            ))
+        with self._lock, self._connection:
+            cursor = self._connection.executemany(
+                'INSERT OR IGNORE INTO events (tenant, homework_id, '
+                'homework_name, status, date_updated, reviewer_comment, '
+                'recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+        return cursor.rowcount
+
+    def events(
+        self, status=None, since=None, until=None, tenant=None,
+        homework_id=None, limit=None
+    ):
+        """Возвращает события по фильтрам в порядке date_updated.
+
+        since и until - секунды эпохи, until не включается.
+        """
+        conditions, params = [], []
+        for condition, value in (
+            ('status = ?', status),
+            ('tenant = ?', tenant),
+            ('homework_id = ?', homework_id),
+            ('date_updated >= ?', since),
+            ('date_updated < ?', until),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        query = (
+            'SELECT tenant, homework_id, homework_name, status, '
+            'date_updated, reviewer_comment FROM events'
+        )
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY date_updated, id'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [TimelineEvent(*row) for row in rows]
+
+    def review_times(self, since=None, tenant=None, limit=None, now=None):
+        """Считает время на проверке для каждой работы, дольше - выше.
+
+        Проверка длится от события reviewing до следующего события
+        той же работы; незавершённая проверка считается до now.
+        since - учитываются проверки, начатые не раньше since.
+        События reviewing выбираются по индексу статуса, следующее
+        событие работы - по индексу работы.
+        """
+        now = time.time() if now is None else now
+        query = (
+            'SELECT tenant, homework_id, homework_name, '
+            'SUM(COALESCE(next_date, ?) - date_updated) AS seconds '
+            'FROM (SELECT tenant, homework_id, homework_name, date_updated, '
+            '(SELECT MIN(later.date_updated) FROM events AS later '
+            'WHERE later.tenant = event.tenant '
+            'AND later.homework_id = event.homework_id '
+            'AND later.date_updated > event.date_updated) AS next_date '
+            'FROM events AS event WHERE status = ?'
+        )
+        params = [int(now), REVIEWING]
+        if since is not None:
+            query += ' AND date_updated >= ?'
+            params.append(since)
+        if tenant is not None:
+            query += ' AND tenant = ?'
+            params.append(tenant)
+        query += ') GROUP BY tenant, homework_id ORDER BY seconds DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [ReviewTime(*row) for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM events'
+            ).fetchone()[0]
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+
+def get_timeline():
+    """Возвращает общую историю статусов или None, если она не настроена."""
+    global _timeline
+    with _timeline_lock:
+        if _timeline is None and TIMELINE_PATH:
+            _timeline = Timeline(TIMELINE_PATH)
+    return _timeline
+
+
+def record_transitions(tenant, notifications):
+    """Дописывает в общую историю работы из доставленных уведомлений.
+
+    Ошибка записи только логируется: история не должна мешать
+    уведомлениям.
+    """
+    timeline = get_timeline()
+    if timeline is None or not notifications:
+        return
+    try:
+        timeline.append(tenant, [homework for homework, _ in notifications])
+    except sqlite3.Error as error:
+        logger.error(f'История статусов не записана: {error}')
+
+
+def parse_args(argv=None):
+    """Разбирает параметры запросов к истории статусов.
+
+    Общие фильтры задаются после команды:
+    timeline.py events --status rejected --days 30.
+    """
+    parser = argparse.ArgumentParser(description='История статусов работ.')
+    parser.add_argument(
+        '--path', default=TIMELINE_PATH, required=TIMELINE_PATH is None,
+        help='база SQLite, по умолчанию TIMELINE_PATH'
+    )
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument(
+        '--days', type=float, help='только события за последние дни'
+    )
+    filters.add_argument('--tenant', help='ключ состояния студента')
+    filters.add_argument('--limit', type=int)
+    commands = parser.add_subparsers(dest='command', required=True)
+    events = commands.add_parser(
+        'events', parents=[filters], help='события по фильтрам'
+    )
+    events.add_argument('--status', help='например, rejected')
+    events.add_argument('--homework', help='id работы')
+    commands.add_parser(
+        'review', parents=[filters], help='время на проверке по работам'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Печатает ответ на запрос к истории статусов."""
+    args = parse_args(argv)
+    since = None if args.days is None else time.time() - args.days * DAY
+    timeline = Timeline(args.path)
+    try:
+        if args.command == 'review':
+            for row in timeline.review_times(
+                since, tenant=args.tenant, limit=args.limit
+            ):
+                print(
+                    f'{row.homework_id}\t{row.homework_name}\t'
+                    f'{row.seconds / 3600:.1f} ч'
+                )
+        else:
+            for event in timeline.events(
+                args.status, since, tenant=args.tenant,
+                homework_id=args.homework, limit=args.limit
+            ):
+                print(
+                    f'{format_date(event.date_updated)}\t'
+                    f'{event.homework_id}\t{event.homework_name}\t'
+                    f'{event.status}\t{event.reviewer_comment or ""}'
+                )
+    finally:
+        timeline.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
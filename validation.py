@@ -0,0 +1,116 @@
+from collections import namedtuple
+from operator import itemgetter
+
+from exceptions import (InvalidFieldTypeException,
+                        MissingFieldException,
+                        UnknownStatusException)
+
+HOMEWORKS_KEY = 'homeworks'
+# Обязательные поля работы; id и date_updated необязательны.
+HOMEWORK_FIELDS = ('homework_name', 'status')
+
+
+class HomeworkRecord(namedtuple(
+    'HomeworkRecord', ('id', 'homework_name', 'status', 'date_updated')
+)):
+    """Проверенная работа из ответа API: только нужные боту поля."""
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        """Идентификатор работы для хранения статуса."""
+        return str(self.homework_name if self.id is None else self.id)
+
+
+class ResponseValidator:
+    """Проверка ответа API, подготовленная один раз.
+
+    Обязательные ключи ответа и вердикты статусов фиксируются
+    при создании, поля записи извлекаются одним itemgetter.
+    Ошибки - подклассы InvalidResponseException с полем и номером
+    работы; они же KeyError, TypeError или
+    UnexpectedHomeworkStatusException, как в check_response
+    и parse_status.
+    """
+
+    def __init__(self, answer_keys, verdicts):
+        self.answer_keys = tuple(answer_keys)
+        self.verdicts = dict(verdicts)
+        self._get_record = itemgetter(*HomeworkRecord._fields)
+
+    def check_response(self, response):
+        """Проверяет ответ API и возвращает список работ."""
+        if not isinstance(response, dict):
+            raise InvalidFieldTypeException(
+                f'Ответ должен быть словарем: {type(response)}'
+            )
+        for key in self.answer_keys:
+            if response.get(key) is None:
+                raise MissingFieldException(
+                    f'Указанный ключ отсутствует: {key}', field=key
+                )
+        homeworks = response[HOMEWORKS_KEY]
+        if not isinstance(homeworks, list):
+            raise InvalidFieldTypeException(
+                'Данные под ключом "homeworks" должны быть '
+                f'списком: {homeworks}',
+                field=HOMEWORKS_KEY
+            )
+        return homeworks
+
+    def record(self, homework, index=None):
+        """Проверяет работу и возвращает HomeworkRecord.
+
+        Обычная работа со всеми полями разбирается одним вызовом
+        itemgetter, остальные - медленнее, через dict.get.
+        """
+        try:
+            fields = self._get_record(homework)
+        except (KeyError, TypeError):
+            fields = self._optional_fields(homework, index)
+        if fields[2] not in self.verdicts:
+            self._raise_invalid(homework, index)
+        return HomeworkRecord._make(fields)
+
+    def status(self, homework, index=None):
+        """Проверяет работу и возвращает её статус.
+
+        Те же проверки, что в record, но без HomeworkRecord: для
+        уведомления нужен только статус, остальное берётся из работы.
+        """
+        try:
+            status = homework['status']
+            homework['homework_name']
+        except (KeyError, TypeError):
+            self._raise_invalid(homework, index)
+        if status not in self.verdicts:
+            self._raise_invalid(homework, index)
+        return status
+
+    def _optional_fields(self, homework, index):
+        if not isinstance(homework, dict) or 'homework_name' not in homework:
+            self._raise_invalid(homework, index)
+        return (
+            homework.get('id'),
+            homework['homework_name'],
+            homework.get('status'),
+            homework.get('date_updated'),
+        )
+
+    def _raise_invalid(self, homework, index):
+        if not isinstance(homework, dict):
+            raise InvalidFieldTypeException(
+                f'Работа должна быть словарем: {type(homework)}',
+                index=index
+            )
+        for field in HOMEWORK_FIELDS:
+            if field not in homework or homework[field] is None:
+                raise MissingFieldException(
+                    f'Ключ "{field}" отсутствует в ответе API.',
+                    field=field, index=index
+                )
+        raise UnknownStatusException(
+            f'Неизвестный статус домашней работы: {homework["status"]}.',
+            field='status', index=index
+        )
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+
+import aiohttp
+from aiohttp import web
+from telebot.async_telebot import AsyncTeleBot
+
+import bootstrap  # noqa: F401
+import metrics
+from async_polling import (ASYNC_MAX_CONCURRENCY,
+                           AsyncPoller,
+                           api_timeout,
+                           send_message_async,
+                           start_outbox_delivery,
+                           stop_outbox_delivery)
+from delivery import DeliveryQueue
+from exceptions import AbsenceVariableException
+from homework import HOMEWORK_VERDICTS, TELEGRAM_TOKEN
+from logconfig import start_listener
+from outbox import open_outbox
+from storage import open_state_store
+from tenants import load_tenants, restore_tenants
+
+# Адрес, который Telegram будет вызывать при новых сообщениях боту.
+# Без WEBHOOK_URL вебхук не регистрируется, сервер только слушает порт.
+# WEBHOOK_SECRET обязателен: без него сервер не запускается.
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+UNKNOWN_CHAT_MESSAGE = 'Чат не подписан на уведомления о домашних работах.'
+NO_STATUSES_MESSAGE = 'Пока нет известных статусов домашних работ.'
+REFRESH_BUSY_MESSAGE = 'Проверка статусов уже идёт.'
+REFRESH_FAILED_MESSAGE = 'Не удалось получить статусы, попробуйте позже.'
+HELP_MESSAGE = (
+    '/status - последние известные статусы работ\n'
+    '/refresh - проверить статусы прямо сейчас'
+)
+
+logger = logging.getLogger(f'homework.{__name__}')
+
+
+def format_statuses(statuses, verdicts=HOMEWORK_VERDICTS):
+    """Готовит сводку известных статусов домашних работ."""
+    if not statuses:
+        return NO_STATUSES_MESSAGE
+    return '\n'.join(
+        f'Работа {homework_id}: {verdicts.get(status, status)}'
+        for homework_id, (status, _) in sorted(statuses.items())
+    )
+
+
+def parse_command(update):
+    """Возвращает чат и команду из обновления Telegram или None."""
+    message = update.get('message') or {}
+    text = (message.get('text') or '').strip()
+    chat_id = (message.get('chat') or {}).get('id')
+    if chat_id is None or not text.startswith('/'):
+        return None
+    return chat_id, text.split()[0].split('@')[0]
+
+
+class WebhookHandler:
+    """Принимает обновления Telegram и выполняет команды студентов.
+
+    Ответ Telegram отправляется сразу, команда выполняется в фоне,
+    чтобы медленный запрос к API не задерживал вебхук.
+    """
+
+    def __init__(self, registry, poller, bot, secret=WEBHOOK_SECRET):
+        self.registry = registry
+        self.poller = poller
+        self.bot = bot
+        self.secret = secret
+        self.tasks = set()
+
+    async def handle(self, request):
+        """Обрабатывает POST-запрос Telegram с обновлением."""
+        if self.secret and request.headers.get(SECRET_HEADER) != self.secret:
+            return web.Response(status=403)
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        if not isinstance(update, dict):
+            return web.Response(status=400)
+        command = parse_command(update)
+        if command is not None:
+            task = asyncio.create_task(self.execute(*command))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        return web.Response()
+
+    async def execute(self, chat_id, command):
+        """Выполняет команду из чата и отвечает в него."""
+        tenants = self.registry.by_chat(chat_id)
+        if not tenants:
+            reply = UNKNOWN_CHAT_MESSAGE
+        elif command == '/status':
+            reply = '\n'.join(
+                format_statuses(
+                    tenant.state.statuses, tenant.message_template.verdicts
+                )
+                for tenant in tenants
+            )
+        elif command == '/refresh':
+            replies = await asyncio.gather(
+                *(self.refresh(tenant) for tenant in tenants)
+            )
+            reply = '\n'.join(replies)
+        else:
+            reply = HELP_MESSAGE
+        await send_message_async(self.bot, chat_id, reply)
+
+    async def refresh(self, tenant):
+        """Опрашивает API для студента вне расписания."""
+        logger.debug(f'Внеочередной опрос для чата {tenant.chat_id}.')
+        succeeded = await self.poller.poll_now(tenant)
+        if succeeded is None:
+            return REFRESH_BUSY_MESSAGE
+        if not succeeded:
+            return REFRESH_FAILED_MESSAGE
+        return format_statuses(
+            tenant.state.statuses, tenant.message_template.verdicts
+        )
+
+
+def make_app(handler, path=WEBHOOK_PATH):
+    """Создаёт приложение aiohttp с обработчиком вебхука."""
+    app = web.Application()
+    app.router.add_post(path, handler.handle)
+    return app
+
+
+async def main_async():
+    """Запускает вебхук и опрос API в одном цикле событий."""
+    start_listener()
+    if not WEBHOOK_SECRET:
+        logger.critical(
+            'Не задан WEBHOOK_SECRET: без него сервер примет '
+            'поддельные обновления от кого угодно.'
+        )
+        raise AbsenceVariableException()
+    registry = load_tenants()
+    if TELEGRAM_TOKEN is None or not registry:
+        logger.critical('Не задан TELEGRAM_TOKEN или реестр студентов.')
+        raise AbsenceVariableException()
+    bot = AsyncTeleBot(token=TELEGRAM_TOKEN)
+    store = open_state_store()
+    outbox = open_outbox()
+    restore_tenants(registry, store)
+    metrics.start_http_server()
+    delivery = start_outbox_delivery(outbox)
+    connector = aiohttp.TCPConnector(limit=ASYNC_MAX_CONCURRENCY)
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=api_timeout()
+    ) as session:
+        poller = AsyncPoller(
+            registry, session, bot, store=store, outbox=outbox,
+            queue=DeliveryQueue() if outbox is None else None
+        )
+        runner = web.AppRunner(
+            make_app(WebhookHandler(registry, poller, bot))
+        )
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+            if WEBHOOK_URL:
+                await bot.set_webhook(
+                    url=WEBHOOK_URL, secret_token=WEBHOOK_SECRET
+                )
+            logger.info(
+                f'Вебхук слушает {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}.'
+            )
+            await poller.run_forever()
+        finally:
+            await runner.cleanup()
+            await bot.close_session()
+            stop_outbox_delivery(outbox, delivery)
+            store.close()
+
+
+def main():
+    """Запускает бота в режиме вебхука."""
+    asyncio.run(main_async())
+
+
+if __name__ == '__main__':
+    main()